@@ -1,5 +1,7 @@
 EPSG = 2272
 DEFAULT_YEAR = 2019
+STORAGE_FORMAT = "parquet"
+GEOCODE_PROCESSES = 1
 
 from .assets import *
 from .businesslicenses import *
@@ -27,3 +29,11 @@ from .trashcans import *
 
 
 from .regions import *
+from .storage import *
+from .cache import *
+from .catalog import *
+from .schema import *
+from .raw import *
+from .refresh import *
+from .aggregate import *
+from .geocoding import *
@@ -0,0 +1,171 @@
+import pandas as pd
+from .geocoding import REGION_LAYERS
+
+__all__ = ["aggregate_sql"]
+
+# the functions that build a geometry from WKT in each SQL dialect
+GEOM_FROM_TEXT = {
+    "postgis": "ST_GeomFromText('{wkt}', 4326)",
+    "spatialite": "GeomFromText('{wkt}', 4326)",
+    "duckdb": "ST_GeomFromText('{wkt}')",
+}
+
+
+def _quote(value):
+    """
+    Internal function to format a value as a SQL literal.
+    """
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return str(value)
+
+
+def _check_columns(*columns):
+    """
+    Internal function to make sure the input column names are safe to
+    include in a SQL query.
+    """
+    for col in columns:
+        if not str(col).replace("_", "").isalnum():
+            raise ValueError(f"Invalid column name '{col}'")
+
+
+def where_sql(where):
+    """
+    Convert a mapping of column names to allowed values to a SQL where
+    clause, or None if there are no conditions.
+
+    Parameters
+    ----------
+    where : dict, optional
+        the allowed value, or list of values, of each column
+    """
+    clauses = []
+    for col, values in (where or {}).items():
+        _check_columns(col)
+        if isinstance(values, (list, tuple, set)):
+            values = ", ".join(_quote(value) for value in values)
+            clauses.append(f"{col} IN ({values})")
+        else:
+            clauses.append(f"{col} = {_quote(values)}")
+    return " AND ".join(clauses) or None
+
+
+def where_mask(data, where):
+    """
+    Return the boolean mask selecting the rows of the input data that
+    match a mapping of column names to allowed values.
+    """
+    mask = pd.Series(True, index=data.index)
+    for col, values in (where or {}).items():
+        if not isinstance(values, (list, tuple, set)):
+            values = [values]
+        mask &= data[col].isin(list(values))
+    return mask
+
+
+def region_values(regions, by, dialect="postgis", precision=7):
+    """
+    Format region polygons as the rows of a SQL VALUES list.
+
+    Parameters
+    ----------
+    regions : GeoDataFrame
+        the region polygons, with a name column `by`
+    by : str
+        the name column of the regions
+    dialect : str, optional
+        the SQL dialect: "postgis" (including CARTO), "spatialite", or "duckdb"
+    precision : int, optional
+        the number of decimal places of the coordinates, in degrees
+
+    Returns
+    -------
+    values : str
+        the comma-separated rows, each holding the region name and geometry
+    """
+    from shapely import wkt
+
+    template = GEOM_FROM_TEXT[dialect]
+    rows = []
+    for name, geometry in zip(regions[by], regions.to_crs(epsg=4326).geometry):
+        text = wkt.dumps(geometry, rounding_precision=precision, trim=True)
+        rows.append(f"({_quote(str(name))}, {template.format(wkt=text)})")
+    return ",\n".join(rows)
+
+
+def aggregate_sql(
+    table_name,
+    by,
+    regions,
+    group=None,
+    where=None,
+    geometry="the_geom",
+    dialect="postgis",
+):
+    """
+    Build the SQL query that counts the rows of a table in each region,
+    using a spatial join and GROUP BY on the database server.
+
+    Parameters
+    ----------
+    table_name : str
+        the name of the table of point data
+    by : str
+        the region column of the result, e.g., "puma"
+    regions : GeoDataFrame or str
+        the region polygons, which are included in the query, or the name
+        of a table in the database with a `by` column and a "geom" column
+    group : str, optional
+        a column of the table to also group by
+    where : str or dict, optional
+        a SQL where clause, or a mapping of column names to allowed values,
+        selecting the rows to count
+    geometry : str, optional
+        the point geometry column of the table
+    dialect : str, optional
+        the SQL dialect: "postgis" (including CARTO), "spatialite", or "duckdb"
+
+    Returns
+    -------
+    sql : str
+        the query, returning a `by` column, a `group` column, if provided,
+        and a "count" column
+    """
+    _check_columns(by, geometry, *([group] if group else []))
+
+    if isinstance(regions, str):
+        _check_columns(regions)
+        sql, source = "", f"(SELECT {by} AS region, geom FROM {regions})"
+    else:
+        values = region_values(regions, by, dialect=dialect)
+        sql, source = f"WITH regions (region, geom) AS (VALUES\n{values}\n)\n", "regions"
+
+    columns = ["r.region"] + ([f"t.{group}"] if group else [])
+    select = [f"r.region AS {by}"] + ([f"t.{group} AS {group}"] if group else [])
+    if not isinstance(where, str):
+        where = where_sql(where)
+
+    sql += (
+        f"SELECT {', '.join(select)}, COUNT(*) AS count\n"
+        f"FROM {table_name} AS t\n"
+        f"JOIN {source} AS r ON ST_Within(t.{geometry}, r.geom)\n"
+    )
+    if where:
+        sql += f"WHERE {where}\n"
+    sql += f"GROUP BY {', '.join(columns)}"
+    return sql
+
+
+def format_counts(counts, by, group=None):
+    """
+    Return the region counts in a standard form: sorted by region (and
+    group), with integer counts and a default index.
+    """
+    columns = [by] + ([group] if group else [])
+    counts = counts[[*columns, "count"]].copy()
+    counts["count"] = counts["count"].astype("int64")
+    for col in columns:
+        if counts[col].dtype.name == "category":
+            counts[col] = counts[col].astype(object)
+    return counts.sort_values(columns).reset_index(drop=True)
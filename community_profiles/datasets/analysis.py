@@ -8,6 +8,38 @@ from .regions import *
 pumas = PUMAs.get().sort_values("geo_id").set_index("geo_id")
 
 
+def _group_totals(df, by, weight=None):
+    """
+    Internal function to compute the group sizes (or sums of the
+    `weight` column) of a data frame or an iterator of data frame chunks.
+
+    When given chunks, e.g., from `Dataset.iter_chunks()`, the totals
+    are aggregated incrementally so only one chunk is held in memory.
+    """
+    if isinstance(df, pd.DataFrame):
+        df = [df]
+
+    totals = None
+    for chunk in df:
+        group = chunk.groupby(by)
+        result = group.size() if weight is None else group[weight].sum()
+        if totals is not None:
+            # summing by label keeps integer counts as integers
+            levels = list(range(result.index.nlevels))
+            result = pd.concat([totals, result]).groupby(level=levels).sum()
+        totals = result
+
+    # no chunks: an empty total for each group
+    if totals is None:
+        names = by if isinstance(by, list) else [by]
+        index = pd.MultiIndex.from_arrays([[]] * len(names), names=names)
+        if len(names) == 1:
+            index = index.get_level_values(0)
+        totals = pd.Series([], index=index, dtype="int64", name=weight)
+
+    return totals
+
+
 def census_count(
     df, group2=None, weight="person_weight", normalize=False, total=None, drop=True
 ):
@@ -17,7 +49,8 @@ def census_count(
     
         Parameters
         ----------
-        df : DataFrame/GeoDataFrame
+        df : DataFrame/GeoDataFrame, or iterator of DataFrames
+            the data, or chunks of the data to aggregate incrementally
         
         group2 : str, optional
             a string keyword that specifies if there is 
@@ -49,8 +82,7 @@ def census_count(
     # Returns pivot dataframe with with second group as columns
 
     if group2 is not None:
-        group = df.groupby(["geo_id", group2])
-        census_count = group[weight].sum().reset_index()
+        census_count = _group_totals(df, ["geo_id", group2], weight).reset_index()
 
         census_count = census_count.pivot(
             index="geo_id", columns=group2, values=weight
@@ -59,8 +91,7 @@ def census_count(
     # Groupby PUMA
     # Returns series
     else:
-        group = df.groupby(["geo_id"])
-        census_count = group[weight].sum().reset_index(drop=drop)
+        census_count = _group_totals(df, ["geo_id"], weight).reset_index(drop=drop)
 
     # Divide series or dataframe by total to return percentage
     if normalize:
@@ -76,7 +107,8 @@ def puma_count(df, group2=None, normalize=False, total=None):
         
         Parameters
         ----------
-        df : DataFrame/GeoDataFrame
+        df : DataFrame/GeoDataFrame, or iterator of DataFrames
+            the data, or chunks of the data to aggregate incrementally
         
         group2 : str, optional
             a string keyword that specifies if there is 
@@ -100,8 +132,7 @@ def puma_count(df, group2=None, normalize=False, total=None):
     # Two columns to groupby
     # Returns pivot dataframe with with second group as columns
     if group2 is not None:
-        group = df.groupby(["geo_id", group2])
-        puma_count = group.size().reset_index()
+        puma_count = _group_totals(df, ["geo_id", group2]).reset_index()
 
         puma_count = puma_count.pivot(index="geo_id", columns=group2, values=0).fillna(
             0
@@ -109,8 +140,7 @@ def puma_count(df, group2=None, normalize=False, total=None):
     # Groupby PUMA
     # Returns series
     else:
-        group = df.groupby(["geo_id"])
-        puma_count = group.size().reindex(pumas.index).fillna(0)
+        puma_count = _group_totals(df, ["geo_id"]).reindex(pumas.index).fillna(0)
 
     # Divide series or dataframe by total to return percentage
     if normalize:
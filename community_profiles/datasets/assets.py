@@ -2,6 +2,7 @@ import esri2gpd
 from . import EPSG
 from .core import *
 from .regions import *
+from .raw import read_frame, write_frame
 
 
 __all__ = ["CityOwnedFacilities", "Parks", "Hospitals", "HealthCenters"]
@@ -22,17 +23,24 @@ class CityOwnedFacilities(Dataset):
     https://www.opendataphilly.org/dataset/city-facilities-master-facilities-database
     """
 
+    host = "services.arcgis.com"
+
     @classmethod
-    def download(cls, **kwargs):
+    def fetch(cls, rawdir, **kwargs):
 
         url = "https://services.arcgis.com/fLeGjb7u4uXqeF9q/arcgis/rest/services/City_Facilities_pub/FeatureServer/0"
+        gdf = esri2gpd.get(url)
+        write_frame(gdf, rawdir / "data.parquet")
+
+    @classmethod
+    def transform(cls, rawdir, **kwargs):
+
+        gdf = read_frame(rawdir / "data.parquet")
 
         return (
-            esri2gpd.get(url)
+            gdf
             .to_crs(epsg=EPSG)
-            .pipe(geocode, ZIPCodes.get())
-            .pipe(geocode, Neighborhoods.get())
-            .pipe(geocode, PUMAs.get())
+            .pipe(geocode_many)
         )
 
 
@@ -50,16 +58,25 @@ class Parks(Dataset):
     https://www.opendataphilly.org/dataset/parks-and-recreation-assets
     """
 
+    host = "services.arcgis.com"
+    fields = ["OBJECTID", "ASSET_NAME", "SITE_NAME", "ADDRESS"]
+
     @classmethod
-    def download(cls, **kwargs):
+    def fetch(cls, rawdir, fields=None, **kwargs):
 
         url = "https://services.arcgis.com/fLeGjb7u4uXqeF9q/arcgis/rest/services/PPR_Assets/FeatureServer/0"
+        gdf = esri2gpd.get(url, fields=fields)
+        write_frame(gdf, rawdir / "data.parquet")
+
+    @classmethod
+    def transform(cls, rawdir, **kwargs):
+
+        gdf = read_frame(rawdir / "data.parquet")
+
         return (
-            esri2gpd.get(url, fields=["OBJECTID", "ASSET_NAME", "SITE_NAME", "ADDRESS"])
+            gdf
             .to_crs(epsg=EPSG)
-            .pipe(geocode, ZIPCodes.get())
-            .pipe(geocode, Neighborhoods.get())
-            .pipe(geocode, PUMAs.get())
+            .pipe(geocode_many)
         )
 
 
@@ -72,17 +89,24 @@ class Hospitals(Dataset):
     https://phl.maps.arcgis.com/home/item.html?id=df8dc18412494e5abbb021e2f33057b2
     """
 
+    host = "services.arcgis.com"
+
     @classmethod
-    def download(cls, **kwargs):
+    def fetch(cls, rawdir, **kwargs):
 
         url = "https://services.arcgis.com/fLeGjb7u4uXqeF9q/arcgis/rest/services/Hospitals/FeatureServer/0"
+        gdf = esri2gpd.get(url)
+        write_frame(gdf, rawdir / "data.parquet")
+
+    @classmethod
+    def transform(cls, rawdir, **kwargs):
+
+        gdf = read_frame(rawdir / "data.parquet")
 
         return (
-            esri2gpd.get(url)
+            gdf
             .to_crs(epsg=EPSG)
-            .pipe(geocode, ZIPCodes.get())
-            .pipe(geocode, Neighborhoods.get())
-            .pipe(geocode, PUMAs.get())
+            .pipe(geocode_many)
         )
 
 
@@ -99,15 +123,23 @@ class HealthCenters(Dataset):
     https://www.opendataphilly.org/dataset/health-centers
     """
 
+    host = "services.arcgis.com"
+
     @classmethod
-    def download(cls, **kwargs):
+    def fetch(cls, rawdir, **kwargs):
 
         url = "https://services.arcgis.com/fLeGjb7u4uXqeF9q/arcgis/rest/services/Health_Centers/FeatureServer/0"
+        gdf = esri2gpd.get(url)
+        write_frame(gdf, rawdir / "data.parquet")
+
+    @classmethod
+    def transform(cls, rawdir, **kwargs):
+
+        gdf = read_frame(rawdir / "data.parquet")
+
         return (
-            esri2gpd.get(url)
+            gdf
             .to_crs(epsg=EPSG)
-            .pipe(geocode, ZIPCodes.get())
-            .pipe(geocode, Neighborhoods.get())
-            .pipe(geocode, PUMAs.get())
+            .pipe(geocode_many)
         )
 
@@ -1,8 +1,9 @@
-import carto2gpd
 import pandas as pd
 from . import EPSG, DEFAULT_YEAR
 from .core import *
 from .regions import *
+from .raw import read_frame, write_frame
+from .carto import get_windowed, year_range
 
 
 __all__ = ["BusinessLicenses"]
@@ -28,25 +29,39 @@ class BusinessLicenses(DatasetWithYear):
     https://www.opendataphilly.org/dataset/licenses-and-inspections-business-licenses
     """
 
+    host = "phl.carto.com"
     date_columns = ["initialissuedate", "mostrecentissuedate"]
+    schema = Schema(
+        categories=["licensetype", "licensestatus", *REGION_COLUMNS],
+        dates={"initialissuedate": "%Y-%m-%d %H:%M:%S"},
+    )
+
+    update_column = "initialissuedate"
+    unique_key = "objectid"
 
     @classmethod
-    def download(cls, year=DEFAULT_YEAR):
+    def fetch(cls, rawdir, year=DEFAULT_YEAR, since=None):
 
         # Query carto for all active licenses from a specific year
-        gdf = carto2gpd.get(
-            "https://phl.carto.com/api/v2/sql",
+        gdf = get_windowed(
             "li_business_licenses",
-            where=f"extract(year from initialissuedate) = {year} and licensestatus = 'Active'",
+            "initialissuedate",
+            *year_range(year, since),
+            where="licensestatus = 'Active'",
         )
 
         # Geocode and return
+        write_frame(gdf, rawdir / "data.parquet")
+
+    @classmethod
+    def transform(cls, rawdir, year=DEFAULT_YEAR):
+
+        gdf = read_frame(rawdir / "data.parquet")
+
         return (
             replace_missing_geometries(gdf)
             .to_crs(epsg=EPSG)
-            .pipe(geocode, ZIPCodes.get())
-            .pipe(geocode, Neighborhoods.get())
-            .pipe(geocode, PUMAs.get())
+            .pipe(geocode_many)
             .assign(
                 initialissuedate=lambda df: pd.to_datetime(df.initialissuedate),
                 year=lambda df: df.initialissuedate.dt.year,
@@ -0,0 +1,316 @@
+import json
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+__all__ = [
+    "MEMORY_CACHE",
+    "SNAPSHOTS",
+    "cache_info",
+    "clear_cache",
+    "set_cache_size",
+    "release_snapshots",
+]
+
+# default budget of the in-process cache, in bytes
+DEFAULT_CACHE_SIZE = 2 * 1024**3
+
+
+class MemoryCache:
+    """
+    A process-wide, least-recently-used cache of loaded datasets.
+
+    Entries are keyed on the dataset name, storage format, and load
+    keywords, and are stamped with the modification time of the data
+    file on disk, so a cache written by another process is never served
+    stale. The cache keeps the loaded frame itself and hands out copies,
+    so callers cannot mutate the cached copy.
+
+    Parameters
+    ----------
+    maxsize : int
+        the memory budget of the cache, in bytes; a value of zero
+        disables caching
+    """
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.currsize = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def make_key(cls, storage, kwargs):
+        """
+        Return the cache key for the input dataset class, storage
+        class, and load keywords.
+        """
+        return (
+            cls.__name__,
+            storage.name,
+            json.dumps(kwargs, sort_keys=True, default=str),
+        )
+
+    def get(self, key, mtime):
+        """
+        Return a copy of the cached data for the input key, or None if
+        there is no entry matching the file modification time.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != mtime:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return _copy(entry[1])
+
+    def put(self, key, mtime, data, nbytes=None):
+        """
+        Add the input data to the cache, evicting the least-recently
+        used entries to stay within budget.
+
+        The data should be freshly loaded, and not referenced elsewhere,
+        since it is cached as is.
+
+        Parameters
+        ----------
+        key : tuple
+            the cache key, from `make_key()`
+        mtime : int or tuple
+            the modification time of the data file(s)
+        data : DataFrame/GeoDataFrame
+            the loaded data
+        nbytes : int, optional
+            the size of the data, e.g., of the Arrow table it was loaded
+            from; by default, it is estimated from a sample of the rows
+
+        Returns
+        -------
+        data : DataFrame/GeoDataFrame
+            a copy of the cached data that is safe to return to callers
+        """
+        if nbytes is None:
+            nbytes = estimate_nbytes(data)
+        with self._lock:
+            self._pop(key)
+            if nbytes > self.maxsize:
+                return data
+
+            self._entries[key] = (mtime, data, nbytes)
+            self.currsize += nbytes
+            self._evict()
+            return _copy(data)
+
+    def invalidate(self, name=None):
+        """
+        Remove the cached entries for the dataset with the input name,
+        or all entries if no name is given.
+        """
+        with self._lock:
+            for key in list(self._entries):
+                if name is None or key[0] == name:
+                    self._pop(key)
+
+    def resize(self, maxsize):
+        """
+        Change the memory budget of the cache, in bytes.
+        """
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def info(self):
+        """
+        Return a dict of the cache statistics.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "currsize": self.currsize,
+                "maxsize": self.maxsize,
+            }
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.currsize -= entry[2]
+
+    def _evict(self):
+        while self._entries and self.currsize > self.maxsize:
+            self._pop(next(iter(self._entries)))
+
+
+def estimate_nbytes(data, sample=1000):
+    """
+    Estimate the memory used by a data frame, without scanning every
+    value of its object columns.
+
+    Columns with a fixed-width type and categoricals are counted exactly;
+    the size of the other columns, e.g., strings and geometries, is
+    extrapolated from a sample of the rows.
+    """
+    usage = data.memory_usage(index=True, deep=False)
+    sampled = []
+    for col in data.columns:
+        dtype = data[col].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            usage[col] = data[col].memory_usage(index=False, deep=True)
+        elif dtype == object or not isinstance(dtype, np.dtype):
+            sampled.append(col)
+    if not sampled or not len(data):
+        return int(usage.sum())
+
+    rows = data[sampled].iloc[:: max(len(data) // sample, 1)]
+    size = 0
+    for col in sampled:
+        if getattr(rows[col].dtype, "name", None) == "geometry":
+            size += _geometry_nbytes(rows[col].array)
+        else:
+            size += rows[col].memory_usage(index=False, deep=True)
+    return int(usage.drop(sampled).sum() + size / len(rows) * len(data))
+
+
+def _geometry_nbytes(geometries):
+    """
+    Internal function to estimate the memory used by the input shapely
+    geometries: a fixed overhead per geometry and polygon ring, and two
+    doubles per coordinate.
+    """
+    try:
+        import shapely
+
+        values = np.asarray(geometries, dtype=object)
+        parts = shapely.get_parts(values)
+        polygons = parts[shapely.get_type_id(parts) == 3]
+        rings = len(polygons) + shapely.get_num_interior_rings(polygons).sum()
+        coordinates = shapely.get_num_coordinates(values).sum()
+    except AttributeError:
+        values = [geometry for geometry in geometries if geometry is not None]
+        return 200 * len(geometries) + sum(len(geometry.wkb) for geometry in values)
+    return int(200 * len(values) + 300 * rings + 16 * coordinates)
+
+
+def _copy(data):
+    """
+    Internal function to copy a data frame so it can be handed out
+    without exposing the cached object.
+
+    When pandas copy-on-write is enabled, a shallow copy is sufficient
+    and no data is duplicated.
+    """
+    major = int(pd.__version__.split(".")[0])
+    if major >= 3 or getattr(pd.options.mode, "copy_on_write", False) is True:
+        return data.copy(deep=False)
+    return data.copy()
+
+
+class SnapshotStore:
+    """
+    Pinned copies of datasets, shared by the datasets built from them
+    for the rest of the session.
+
+    Unlike the memory cache, entries are never evicted or refreshed when
+    the file on disk changes, so all dependents see the same version of
+    their parent until the snapshots are released.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, load):
+        """
+        Return the pinned data for the input key, calling `load()` to
+        create it on first use. Concurrent callers of the same key wait
+        for the first load rather than loading the data again, while other
+        keys are loaded in parallel.
+        """
+        # the global lock only guards the dicts; each key has its own lock
+        with self._lock:
+            if key in self._entries:
+                return self._entries[key]
+            lock = self._loading.setdefault(key, threading.Lock())
+
+        with lock:
+            with self._lock:
+                if key in self._entries:
+                    return self._entries[key]
+            data = load()
+
+            # don't pin data loaded before the snapshot was released
+            with self._lock:
+                if self._loading.get(key) is lock:
+                    self._entries[key] = data
+                    del self._loading[key]
+            return data
+
+    def release(self, name=None):
+        """
+        Release the snapshots of the dataset with the input name, or all
+        snapshots if no name is given.
+        """
+        with self._lock:
+            for entries in [self._entries, self._loading]:
+                for key in list(entries):
+                    if name is None or key[0] == name:
+                        del entries[key]
+
+
+MEMORY_CACHE = MemoryCache()
+SNAPSHOTS = SnapshotStore()
+
+
+def cache_info():
+    """
+    Return the hit/miss counters and memory usage of the in-process
+    dataset cache.
+    """
+    return MEMORY_CACHE.info()
+
+
+def clear_cache(dataset=None):
+    """
+    Invalidate the in-process cache of loaded datasets.
+
+    Parameters
+    ----------
+    dataset : Dataset or str, optional
+        only invalidate entries for this dataset class (or class name);
+        default is to clear the whole cache
+    """
+    if dataset is not None and not isinstance(dataset, str):
+        dataset = dataset.__name__
+    MEMORY_CACHE.invalidate(dataset)
+
+
+def set_cache_size(nbytes):
+    """
+    Set the memory budget of the in-process dataset cache, in bytes.
+
+    A value of zero disables caching.
+    """
+    MEMORY_CACHE.resize(nbytes)
+
+
+def release_snapshots(dataset=None):
+    """
+    Release the pinned dataset snapshots, so the next call to
+    `Dataset.snapshot()` loads the current version from the cache.
+
+    Parameters
+    ----------
+    dataset : Dataset or str, optional
+        only release the snapshots of this dataset class (or class name);
+        default is to release all snapshots
+    """
+    if dataset is not None and not isinstance(dataset, str):
+        dataset = dataset.__name__
+    SNAPSHOTS.release(dataset)
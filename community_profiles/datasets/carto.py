@@ -0,0 +1,397 @@
+import json, shutil, time, warnings
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import geopandas as gpd
+import pandas as pd
+
+__all__ = ["get_windowed", "get_paged"]
+
+# the CARTO SQL API for OpenDataPhilly
+CARTO_URL = "https://phl.carto.com/api/v2/sql"
+
+
+def year_range(year, since=None):
+    """
+    Return the (start, end) timestamps of the input year, starting no
+    earlier than `since`, if provided, and ending no later than tomorrow.
+    """
+    start = pd.Timestamp(year=int(year), month=1, day=1)
+    end = pd.Timestamp(year=int(year) + 1, month=1, day=1)
+    if since is not None:
+        start = max(start, pd.Timestamp(since))
+    return start, min(end, pd.Timestamp.now().normalize() + pd.Timedelta("1D"))
+
+
+def date_windows(start, end, freq="MS"):
+    """
+    Split the range from `start` (inclusive) to `end` (exclusive) into
+    consecutive windows at the input frequency.
+
+    Parameters
+    ----------
+    start, end : str or Timestamp
+        the bounds of the date range
+    freq : str, optional
+        the pandas frequency of the window edges, e.g., "MS" for months
+        or "W-MON" for weeks
+
+    Returns
+    -------
+    windows : list of tuple
+        the (start, end) timestamps of each window, in order
+    """
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    if start >= end:
+        return []
+    edges = [e for e in pd.date_range(start, end, freq=freq) if start < e < end]
+    edges = [start, *edges, end]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def query(sql, url=CARTO_URL, timeout=300):
+    """
+    Run a SQL query against the CARTO SQL API and return the result.
+
+    Parameters
+    ----------
+    sql : str
+        the SQL query
+    url : str, optional
+        the URL of the CARTO SQL API
+    timeout : float, optional
+        the request timeout, in seconds
+
+    Returns
+    -------
+    data : GeoDataFrame/DataFrame
+        the query results in EPSG:4326; a DataFrame if there are no
+        geometries
+    """
+    params = {"q": sql, "format": "geojson", "skipfields": "cartodb_id"}
+    features = _request(params, url, timeout).get("features", [])
+
+    if not features:
+        return pd.DataFrame()
+
+    out = gpd.GeoDataFrame.from_features(features, crs="EPSG:4326")
+    if out.geometry.isnull().all():
+        out = pd.DataFrame(out.drop(labels=["geometry"], axis=1))
+    return out
+
+
+def query_rows(sql, url=CARTO_URL, timeout=300):
+    """
+    Run a SQL query without geometries against the CARTO SQL API, e.g.,
+    an aggregation, and return the result as a DataFrame.
+
+    Parameters
+    ----------
+    sql : str
+        the SQL query
+    url : str, optional
+        the URL of the CARTO SQL API
+    timeout : float, optional
+        the request timeout, in seconds
+    """
+    return pd.DataFrame(_request({"q": sql}, url, timeout).get("rows", []))
+
+
+def _request(params, url, timeout):
+    """
+    Internal function to send a request to the CARTO SQL API and return
+    the JSON response. Long queries, e.g., with inline polygons, are
+    sent as a POST request.
+    """
+    import requests
+
+    if len(params["q"]) > 2000:
+        r = requests.post(url, data=params, timeout=timeout)
+    else:
+        r = requests.get(url, params=params, timeout=timeout)
+    r.raise_for_status()
+    return r.json()
+
+
+def _is_transient(error):
+    """
+    Internal function to return whether a failed request is worth
+    retrying: timeouts, connection errors, and server errors or rate
+    limits (5xx or 429 responses).
+    """
+    import requests
+
+    if isinstance(error, (requests.Timeout, requests.ConnectionError)):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return False
+
+
+def _is_missing_column(error):
+    """
+    Internal function to return whether a failed request was rejected
+    because the query named a column that does not exist.
+    """
+    import requests
+
+    if not isinstance(error, requests.HTTPError) or error.response is None:
+        return False
+    text = error.response.text
+    return (
+        error.response.status_code == 400
+        and "column" in text
+        and "does not exist" in text
+    )
+
+
+def _warn_all_fields(table_name, error):
+    """
+    Internal function to warn that the field list of a table is out of
+    date, and all fields are requested instead.
+    """
+    message = error.response.text.strip()
+    warnings.warn(
+        f"Field list of '{table_name}' does not match the table ({message}); "
+        "requesting all fields instead"
+    )
+
+
+def _fetch_window(sql, url, retries, backoff, timeout):
+    """
+    Internal function to run the query for a single window, retrying with
+    exponential backoff if it fails with a transient error. Other errors,
+    e.g., an invalid query, are raised immediately.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return query(sql, url=url, timeout=timeout)
+        except Exception as e:
+            if attempt == retries or not _is_transient(e):
+                raise
+            time.sleep(backoff * 2 ** attempt)
+
+
+def get_windowed(
+    table_name,
+    date_column,
+    start,
+    end,
+    fields=None,
+    where=None,
+    freq="MS",
+    max_workers=4,
+    retries=3,
+    backoff=1.0,
+    timeout=300,
+    url=CARTO_URL,
+):
+    """
+    Query a CARTO table over a date range, splitting the range into
+    windows that are fetched concurrently.
+
+    Each window is a separate request, so a slow or failed request only
+    affects, and is retried for, a small part of the range. The results
+    are concatenated in date order.
+
+    Parameters
+    ----------
+    table_name : str
+        the name of the database table to query
+    date_column : str
+        the date column used to split the query into windows
+    start, end : str or Timestamp
+        the bounds of the date range; `start` is inclusive and `end` is
+        exclusive
+    fields : list of str, optional
+        the name of the fields to return; default is all fields
+    where : str, optional
+        an additional where clause to select a subset of the data
+    freq : str, optional
+        the pandas frequency of the window edges; default is monthly
+    max_workers : int, optional
+        the maximum number of concurrent requests
+    retries : int, optional
+        the number of times to retry a failed window
+    backoff : float, optional
+        the delay before the first retry, in seconds; it doubles with
+        each retry
+    timeout : float, optional
+        the timeout of each request, in seconds
+    url : str, optional
+        the URL of the CARTO SQL API
+
+    Returns
+    -------
+    data : GeoDataFrame/DataFrame
+        the query results in EPSG:4326
+
+    Notes
+    -----
+    If the table has no column with one of the `fields`, e.g., after the
+    source schema changed, a warning is issued and all fields are
+    requested instead.
+    """
+    import requests
+
+    columns = "*" if fields is None else ",".join([*fields, "the_geom"])
+
+    queries = []
+    for lower, upper in date_windows(start, end, freq=freq):
+        clause = (
+            f"{date_column} >= '{lower:%Y-%m-%d %H:%M:%S}' "
+            f"and {date_column} < '{upper:%Y-%m-%d %H:%M:%S}'"
+        )
+        if where:
+            clause += f" and {where}"
+        queries.append(f"SELECT {columns} FROM {table_name} WHERE {clause}")
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            frames = list(
+                pool.map(
+                    lambda sql: _fetch_window(sql, url, retries, backoff, timeout),
+                    queries,
+                )
+            )
+    except requests.HTTPError as e:
+        if fields is None or not _is_missing_column(e):
+            raise
+        _warn_all_fields(table_name, e)
+        return get_windowed(
+            table_name,
+            date_column,
+            start,
+            end,
+            where=where,
+            freq=freq,
+            max_workers=max_workers,
+            retries=retries,
+            backoff=backoff,
+            timeout=timeout,
+            url=url,
+        )
+
+    frames = [df for df in frames if len(df)]
+    if not frames:
+        return pd.DataFrame()
+
+    out = pd.concat(frames, ignore_index=True, sort=False)
+    if "geometry" in out.columns:
+        out = gpd.GeoDataFrame(out, geometry="geometry", crs="EPSG:4326")
+    return out
+
+
+def get_paged(
+    table_name,
+    dirname,
+    fields=None,
+    where=None,
+    page_size=50000,
+    retries=3,
+    backoff=1.0,
+    timeout=300,
+    url=CARTO_URL,
+):
+    """
+    Download a large CARTO table page by page, saving each page to disk
+    as soon as it completes.
+
+    Pages are ordered by the table's `cartodb_id` and downloaded into a
+    hidden checkpoint folder next to `dirname`. If the download is
+    interrupted, calling this function again with the same query resumes
+    from the last completed page. Once all pages are downloaded, the
+    folder is moved to `dirname`, replacing any previous copy, and can be
+    loaded with :func:`read_frame`.
+
+    Parameters
+    ----------
+    table_name : str
+        the name of the database table to query
+    dirname : Path
+        the output folder of the pages
+    fields : list of str, optional
+        the name of the fields to return; default is all fields
+    where : str, optional
+        a where clause to select a subset of the data
+    page_size : int, optional
+        the number of rows in each page
+    retries, backoff, timeout, url :
+        the same as for `get_windowed()`
+
+    Returns
+    -------
+    rows : int
+        the total number of rows downloaded
+
+    Notes
+    -----
+    As with `get_windowed()`, all fields are requested if the table has
+    no column with one of the `fields`.
+    """
+    import requests
+    from .locks import atomic_path
+    from .raw import write_frame
+
+    dirname = Path(dirname)
+    tmpdir = dirname.with_name(f".{dirname.name}")
+    checkpoint_path = tmpdir / "checkpoint.json"
+
+    columns = "*" if fields is None else ",".join([*fields, "the_geom"])
+    base = f"SELECT {columns}, cartodb_id AS page_key FROM {table_name}"
+    signature = {"query": base, "where": where, "page_size": page_size}
+
+    # resume an interrupted download of the same query
+    checkpoint = {}
+    if checkpoint_path.exists():
+        with checkpoint_path.open(mode="r") as f:
+            checkpoint = json.load(f)
+    if checkpoint.get("signature") != signature:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+        checkpoint = {"signature": signature, "pages": 0, "rows": 0, "last_key": -1}
+    tmpdir.mkdir(parents=True, exist_ok=True)
+
+    while True:
+        clause = f"cartodb_id > {checkpoint['last_key']}"
+        if where:
+            clause += f" and ({where})"
+        sql = f"{base} WHERE {clause} ORDER BY cartodb_id LIMIT {page_size}"
+        try:
+            page = _fetch_window(sql, url, retries, backoff, timeout)
+        except requests.HTTPError as e:
+            if fields is None or not _is_missing_column(e):
+                raise
+            _warn_all_fields(table_name, e)
+            return get_paged(
+                table_name,
+                dirname,
+                where=where,
+                page_size=page_size,
+                retries=retries,
+                backoff=backoff,
+                timeout=timeout,
+                url=url,
+            )
+        if not len(page):
+            break
+
+        # save the page before recording it as complete
+        write_frame(
+            page.drop(labels=["page_key"], axis=1),
+            tmpdir / f"page-{checkpoint['pages']:05d}.parquet",
+        )
+        checkpoint["pages"] += 1
+        checkpoint["rows"] += len(page)
+        checkpoint["last_key"] = int(page["page_key"].max())
+        with atomic_path(checkpoint_path) as tmp:
+            with tmp.open(mode="w") as f:
+                json.dump(checkpoint, f)
+
+        if len(page) < page_size:
+            break
+
+    # replace the previous copy with the completed pages
+    checkpoint_path.unlink()
+    shutil.rmtree(dirname, ignore_errors=True)
+    tmpdir.rename(dirname)
+    return checkpoint["rows"]
@@ -0,0 +1,216 @@
+import hashlib
+import json
+import pandas as pd
+from .. import data_dir
+from .locks import FileLock, atomic_path
+from .storage import _as_geoseries
+
+__all__ = ["catalog", "rebuild_catalog"]
+
+# the in-memory copy of the catalog, and the file mtime it was read at
+_CATALOG = {"mtime": None, "entries": {}}
+
+
+def _catalog_path():
+    return data_dir / "catalog.json"
+
+
+def _load():
+    """
+    Internal function to return the catalog entries, re-reading the
+    catalog file only if it has changed on disk.
+    """
+    path = _catalog_path()
+    mtime = path.stat().st_mtime_ns if path.exists() else None
+    if mtime != _CATALOG["mtime"]:
+        entries = {}
+        if mtime is not None:
+            with path.open(mode="r") as f:
+                entries = json.load(f)
+        _CATALOG.update(mtime=mtime, entries=entries)
+    return _CATALOG["entries"]
+
+
+def catalog_key(dirname):
+    """
+    Return the catalog key of the input dataset directory, which is its
+    path relative to the data directory, e.g., "CrimeIncidents/2019".
+    """
+    return dirname.relative_to(data_dir).as_posix()
+
+
+def checksum(path, blocksize=2**20):
+    """
+    Return the SHA-256 checksum of the file at the input path.
+    """
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(blocksize), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def describe(data):
+    """
+    Return a dict summarizing the input data: its row count, schema,
+    and, for geospatial data, geometry types and bounding box.
+    """
+    info = {
+        "rows": len(data),
+        "schema": {col: str(dtype) for col, dtype in data.dtypes.items()},
+        "geometry_type": None,
+        "bbox": None,
+    }
+    if "geometry" in data.columns:
+        geometry = _as_geoseries(data["geometry"])
+        valid = geometry.notnull() & ~geometry.is_empty
+        info["geometry_type"] = sorted(geometry.loc[valid].geom_type.unique())
+        if valid.any():
+            info["bbox"] = list(map(float, geometry.loc[valid].total_bounds))
+    return info
+
+
+def update_catalog(name, dirname, kwargs, storage, data, download_time=None):
+    """
+    Record a newly written cache file in the catalog.
+
+    Parameters
+    ----------
+    name : str
+        the dataset name
+    dirname : Path
+        the dataset directory holding the cache file
+    kwargs : dict
+        the keywords the dataset was loaded with, e.g., the year
+    storage : Storage
+        the storage class of the cache file
+    data : DataFrame/GeoDataFrame
+        the data that was written
+    download_time : str, optional
+        the download time, if the data was freshly downloaded; otherwise,
+        the file is a copy of the existing cache in another format
+    """
+    path = dirname / storage.filename
+    key = catalog_key(dirname)
+
+    with FileLock(data_dir / ".catalog.lock"):
+        entries = dict(_load())
+
+        # a fresh download replaces the files in all other formats
+        entry = entries.get(key, {})
+        files = dict(entry.get("files", {})) if download_time is None else {}
+        files[storage.name] = {
+            "bytes": path.stat().st_size,
+            "checksum": checksum(path),
+        }
+
+        entries[key] = {
+            "dataset": name,
+            "kwargs": dict(kwargs) or entry.get("kwargs", {}),
+            "download_time": download_time or entry.get("download_time"),
+            **describe(data),
+            "files": files,
+        }
+        _write(entries)
+
+
+def _write(entries):
+    """
+    Internal function to atomically write the catalog file.
+    """
+    with atomic_path(_catalog_path()) as tmp:
+        with tmp.open(mode="w") as f:
+            json.dump(entries, f, indent=1, default=str)
+
+
+def catalog_entry(dirname):
+    """
+    Return the catalog entry for the input dataset directory, or None
+    if it has not been cached.
+    """
+    return _load().get(catalog_key(dirname))
+
+
+def catalog(name=None):
+    """
+    Return a summary of the cached datasets, without touching the
+    data files.
+
+    Parameters
+    ----------
+    name : str, optional
+        only return entries for this dataset
+
+    Returns
+    -------
+    catalog : DataFrame
+        one row per cached dataset and set of keywords, with the row
+        count, total file size in bytes, geometry type, bounding box,
+        download time, and storage formats
+    """
+    rows = []
+    for key, entry in sorted(_load().items()):
+        if name is not None and entry["dataset"] != name:
+            continue
+        files = entry.get("files", {})
+        rows.append(
+            {
+                "path": key,
+                "dataset": entry["dataset"],
+                "kwargs": entry["kwargs"],
+                "rows": entry["rows"],
+                "bytes": sum(f["bytes"] for f in files.values()),
+                "geometry_type": entry["geometry_type"],
+                "bbox": entry["bbox"],
+                "download_time": entry["download_time"],
+                "formats": sorted(files),
+            }
+        )
+
+    columns = [
+        "path",
+        "dataset",
+        "kwargs",
+        "rows",
+        "bytes",
+        "geometry_type",
+        "bbox",
+        "download_time",
+        "formats",
+    ]
+    return pd.DataFrame(rows, columns=columns).set_index("path")
+
+
+def rebuild_catalog():
+    """
+    Rebuild the catalog from the cache files in the data directory.
+
+    This only needs to be run once, for caches written before the
+    catalog existed; `Dataset.get` keeps the catalog up to date. The
+    keywords of each cache are recovered from its directory if needed,
+    and recorded in its meta-data.
+    """
+    from .storage import STORAGE_FORMATS, _cache_kwargs, _iter_cache_dirs
+
+    for cls, dirname in _iter_cache_dirs():
+        kwargs = _cache_kwargs(cls, dirname)
+        with (dirname / "meta.json").open(mode="r") as f:
+            meta = json.load(f)
+        download_time = meta.get("download_time")
+
+        for storage in STORAGE_FORMATS.values():
+            path = dirname / storage.filename
+            if path.exists():
+                data = cls._format_data(storage.read(path))
+                update_catalog(
+                    cls.__name__, dirname, kwargs or {}, storage, data, download_time
+                )
+
+                # any other formats are copies of the same download
+                download_time = None
+
+        if kwargs is not None and meta.get("kwargs") != kwargs:
+            meta["kwargs"] = kwargs
+            with atomic_path(dirname / "meta.json") as tmp:
+                with tmp.open(mode="w") as f:
+                    json.dump(meta, f)
@@ -2,6 +2,7 @@ import esri2gpd
 from . import EPSG
 from .core import *
 from .regions import *
+from .raw import read_frame, write_frame
 
 __all__ = ["CommercialCorridors"]
 
@@ -22,16 +23,19 @@ class CommercialCorridors(Dataset):
     https://www.opendataphilly.org/dataset/commercial-corridors
     """
 
+    host = "services.arcgis.com"
+
     @classmethod
-    def download(cls, **kwargs):
+    def fetch(cls, rawdir, **kwargs):
 
         url = "https://services.arcgis.com/fLeGjb7u4uXqeF9q/arcgis/rest/services/Commercial_Corridors/FeatureServer/0"
         gdf = esri2gpd.get(url)
+        write_frame(gdf, rawdir / "data.parquet")
+
+    @classmethod
+    def transform(cls, rawdir, **kwargs):
+
+        gdf = read_frame(rawdir / "data.parquet")
 
-        return (
-            gdf.to_crs(epsg=EPSG)
-            .pipe(geocode, ZIPCodes.get(), use_centroids=True)
-            .pipe(geocode, Neighborhoods.get(), use_centroids=True)
-            .pipe(geocode, PUMAs.get(), use_centroids=True)
-        )
+        return gdf.to_crs(epsg=EPSG).pipe(geocode_many, use_centroids=True)
 
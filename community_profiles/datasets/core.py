@@ -1,28 +1,83 @@
 import geopandas as gpd
 import pandas as pd
-from abc import ABC, abstractclassmethod
-import os, json
+from abc import ABC
+import os, json, time, shutil
 from . import EPSG, DEFAULT_YEAR
 from .. import data_dir
+from .storage import STORAGE_FORMATS, Storage, _from_table, partition_matches
+from .cache import MEMORY_CACHE, SNAPSHOTS
+from .locks import FileLock, atomic_path
+from .catalog import catalog_entry, update_catalog
+from .schema import Schema
+from .raw import read_frame, write_frame
+from .geocoding import geocode_many
 
 DATASETS = {}
 
+# the region columns added by geocoding against ZIPCodes, Neighborhoods, and PUMAs
+REGION_COLUMNS = ["zip_code", "neighborhood", "puma"]
+
 
 class Dataset(ABC):
     """
     Abstract base class representing a dataset.
 
     Subclasses should define the `download` function, which is 
-    responsible for downloading and returning a pandas DataFrame.
+    responsible for downloading and returning a pandas DataFrame, or the
+    `fetch` and `transform` functions, which download the raw source data
+    and process it separately.
 
     Parameters
     ----------
     data_columns : list of str
         string column names of any datetime fields; these are converted
         automatically to pandas Datetime objects when data is loaded
+    storage_format : str, optional
+        the on-disk format of the cached data, e.g., "csv" or "parquet";
+        if not set, the global `STORAGE_FORMAT` is used
+    schema : Schema, optional
+        the declared column types (categoricals, dtypes, and date formats);
+        it is enforced when the data is cached and used to skip type
+        inference when it is loaded
+    update_column : str, optional
+        the date column used to fetch only new rows when the dataset is
+        refreshed incrementally; `fetch` must accept a `since` keyword
+    unique_key : str, optional
+        the column identifying each row, used to de-duplicate rows when
+        merging an incremental refresh into the cache
+    refresh_overlap : str, optional
+        the time window before the cached maximum of `update_column` that
+        is fetched again on an incremental refresh, to pick up late or
+        amended rows, e.g., "2D"
+    host : str, optional
+        the host name the dataset is downloaded from, used to limit the
+        number of concurrent requests to a host by `refresh_all()`
+    dependencies : list of str, optional
+        the names of the datasets that must be cached before this one can
+        be downloaded; default is the region layers used for geocoding
+    fields : list of str, optional
+        the minimal set of source fields requested from the server; if not
+        set, all fields are downloaded. `fetch` must accept a `fields`
+        keyword.
+    extra_fields : list of str, optional
+        optional source fields that can be requested in addition to the
+        minimal set with `get(fields=...)`
+    table_name : str, optional
+        the CARTO table the dataset is queried from, which lets
+        `aggregate()` count rows on the server
     """
 
     date_columns = []
+    storage_format = None
+    schema = None
+    update_column = None
+    unique_key = None
+    refresh_overlap = "2D"
+    host = None
+    dependencies = ["ZIPCodes", "Neighborhoods", "PUMAs"]
+    fields = None
+    extra_fields = []
+    table_name = None
 
     def __init_subclass__(cls, **kwargs):
         """
@@ -45,18 +100,19 @@ class Dataset(ABC):
         """
         # convert to GeoDataFrame
         if "geometry" in data.columns:
-            from shapely import wkt
-
-            data.geometry = data.geometry.apply(wkt.loads)
             data = gpd.GeoDataFrame(
                 data, geometry="geometry", crs={"init": f"epsg:{EPSG}"}
             )
 
         # convert date columns
-        for col in cls.date_columns:
-            data[col] = pd.to_datetime(data[col])
+        return cls.get_schema().parse_dates(data)
 
-        return data
+    @classmethod
+    def get_schema(cls):
+        """
+        Return the schema of the dataset, including the `date_columns`.
+        """
+        return (cls.schema or Schema()).with_dates(cls.date_columns)
 
     @classmethod
     def meta(cls):
@@ -65,10 +121,28 @@ class Dataset(ABC):
         """
         path = cls.get_path() / "meta.json"
         if path.exists():
-            return json.load(path.open(mode="r"))
+            with path.open(mode="r") as f:
+                return json.load(f)
         else:
             return {}
 
+    @classmethod
+    def status(cls, **kwargs):
+        """
+        Return the catalog entry of the cached dataset, or None if it has
+        not been cached.
+
+        The entry records the row count, schema, geometry type, bounding
+        box, download time, and the size and checksum of each cache file;
+        the data files themselves are not read.
+
+        Parameters
+        ----------
+        **kwargs :
+            Additional keywords are passed to the `get_path()` function
+        """
+        return catalog_entry(cls.get_path(**kwargs))
+
     @classmethod
     def now(cls):
         """
@@ -76,6 +150,15 @@ class Dataset(ABC):
         """
         return str(pd.datetime.now())
 
+    @classmethod
+    def get_storage(cls):
+        """
+        Return the storage class used to cache the dataset.
+        """
+        from . import STORAGE_FORMAT
+
+        return STORAGE_FORMATS[cls.storage_format or STORAGE_FORMAT]
+
     @classmethod
     def get_path(cls, **kwargs):
         """
@@ -84,7 +167,16 @@ class Dataset(ABC):
         return data_dir / cls.__name__
 
     @classmethod
-    def get(cls, fresh=False, **kwargs):
+    def get(
+        cls,
+        fresh=False,
+        refresh=None,
+        mmap=False,
+        columns=None,
+        filters=None,
+        fields=None,
+        **kwargs,
+    ):
         """
         Load the dataset, optionally downloading a fresh copy.
 
@@ -93,6 +185,26 @@ class Dataset(ABC):
         fresh : bool, optional
             a boolean keyword that specifies whether a fresh copy of the 
             dataset should be downloaded
+        refresh : str, optional
+            if "incremental", only fetch the rows added since the cached
+            maximum of the `update_column` and merge them into the cache;
+            if "full", download a fresh copy, as with `fresh=True`
+        mmap : bool, optional
+            if True, load the data from an Arrow IPC file opened with memory
+            mapping, creating the file from the existing cache if needed;
+            this avoids parsing the file, but the loaded data is still a
+            private copy in each process
+        columns : list of str, optional
+            only load these columns; other columns are never parsed, and
+            geometries are only decoded if "geometry" is included
+        filters : list of tuple, optional
+            only load rows matching these `(column, op, value)` filters,
+            e.g., `[("puma", "in", names), ("year", ">=", 2018)]`; the
+            filters are pushed down to the storage layer when possible
+        fields : list of str, optional
+            source fields to download in addition to the dataset's minimal
+            `fields`, or "all" for every field; the cache is downloaded
+            again only if it does not already hold these fields
         **kwargs : 
             Additional keywords are passed to the `get_path()` function and 
             the `download()` function
@@ -102,41 +214,633 @@ class Dataset(ABC):
         data : DataFrame/GeoDataFrame
             the dataset as a pandas/geopandas object
         """
+        if refresh not in [None, "full", "incremental"]:
+            raise ValueError("Allowed values for 'refresh' are: 'full', 'incremental'")
+
+        # Make sure the data is cached in the requested format
+        storage = STORAGE_FORMATS["feather"] if mmap else cls.get_storage()
+        if refresh == "incremental":
+            data_path = cls._refresh_incremental(storage, **kwargs)
+        else:
+            fresh = fresh or refresh == "full"
+            data_path = cls._update_cache(storage, fresh=fresh, fields=fields, **kwargs)
+
+        # Return the in-memory copy if the file has not changed
+        key = MEMORY_CACHE.make_key(
+            cls,
+            storage,
+            {**kwargs, "columns": columns, "filters": filters, "mmap": mmap},
+        )
+        mtime = data_path.stat().st_mtime_ns
+        data = MEMORY_CACHE.get(key, mtime)
+        if data is not None:
+            return data
+
+        # Load and return the formatted data, sized from the Arrow table
+        nbytes = None
+        if storage.read_table.__func__ is not Storage.read_table.__func__:
+            table = storage.read_table(
+                data_path, mmap=mmap, columns=columns, filters=filters
+            )
+            nbytes = table.nbytes
+            data = _from_table(table)
+        else:
+            data = storage.read(
+                data_path,
+                mmap=mmap,
+                columns=columns,
+                filters=filters,
+                schema=cls.get_schema(),
+            )
+        return MEMORY_CACHE.put(key, mtime, cls._format_data(data), nbytes=nbytes)
+
+    @classmethod
+    def iter_chunks(
+        cls,
+        chunksize=100000,
+        fresh=False,
+        columns=None,
+        filters=None,
+        fields=None,
+        **kwargs,
+    ):
+        """
+        Iterate over the dataset in chunks, without loading it all into memory.
+
+        Each chunk is formatted in the same way as the output of `get()`,
+        with dates parsed and geometries decoded.
+
+        Parameters
+        ----------
+        chunksize : int, optional
+            the maximum number of rows in each chunk
+        fresh : bool, optional
+            whether a fresh copy of the dataset should be downloaded first
+        columns : list of str, optional
+            only load these columns
+        filters : list of tuple, optional
+            only load rows matching these `(column, op, value)` filters
+        fields : list of str, optional
+            additional source fields to download, as with `get()`
+        **kwargs :
+            Additional keywords are passed to the `get_path()` function and
+            the `download()` function
+
+        Yields
+        ------
+        chunk : DataFrame/GeoDataFrame
+            the next chunk of the dataset
+        """
+        storage = cls.get_storage()
+        data_path = cls._update_cache(storage, fresh=fresh, fields=fields, **kwargs)
+        for chunk in storage.iter_read(
+            data_path,
+            chunksize,
+            columns=columns,
+            filters=filters,
+            schema=cls.get_schema(),
+        ):
+            yield cls._format_data(chunk)
+
+    @classmethod
+    def snapshot(cls, index=None, **kwargs):
+        """
+        Return a pinned copy of the dataset, shared by the datasets built
+        from it.
+
+        The first call loads the dataset with `get()`, which only downloads
+        it if it is not cached. Later calls in the session return the same
+        copy, even if the cache is refreshed in the meantime, until
+        `release_snapshots()` is called; `refresh_all()` releases them when
+        it starts. The returned data is shared and must not be modified.
+
+        Parameters
+        ----------
+        index : str, optional
+            index the rows by this column, converted to strings, so the
+            snapshot can be joined on it directly; the column is kept
+        **kwargs :
+            Additional keywords are passed to the `get()` function
+
+        Returns
+        -------
+        data : DataFrame/GeoDataFrame
+            the pinned copy of the dataset
+        """
+
+        def load():
+            data = cls.get(**kwargs)
+            if index is not None:
+                data = data.assign(**{index: data[index].astype(str)})
+                data = data.set_index(index, drop=False).rename_axis(None)
+            return data
+
+        key = (cls.__name__, index, json.dumps(kwargs, sort_keys=True, default=str))
+        return SNAPSHOTS.get(key, load)
+
+    @classmethod
+    def aggregate(
+        cls, by="puma", group=None, where=None, regions=None, source=None, **kwargs
+    ):
+        """
+        Count the rows of the dataset in each region, optionally split
+        by a second column.
+
+        For datasets backed by a SQL source, i.e., with a `table_name`, the
+        points are matched to the regions and counted on the server, and
+        only the small table of counts is downloaded. Otherwise, the
+        geocoded dataset is loaded and counted locally.
+
+        Parameters
+        ----------
+        by : str, optional
+            the region to count by: "puma", "neighborhood", or "zip_code"
+        group : str, optional
+            a column to also group by, e.g., "text_general_code"; it must
+            have the same name in the source table and the dataset
+        where : dict, optional
+            the allowed value, or list of values, of columns of the dataset,
+            selecting the rows to count
+        regions : GeoDataFrame or str, optional
+            the region polygons to send with the query, or the name of a
+            table in the SQL source holding them, with a `by` column and a
+            "geom" column; default is the cached region dataset
+        source : callable or connection, optional
+            run the query against this SQL source rather than CARTO: either a
+            function returning a DataFrame for a SQL string, or a DB-API
+            connection. A tuple of (source, dialect) selects a dialect other
+            than "postgis", i.e., "spatialite" or "duckdb".
+        **kwargs :
+            Additional keywords are passed to the `get_path()` function and
+            the `download()` function, e.g., `year`
+
+        Returns
+        -------
+        counts : DataFrame
+            the `by` column, the `group` column, if provided, and a "count"
+            column, sorted by region; regions with no rows are omitted
+        """
+        from .aggregate import REGION_LAYERS, aggregate_sql, format_counts
+        from .aggregate import where_mask, where_sql
+
+        if by not in REGION_LAYERS:
+            raise ValueError(f"Allowed values for 'by' are: {list(REGION_LAYERS)}")
+
+        # count locally if the source cannot do it
+        if cls.table_name is None and source is None:
+            columns = [by, *([group] if group else []), *(where or {})]
+            data = cls.get(columns=list(dict.fromkeys(columns)), **kwargs)
+            data = data.loc[where_mask(data, where)]
+            counts = data.groupby(columns[: 2 if group else 1], observed=True).size()
+            counts = counts.rename("count").reset_index()
+            return format_counts(counts.loc[counts["count"] > 0], by, group)
+
+        dialect = "postgis"
+        if isinstance(source, tuple):
+            source, dialect = source
+        if regions is None:
+            regions = DATASETS[REGION_LAYERS[by]].get()
+
+        clauses = [where_sql(where), cls.source_where(**kwargs)]
+        sql = aggregate_sql(
+            cls.table_name,
+            by,
+            regions,
+            group=group,
+            where=" AND ".join(f"({c})" for c in clauses if c) or None,
+            dialect=dialect,
+        )
+
+        if source is None:
+            from .carto import query_rows
+
+            counts = query_rows(sql)
+        elif hasattr(source, "cursor"):
+            counts = pd.read_sql_query(sql, source)
+        else:
+            counts = source(sql)
+
+        if not len(counts):
+            counts = pd.DataFrame(columns=[by, *([group] if group else []), "count"])
+        return format_counts(counts, by, group)
+
+    @classmethod
+    def source_where(cls, **kwargs):
+        """
+        Return the SQL where clause selecting the rows of the source table
+        that make up the dataset for the input keywords, or None for all
+        rows. This is used by `aggregate()`.
+        """
+        return None
+
+    @classmethod
+    def _update_cache(cls, storage, fresh=False, fields=None, **kwargs):
+        """
+        Make sure the dataset is cached in the input storage format,
+        holding at least the requested source fields, downloading a
+        fresh copy if needed, and return the data path.
+        """
         # Get the folder path
         dirname = cls.get_path(**kwargs)
-        if not dirname.exists():
-            dirname.mkdir(parents=True)
-            fresh = True
+        dirname.mkdir(parents=True, exist_ok=True)
+
+        data_path = dirname / storage.filename
+        fields = cls.get_fields(fields)
+        if data_path.exists() and not fresh and cls._has_fields(fields, **kwargs):
+            return data_path
+
+        # Only one thread or process updates the cache at a time
+        requested = time.time()
+        with FileLock(dirname / ".lock"):
+
+            # another process may have finished the work while we waited
+            if data_path.exists() and cls._has_fields(fields, **kwargs):
+                if not fresh or data_path.stat().st_mtime >= requested:
+                    return data_path
+
+            # download a fresh copy, unless the source has not changed
+            existing = cls._find_cache(dirname)
+            covered = existing is not None and cls._has_fields(fields, **kwargs)
+            data = None
+            if fresh or not covered:
+
+                # keep any fields that are already cached
+                if existing is not None:
+                    fields = _union_fields(fields, cls.cached_fields(**kwargs))
+                data = cls._download(fresh=fresh, cached=covered, fields=fields, **kwargs)
+
+            if data is not None:
+                cls._save(storage, data, **kwargs)
+
+            elif not data_path.exists():
+                # convert a cache in another format rather than downloading again
+                data = existing.read(
+                    dirname / existing.filename, schema=cls.get_schema()
+                )
+                data = cls.get_schema().enforce(cls._format_data(data))
+                cls._write(storage, data, data_path)
+                update_catalog(cls.__name__, dirname, kwargs, storage, data)
+
+        return data_path
+
+    @classmethod
+    def _refresh_incremental(cls, storage, **kwargs):
+        """
+        Fetch only the rows newer than the cached maximum of the
+        `update_column`, less the `refresh_overlap`, and merge them into
+        the raw and processed caches, replacing rows with the same
+        `unique_key`. Falls back to a full download if there is nothing
+        cached to refresh, and returns the data path.
+        """
+        if cls.update_column is None or cls.unique_key is None:
+            raise ValueError(f"'{cls.__name__}' does not support incremental refresh")
+
+        dirname = cls.get_path(**kwargs)
+        data_path = dirname / storage.filename
+        if not cls.raw_meta(**kwargs) or cls._find_cache(dirname) is None:
+            return cls._update_cache(storage, fresh=True, **kwargs)
+
+        with FileLock(dirname / ".lock"):
+            existing = cls._find_cache(dirname)
+            cached = cls._format_data(
+                existing.read(dirname / existing.filename, schema=cls.get_schema())
+            )
+
+            # the watermark is the latest cached date, less the overlap
+            watermark = cached[cls.update_column].max()
+            if pd.isnull(watermark):
+                return cls._update_cache(storage, fresh=True, **kwargs)
+            since = watermark - pd.Timedelta(cls.refresh_overlap)
+
+            # fetch the new rows to a scratch directory
+            rawdir = cls.get_raw_path(**kwargs)
+            newdir = rawdir / ".incremental"
+            shutil.rmtree(newdir, ignore_errors=True)
+            newdir.mkdir()
+            try:
+                if cls.fields is not None:
+                    kwargs["fields"] = cls.raw_meta(**kwargs).get("fields")
+                cls.fetch(newdir, since=since, **kwargs)
+                kwargs.pop("fields", None)
+                new_raw = read_frame(newdir / "data.parquet")
+
+                if len(new_raw):
+                    # merge the new rows into the raw data
+                    raw = read_frame(rawdir / "data.parquet")
+                    write_frame(_merge_rows(raw, new_raw, cls.unique_key), rawdir / "data.parquet")
+
+                    # only the new rows are transformed and geocoded
+                    new = cls.get_schema().enforce(cls.transform(newdir, **kwargs))
+                    if getattr(cached, "crs", None) is not None:
+                        new = new.to_crs(cached.crs)
+                    data = _merge_rows(cached, new, cls.unique_key)
+                    data = data.sort_values(cls.update_column, ascending=False)
+            finally:
+                shutil.rmtree(newdir, ignore_errors=True)
+
+            # record the fetch time of the raw data
+            meta = {**cls.raw_meta(**kwargs), "fetch_time": cls.now()}
+            with atomic_path(rawdir / "source.json") as path:
+                with path.open(mode="w") as f:
+                    json.dump(meta, f)
+
+            if len(new_raw):
+                cls._save(storage, data.reset_index(drop=True), **kwargs)
+            elif not data_path.exists():
+                return cls._update_cache(storage, **kwargs)
+
+        return data_path
+
+    @classmethod
+    def _save(cls, storage, data, **kwargs):
+        """
+        Save newly downloaded or rebuilt data to the cache, along with its
+        meta-data, and return the data as saved. The caller should hold the
+        lock on the dataset directory.
+        """
+        dirname = cls.get_path(**kwargs)
+        data = cls.get_schema().enforce(data)
+
+        # the download time is when the raw source data was fetched
+        download_time = cls.raw_meta(**kwargs).get("fetch_time") or cls.now()
+
+        data_path = dirname / storage.filename
+        cls._write(storage, data, data_path)
+        update_catalog(cls.__name__, dirname, kwargs, storage, data, download_time)
+
+        # keep any copies in other formats in sync
+        for other in STORAGE_FORMATS.values():
+            if other is not storage and (dirname / other.filename).exists():
+                cls._write(other, data, dirname / other.filename)
+                update_catalog(cls.__name__, dirname, kwargs, other, data)
+
+        # save the download time
+        meta = {
+            "download_time": download_time,
+            "processed_time": cls.now(),
+            "storage_format": storage.name,
+            "fields": cls.raw_meta(**kwargs).get("fields"),
+            "kwargs": kwargs,
+        }
+        with atomic_path(dirname / "meta.json") as path:
+            with path.open(mode="w") as f:
+                json.dump(meta, f, default=str)
+
+        return data
+
+    @classmethod
+    def _write(cls, storage, data, path):
+        """
+        Write the data to the input path atomically, so that concurrent
+        readers never see a partially written file.
+        """
+        with atomic_path(path) as tmp:
+            storage.write(data, tmp)
+
+    @classmethod
+    def _find_cache(cls, dirname):
+        """
+        Return the storage class of an existing cache file in the input
+        directory, or None if the dataset has not been cached.
+        """
+        # prefer the binary formats, which are faster to read
+        for storage in sorted(STORAGE_FORMATS.values(), key=lambda s: s.name == "csv"):
+            if (dirname / storage.filename).exists():
+                return storage
+        return None
 
-        # Download and save a fresh copy
-        data_path = dirname / "data.csv"
-        meta_path = dirname / "meta.json"
-        if not data_path.exists() or fresh:
+    @classmethod
+    def get_raw_path(cls, **kwargs):
+        """
+        Return the directory path holding the raw source data.
+        """
+        return cls.get_path(**kwargs) / "raw"
 
-            # download and save a fresh copy
-            data = cls.download(**kwargs)
-            data.to_csv(data_path, index=False)
+    @classmethod
+    def raw_meta(cls, **kwargs):
+        """
+        Dictionary of meta-data related to the raw source data, or an
+        empty dict if it has not been fetched.
+        """
+        path = cls.get_raw_path(**kwargs) / "source.json"
+        if path.exists():
+            with path.open(mode="r") as f:
+                return json.load(f)
+        else:
+            return {}
 
-            # save the download time
-            meta = {"download_time": cls.now()}
-            json.dump(meta, meta_path.open(mode="w"))
+    @classmethod
+    def get_raw(cls, fresh=False, fields=None, **kwargs):
+        """
+        Return the directory holding the raw source data, fetching it
+        if needed.
 
-        # Load and return the formatted data
-        return cls._format_data(pd.read_csv(data_path, low_memory=False))
+        Parameters
+        ----------
+        fresh : bool, optional
+            whether to fetch a fresh copy of the raw data
+        fields : list of str, optional
+            source fields to fetch in addition to the minimal `fields`,
+            or "all" for every field
+        **kwargs :
+            Additional keywords are passed to the `get_path()` function and
+            the `fetch()` function
+        """
+        rawdir = cls.get_raw_path(**kwargs)
+        fields = cls.get_fields(fields)
+        meta = cls.raw_meta(**kwargs)
+        if meta and not fresh and _covers(meta.get("fields"), fields):
+            return rawdir
+
+        # the raw data may be shared by several processed datasets
+        dirname = rawdir.parent
+        dirname.mkdir(parents=True, exist_ok=True)
+        with FileLock(dirname / ".lock"):
+            rawdir.mkdir(exist_ok=True)
+            if cls.fields is not None:
+                modified = cls.fetch(rawdir, fields=fields, **kwargs) is not False
+            else:
+                modified = cls.fetch(rawdir, **kwargs) is not False
+
+            # the source file marks the raw data as complete
+            now = cls.now()
+            fetch_time = cls.raw_meta(**kwargs).get("fetch_time")
+            meta = {
+                "fetch_time": now if modified or not fetch_time else fetch_time,
+                "checked_time": now,
+                "modified": modified,
+                "fields": fields,
+                "kwargs": kwargs,
+            }
+            with atomic_path(rawdir / "source.json") as path:
+                with path.open(mode="w") as f:
+                    json.dump(meta, f)
+
+        return rawdir
+
+    @classmethod
+    def rebuild(cls, **kwargs):
+        """
+        Rebuild the processed dataset from the cached raw source data,
+        without accessing the network.
+
+        Parameters
+        ----------
+        **kwargs :
+            Additional keywords are passed to the `get_path()` function and
+            the `transform()` function
 
-    @abstractclassmethod
+        Returns
+        -------
+        data : DataFrame/GeoDataFrame
+            the rebuilt dataset
+        """
+        if not cls.raw_meta(**kwargs):
+            raise ValueError(f"No raw data has been fetched for '{cls.__name__}'")
+
+        with FileLock(cls.get_path(**kwargs) / ".lock"):
+            data = cls.transform(cls.get_raw_path(**kwargs), **kwargs)
+            data = cls._save(cls.get_storage(), data, **kwargs)
+
+        return cls._format_data(data)
+
+    @classmethod
+    def fetch(cls, rawdir, **kwargs):
+        """
+        Fetch the untouched source data and save it to the input directory.
+
+        Subclasses that define `fetch` and `transform`, rather than
+        `download`, keep a copy of their raw source data, so the processed
+        dataset can be rebuilt offline.
+
+        Returns
+        -------
+        modified : bool, optional
+            False if the source data has not changed since it was last
+            fetched, in which case the existing processed cache is kept
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def transform(cls, rawdir, **kwargs):
+        """
+        Process the raw source data saved by `fetch` in the input directory.
+
+        Returns
+        -------
+        data : DataFrame/GeoDataFrame
+            the processed dataset
+        """
+        raise NotImplementedError
+
+    @classmethod
     def download(cls, **kwargs):
         """
         Download and return the dataset.
 
-        This must be defined for subclasses of the `Dataset` class.
+        By default, this fetches a fresh copy of the raw source data with
+        `fetch()` and processes it with `transform()`. Subclasses without
+        a raw stage can override this function instead.
 
         Returns
         -------
         data : DataFrame/GeoDataFrame
             the dataset as a data frame object
         """
-        raise NotImplementedError
+        return cls.transform(cls.get_raw(fresh=True, **kwargs), **kwargs)
+
+    @classmethod
+    def _download(cls, fresh=False, cached=False, fields=None, **kwargs):
+        """
+        Internal function to download the dataset, re-using the raw
+        source data, if it exists, holds the requested fields, and a fresh
+        copy is not requested.
+
+        If the dataset is already `cached` and `fetch` reports that the
+        source has not changed, this returns None rather than processing
+        the same data again.
+        """
+        # datasets without a raw stage are downloaded directly
+        if cls.download.__func__ is not Dataset.download.__func__:
+            return cls.download(**kwargs)
+
+        meta = cls.raw_meta(**kwargs)
+        if fresh or not meta or not _covers(meta.get("fields"), fields):
+            cls.get_raw(fresh=True, fields=fields or "all", **kwargs)
+            if cached and not cls.raw_meta(**kwargs).get("modified", True):
+                return None
+
+        return cls.transform(cls.get_raw_path(**kwargs), **kwargs)
+
+    @classmethod
+    def get_fields(cls, fields=None):
+        """
+        Return the source fields to download for the input request: the
+        minimal `fields` plus any requested extras, or None for all fields.
+
+        Parameters
+        ----------
+        fields : list of str, optional
+            the additional fields to download, or "all" for every field
+        """
+        if cls.fields is None or fields == "all":
+            return None
+        extras = [field for field in fields or [] if field not in cls.fields]
+        return [*cls.fields, *extras]
+
+    @classmethod
+    def cached_fields(cls, **kwargs):
+        """
+        Return the source fields held by the processed cache, or None if
+        it holds all fields.
+
+        Parameters
+        ----------
+        **kwargs :
+            Additional keywords are passed to the `get_path()` function
+        """
+        path = cls.get_path(**kwargs) / "meta.json"
+        if not path.exists():
+            return None
+        with path.open(mode="r") as f:
+            return json.load(f).get("fields")
+
+    @classmethod
+    def _has_fields(cls, fields, **kwargs):
+        """
+        Internal function to return whether the processed cache holds the
+        input source fields.
+        """
+        return _covers(cls.cached_fields(**kwargs), fields)
+
+
+def _covers(cached, fields):
+    """
+    Internal function to return whether the cached source fields include
+    the input fields, where None stands for all fields.
+    """
+    if cached is None:
+        return True
+    return fields is not None and set(fields).issubset(cached)
+
+
+def _union_fields(fields, cached):
+    """
+    Internal function to combine two sets of source fields, where None
+    stands for all fields.
+    """
+    if fields is None or cached is None:
+        return None
+    return [*fields, *[field for field in cached if field not in fields]]
+
+
+def _merge_rows(old, new, key):
+    """
+    Internal function to append the input new rows to the old rows,
+    replacing any old rows with the same key.
+    """
+    old = old.loc[~old[key].isin(new[key])]
+    return pd.concat([new, old], ignore_index=True)
 
 
 class DatasetWithYear(Dataset):
@@ -149,7 +853,28 @@ class DatasetWithYear(Dataset):
         return data_dir / cls.__name__ / str(year)
 
     @classmethod
-    def get(cls, fresh=False, year=DEFAULT_YEAR):
+    def source_where(cls, year=DEFAULT_YEAR, years=None, **kwargs):
+        """
+        Return the SQL where clause selecting the input year(s) of the
+        source table, using the `update_column`, or None if the dataset
+        has no `update_column`.
+        """
+        if cls.update_column is None:
+            return None
+
+        from .carto import year_range
+
+        clauses = []
+        for year in [year] if years is None else sorted(set(years)):
+            start, end = year_range(year)
+            clauses.append(
+                f"({cls.update_column} >= '{start:%Y-%m-%d}' "
+                f"AND {cls.update_column} < '{end:%Y-%m-%d}')"
+            )
+        return " OR ".join(clauses)
+
+    @classmethod
+    def get(cls, fresh=False, year=DEFAULT_YEAR, years=None, **kwargs):
         """
         Load the dataset, optionally downloading a fresh copy.
 
@@ -160,9 +885,101 @@ class DatasetWithYear(Dataset):
             dataset should be downloaded
         year : int, optional
             the data year to download
+        years : list of int, optional
+            load several years at once, e.g., `range(2015, 2020)`; see
+            `get_years()`
+        **kwargs :
+            Additional keywords are passed to `Dataset.get()`
+        """
+        if years is not None:
+            return cls.get_years(years, fresh=fresh, **kwargs)
+
+        return super().get(fresh=fresh, year=year, **kwargs)
+
+    @classmethod
+    def get_years(
+        cls,
+        years,
+        fresh=False,
+        refresh=None,
+        mmap=False,
+        columns=None,
+        filters=None,
+        fields=None,
+        max_workers=4,
+        **kwargs,
+    ):
+        """
+        Load several years of the dataset as a single data frame.
+
+        Each year is cached in its own directory, so the years act as
+        partitions: missing years are downloaded concurrently, the cached
+        years are read in parallel, and years excluded by a filter on the
+        "year" column are never read.
+
+        Parameters
+        ----------
+        years : list of int
+            the data years to load
+        fresh, refresh, mmap, columns, filters, fields :
+            the same as for `Dataset.get()`
+        max_workers : int, optional
+            the maximum number of years downloaded or read at the same time
+        **kwargs :
+            Additional keywords are passed to the `get_path()` function and
+            the `download()` function
+
+        Returns
+        -------
+        data : DataFrame/GeoDataFrame
+            the combined data for all years, with a "year" column
         """
+        from concurrent.futures import ThreadPoolExecutor
+
+        # skip the years that cannot pass the filters
+        years = sorted(set(int(year) for year in years))
+        years = [year for year in years if partition_matches(filters, "year", year)]
+
+        storage = STORAGE_FORMATS["feather"] if mmap else cls.get_storage()
+
+        def update(year):
+            if refresh == "incremental":
+                return cls._refresh_incremental(storage, year=year, **kwargs)
+            fresh_year = fresh or refresh == "full"
+            return cls._update_cache(
+                storage, fresh=fresh_year, fields=fields, year=year, **kwargs
+            )
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            paths = list(pool.map(update, years))
+
+        # Return the in-memory copy if none of the files have changed
+        key = MEMORY_CACHE.make_key(
+            cls,
+            storage,
+            {
+                **kwargs,
+                "years": years,
+                "columns": columns,
+                "filters": filters,
+                "mmap": mmap,
+            },
+        )
+        mtime = tuple(path.stat().st_mtime_ns for path in paths)
+        data = MEMORY_CACHE.get(key, mtime)
+        if data is not None:
+            return data
 
-        return super().get(fresh=fresh, year=year)
+        data = storage.read_many(
+            paths,
+            mmap=mmap,
+            columns=columns,
+            filters=filters,
+            schema=cls.get_schema(),
+            partition=("year", years),
+            max_workers=max_workers,
+        )
+        return MEMORY_CACHE.put(key, mtime, cls._format_data(data))
 
 
 def geocode(df, polygons, use_centroids=False):
@@ -199,7 +1016,9 @@ def geocode(df, polygons, use_centroids=False):
 
     # Only join valid geometries
     valid = df.geometry.is_valid
-    geocoded = gpd.sjoin(df.loc[valid], polygons, op="within", how="left").drop(
+    version = tuple(int(v) for v in gpd.__version__.split(".")[:2])
+    predicate = {"op" if version < (0, 10) else "predicate": "within"}
+    geocoded = gpd.sjoin(df.loc[valid], polygons, how="left", **predicate).drop(
         labels=["index_right"], axis=1
     )
 
@@ -4,6 +4,8 @@ import numpy as np
 from . import EPSG, DEFAULT_YEAR
 from .core import *
 from .regions import *
+from .raw import read_frame, write_frame
+from .carto import get_windowed, year_range
 
 __all__ = ["CrimeIncidents", "Shootings"]
 
@@ -27,33 +29,56 @@ class CrimeIncidents(DatasetWithYear):
     https://www.opendataphilly.org/dataset/crime-incidents
     """
 
+    host = "phl.carto.com"
     date_columns = ["dispatch_date_time"]
+    schema = Schema(
+        dtypes={"ucr_general": "Int16"},
+        categories=["dc_dist", "psa", "text_general_code", *REGION_COLUMNS],
+        dates={"dispatch_date_time": "%Y-%m-%d %H:%M:%S"},
+    )
+
+    table_name = "incidents_part1_part2"
+    update_column = "dispatch_date_time"
+    unique_key = "dc_key"
+    fields = [
+        "dc_dist",
+        "dc_key",
+        "dispatch_date_time",
+        "location_block",
+        "psa",
+        "text_general_code",
+        "ucr_general",
+    ]
+    extra_fields = [
+        "objectid",
+        "dispatch_date",
+        "dispatch_time",
+        "hour_",
+        "point_x",
+        "point_y",
+    ]
 
     @classmethod
-    def download(cls, year=DEFAULT_YEAR):
+    def fetch(cls, rawdir, year=DEFAULT_YEAR, since=None, fields=None):
 
         # Query CARTO
-        gdf = carto2gpd.get(
-            "https://phl.carto.com/api/v2/sql",
-            "incidents_part1_part2",
-            fields=[
-                "dc_dist",
-                "dc_key",
-                "dispatch_date_time",
-                "location_block",
-                "psa",
-                "text_general_code",
-                "ucr_general",
-            ],
-            where=f"extract(year from dispatch_date_time) = {year}",
+        gdf = get_windowed(
+            cls.table_name,
+            "dispatch_date_time",
+            *year_range(year, since),
+            fields=fields,
         )
+        write_frame(gdf, rawdir / "data.parquet")
+
+    @classmethod
+    def transform(cls, rawdir, year=DEFAULT_YEAR):
+
+        gdf = read_frame(rawdir / "data.parquet")
 
         return (
             replace_missing_geometries(gdf)
             .to_crs(epsg=EPSG)
-            .pipe(geocode, ZIPCodes.get())
-            .pipe(geocode, Neighborhoods.get())
-            .pipe(geocode, PUMAs.get())
+            .pipe(geocode_many)
             .assign(
                 dispatch_date_time=lambda df: pd.to_datetime(df.dispatch_date_time),
                 year=lambda df: df.dispatch_date_time.dt.year,
@@ -77,22 +102,34 @@ class Shootings(Dataset):
     https://www.opendataphilly.org/dataset/shooting-victims
     """
 
+    host = "phl.carto.com"
+    table_name = "shootings"
     date_columns = ["date"]
 
     @classmethod
-    def download(cls, year=DEFAULT_YEAR):
+    def source_where(cls, year=DEFAULT_YEAR, **kwargs):
+        return f"year = {int(year)}"
+
+    @classmethod
+    def fetch(cls, rawdir, year=DEFAULT_YEAR):
 
         # Query CARTO
         gdf = carto2gpd.get(
-            "https://phl.carto.com/api/v2/sql", "shootings", where=f"year = {year}"
+            "https://phl.carto.com/api/v2/sql",
+            cls.table_name,
+            where=cls.source_where(year=year),
         )
+        write_frame(gdf, rawdir / "data.parquet")
+
+    @classmethod
+    def transform(cls, rawdir, year=DEFAULT_YEAR):
+
+        gdf = read_frame(rawdir / "data.parquet")
 
         return (
             replace_missing_geometries(gdf)
             .to_crs(epsg=EPSG)
-            .pipe(geocode, ZIPCodes.get())
-            .pipe(geocode, Neighborhoods.get())
-            .pipe(geocode, PUMAs.get())
+            .pipe(geocode_many)
             .assign(
                 time=lambda df: df.time.replace("<Null>", np.nan).fillna("00:00:00"),
                 date=lambda df: pd.to_datetime(
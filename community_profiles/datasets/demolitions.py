@@ -1,8 +1,9 @@
-import carto2gpd
 import geopandas as gpd
 from . import EPSG
-from .core import Dataset, geocode, replace_missing_geometries
+from .core import Dataset, geocode_many, replace_missing_geometries
 from .regions import *
+from .raw import read_frame
+from .carto import get_paged
 
 __all__ = ["Demolitions"]
 
@@ -17,16 +18,39 @@ class Demolitions(Dataset):
     https://www.opendataphilly.org/dataset/building-demolitions
     """
 
+    host = "phl.carto.com"
+    table_name = "li_demolitions"
+    fields = [
+        "objectid",
+        "address",
+        "opa_account_num",
+        "record_type",
+        "typeofwork",
+        "city_demo",
+        "start_date",
+        "completed_date",
+        "status",
+    ]
+    extra_fields = [
+        "caseorpermitnumber",
+        "applicantname",
+        "contractorname",
+        "ownername",
+        "organization",
+        "censustract",
+        "zip",
+    ]
+
+    @classmethod
+    def fetch(cls, rawdir, fields=None, **kwargs):
+
+        # Query CARTO, falling back to all fields if the field list is stale
+        get_paged(cls.table_name, rawdir / "pages", fields=fields)
+
     @classmethod
-    def download(cls, **kwargs):
+    def transform(cls, rawdir, **kwargs):
 
-        # Query CARTO
-        gdf = carto2gpd.get("https://phl.carto.com/api/v2/sql", "li_demolitions")
+        gdf = read_frame(rawdir / "pages")
 
-        return (
-            gdf.to_crs(epsg=EPSG)
-            .pipe(geocode, ZIPCodes.get())
-            .pipe(geocode, Neighborhoods.get())
-            .pipe(geocode, PUMAs.get())
-        )
+        return gdf.to_crs(epsg=EPSG).pipe(geocode_many)
 
@@ -1,8 +1,9 @@
 import esri2gpd
 import geopandas as gpd
 from . import EPSG
-from .core import Dataset, geocode, replace_missing_geometries
+from .core import Dataset, geocode_many, replace_missing_geometries
 from .regions import *
+from .raw import read_frame, write_frame
 
 
 __all__ = ["FoodRetail"]
@@ -22,16 +23,19 @@ class FoodRetail(Dataset):
     https://www.opendataphilly.org/dataset/neighborhood-food-retail
     """
 
+    host = "services.arcgis.com"
+
     @classmethod
-    def download(cls, **kwargs):
+    def fetch(cls, rawdir, **kwargs):
 
         url = "https://services.arcgis.com/fLeGjb7u4uXqeF9q/arcgis/rest/services/NeighborhoodFoodRetail/FeatureServer/0"
         gdf = esri2gpd.get(url)
+        write_frame(gdf, rawdir / "data.parquet")
+
+    @classmethod
+    def transform(cls, rawdir, **kwargs):
+
+        gdf = read_frame(rawdir / "data.parquet")
 
-        return (
-            gdf.to_crs(epsg=EPSG)
-            .pipe(geocode, ZIPCodes.get())
-            .pipe(geocode, Neighborhoods.get())
-            .pipe(geocode, PUMAs.get())
-        )
+        return gdf.to_crs(epsg=EPSG).pipe(geocode_many)
 
@@ -0,0 +1,1059 @@
+import time
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from pyproj import CRS
+
+__all__ = [
+    "geocode_many",
+    "build_crosswalk",
+    "RegionIndex",
+    "region_index",
+    "GridIndex",
+    "grid_index",
+    "benchmark_geocode",
+]
+
+# the predicates that give the same result with their arguments swapped,
+# so the prepared region polygons can be the first argument
+SWAPPED_PREDICATES = {
+    "intersects": "intersects",
+    "within": "contains",
+    "contains": "within",
+    "covered_by": "covers",
+    "covers": "covered_by",
+    "touches": "touches",
+    "overlaps": "overlaps",
+    "crosses": "crosses",
+}
+
+# the loaded region and grid indexes, by path
+_REGION_INDEXES = {}
+_GRID_INDEXES = {}
+
+# the region layers that datasets are geocoded against, by region column
+REGION_LAYERS = {
+    "zip_code": "ZIPCodes",
+    "neighborhood": "Neighborhoods",
+    "puma": "PUMAs",
+}
+
+
+def _load_layer(layer):
+    """
+    Internal function to return the polygons of a region layer given as a
+    GeoDataFrame, a Dataset class, or the name of a Dataset class.
+    """
+    from .core import DATASETS
+
+    if isinstance(layer, str):
+        layer = DATASETS[layer]
+    if isinstance(layer, type):
+        layer = layer.get()
+    return layer
+
+
+def _query(sindex, geometry, predicate):
+    """
+    Internal function to return the (input, tree) positions of the pairs
+    of geometries matching the predicate, e.g., the points that are
+    "within" each polygon of a spatial index.
+    """
+    if isinstance(sindex, RegionIndex):
+        return sindex.query(geometry, predicate=predicate)
+
+    version = tuple(int(v) for v in gpd.__version__.split(".")[:2])
+    if version < (0, 12):
+        return sindex.query_bulk(geometry, predicate=predicate)
+    return sindex.query(geometry, predicate=predicate)
+
+
+def _cache_key(*layers):
+    """
+    Internal function to return a key identifying the cached copies of
+    the input region datasets, which changes when any of them is updated.
+    """
+    mtimes = []
+    for cls in layers:
+        path = cls.get_path() / cls.get_storage().filename
+        if not path.exists():
+            cls.get()
+        mtimes.append(str(path.stat().st_mtime_ns))
+    return "-".join(mtimes)
+
+
+class RegionIndex:
+    """
+    A spatial index of the polygons of a region layer that can be saved
+    to disk, and loaded again without building a tree or parsing the
+    cached data set.
+
+    The polygons are stored as packed WKB, alongside a packed R-tree of
+    their bounding boxes, built with the sort-tile-recursive algorithm.
+    The polygons are prepared once loaded, so repeated queries are fast.
+
+    Parameters
+    ----------
+    geometries : GeometryArray
+        the polygons, in their original order
+    boxes : ndarray
+        the (xmin, ymin, xmax, ymax) bounds of the tree nodes, from the
+        leaves to the root
+    levels : ndarray
+        the offsets of each level of the tree in `boxes`
+    order : ndarray
+        the position of the polygon of each leaf
+    crs : str, optional
+        the CRS of the polygons
+    key : str, optional
+        identifies the polygons the index was built from
+    node_size : int, optional
+        the number of children of each node of the tree
+    """
+
+    def __init__(self, geometries, boxes, levels, order, crs=None, key="", node_size=4):
+        self.geometries = geometries
+        self.boxes = boxes
+        self.levels = levels
+        self.order = order
+        self.crs = crs
+        self.key = key
+        self.node_size = node_size
+
+        # each side of the node bounds, for faster comparisons
+        self._sides = [np.ascontiguousarray(boxes[:, k]) for k in range(4)]
+
+        # prepare the polygons for repeated predicates, if supported
+        try:
+            import shapely
+
+            shapely.prepare(geometries._data)
+        except (ImportError, AttributeError):
+            pass
+
+    def __len__(self):
+        return len(self.geometries)
+
+    def __repr__(self):
+        return f"RegionIndex(size={len(self)}, levels={len(self.levels) - 1})"
+
+    @classmethod
+    def build(cls, polygons, key="", node_size=4):
+        """
+        Build the index of the input polygons.
+
+        Parameters
+        ----------
+        polygons : GeoDataFrame or GeoSeries
+            the polygons to index
+        key : str, optional
+            identifies the polygons the index was built from
+        node_size : int, optional
+            the number of children of each node of the tree
+
+        Returns
+        -------
+        index : RegionIndex
+            the spatial index
+        """
+        geometries = gpd.GeoSeries(polygons.geometry).values
+        bounds = geometries.bounds
+
+        # sort-tile-recursive: vertical slices, sorted by y within slices
+        n = len(bounds)
+        cx = (bounds[:, 0] + bounds[:, 2]) / 2
+        cy = (bounds[:, 1] + bounds[:, 3]) / 2
+        leaves = max(int(np.ceil(n / node_size)), 1)
+        per_slice = node_size * int(np.ceil(np.sqrt(leaves)))
+        order = np.argsort(cx, kind="stable")
+        slices = np.arange(n) // per_slice
+        order = order[np.lexsort((cy[order], slices))]
+
+        # each node holds the bounds of its children
+        levels = [bounds[order]]
+        while len(levels[-1]) > 1:
+            children = levels[-1]
+            starts = np.arange(0, len(children), node_size)
+            levels.append(
+                np.column_stack(
+                    [
+                        np.fmin.reduceat(children[:, 0], starts),
+                        np.fmin.reduceat(children[:, 1], starts),
+                        np.fmax.reduceat(children[:, 2], starts),
+                        np.fmax.reduceat(children[:, 3], starts),
+                    ]
+                )
+            )
+
+        offsets = np.cumsum([0] + [len(level) for level in levels])
+        boxes = np.concatenate(levels).reshape(-1, 4)
+        crs = None if polygons.crs is None else polygons.crs.to_wkt()
+        return cls(geometries, boxes, offsets, order, crs, key, node_size)
+
+    def query(self, geometry, predicate=None, chunk_size=100000):
+        """
+        Return the pairs of input geometries and polygons whose bounding
+        boxes intersect, and that match the predicate, if provided.
+
+        This follows the bulk query of a geopandas spatial index, e.g.,
+        ``index.query(points, predicate="within")`` returns the points
+        within each polygon. Points, lines and polygons are supported.
+
+        Parameters
+        ----------
+        geometry : GeoSeries or array-like
+            the input geometries
+        predicate : str, optional
+            the predicate between the input geometries and the polygons,
+            e.g., "within" or "intersects"
+        chunk_size : int, optional
+            the number of input geometries processed at a time
+
+        Returns
+        -------
+        ipos, jpos : ndarray
+            the positions of the input geometries and of the polygons,
+            sorted by input, then polygon
+        """
+        geometry = gpd.GeoSeries(geometry).values
+        bounds = geometry.bounds
+
+        ipos, jpos = [], []
+        for start in range(0, len(bounds), chunk_size):
+            i, j = self._query_bounds(bounds[start : start + chunk_size])
+            ipos.append(i + start)
+            jpos.append(j)
+        ipos = np.concatenate(ipos or [np.empty(0, dtype="int64")])
+        jpos = np.concatenate(jpos or [np.empty(0, dtype="int64")])
+
+        if predicate is not None and len(ipos):
+            if predicate in SWAPPED_PREDICATES:
+                polygons = self.geometries[jpos]
+                func = getattr(polygons, SWAPPED_PREDICATES[predicate])
+                keep = np.asarray(func(geometry[ipos]))
+            else:
+                keep = np.asarray(
+                    getattr(geometry[ipos], predicate)(self.geometries[jpos])
+                )
+            ipos, jpos = ipos[keep], jpos[keep]
+
+        order = np.lexsort((jpos, ipos))
+        return ipos[order], jpos[order]
+
+    def _query_bounds(self, bounds):
+        """
+        Internal function to return the (input, polygon) positions of the
+        input bounding boxes and the polygon bounding boxes they intersect.
+        """
+        bounds = [np.ascontiguousarray(bounds[:, k]) for k in range(4)]
+        i = np.arange(len(bounds[0]))
+        node = np.zeros(len(i), dtype="int64")
+        if not len(self):
+            return i[:0], node[:0]
+
+        # descend from the root, keeping the nodes that intersect
+        for level in range(len(self.levels) - 2, -1, -1):
+            offset = self.levels[level]
+            if level < len(self.levels) - 2:
+                first = node * self.node_size
+                size = self.levels[level + 1] - offset
+                count = np.minimum(self.node_size, size - first)
+                i = np.repeat(i, count)
+                starts = np.repeat(np.cumsum(count) - count, count)
+                node = np.repeat(first, count) + np.arange(len(i)) - starts
+
+            # compare one side at a time, dropping the misses as we go
+            for a, b, compare in [
+                (0, 2, np.less_equal),
+                (2, 0, np.greater_equal),
+                (1, 3, np.less_equal),
+                (3, 1, np.greater_equal),
+            ]:
+                hit = compare(bounds[a][i], self._sides[b][node + offset])
+                i, node = i[hit], node[hit]
+
+        return i, self.order[node]
+
+    def save(self, path):
+        """
+        Save the index to the input path, atomically.
+        """
+        from .locks import atomic_path
+
+        wkb = [bytes(value) for value in gpd.GeoSeries(self.geometries).to_wkb()]
+        offsets = np.cumsum([0] + [len(value) for value in wkb])
+        with atomic_path(path) as tmp:
+            with tmp.open(mode="wb") as f:
+                np.savez(
+                    f,
+                    wkb=np.frombuffer(b"".join(wkb), dtype="uint8"),
+                    offsets=offsets,
+                    boxes=self.boxes,
+                    levels=self.levels,
+                    order=self.order,
+                    node_size=self.node_size,
+                    crs=np.array(self.crs or ""),
+                    key=np.array(self.key),
+                )
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load an index saved with `save()`.
+        """
+        with np.load(path) as f:
+            wkb, offsets = f["wkb"].tobytes(), f["offsets"]
+            values = [wkb[a:b] for a, b in zip(offsets[:-1], offsets[1:])]
+            return cls(
+                gpd.GeoSeries.from_wkb(values).values,
+                f["boxes"],
+                f["levels"],
+                f["order"],
+                crs=str(f["crs"]) or None,
+                key=str(f["key"]),
+                node_size=int(f["node_size"]),
+            )
+
+
+def region_index(layer):
+    """
+    Return the spatial index of a region layer, loading it from disk, or
+    building it if needed.
+
+    The index is saved alongside the cached layer, e.g., `CensusTracts`
+    or `PUMAs`, and built again if the layer changes. Once loaded, it is
+    kept in memory for the rest of the session.
+
+    Parameters
+    ----------
+    layer : Dataset or str
+        the region dataset class, or its name
+
+    Returns
+    -------
+    index : RegionIndex
+        the spatial index, in the CRS of the cached layer
+    """
+    from .core import DATASETS
+    from .locks import FileLock
+
+    if isinstance(layer, str):
+        layer = DATASETS[layer]
+    key = _cache_key(layer)
+
+    path = layer.get_path() / "index.npz"
+    index = _REGION_INDEXES.get(path)
+    if index is not None and index.key == key:
+        return index
+
+    with FileLock(layer.get_path() / ".lock"):
+        index = RegionIndex.load(path) if path.exists() else None
+        if index is None or index.key != key:
+            index = RegionIndex.build(layer.get(), key=key)
+            index.save(path)
+
+    _REGION_INDEXES[path] = index
+    return index
+
+
+class GridIndex:
+    """
+    A raster index of the polygons of a region layer, to match points to
+    polygons without exact geometric tests.
+
+    Each cell of a regular grid stores the position of the polygon whose
+    interior contains the whole cell, -1 if the cell is outside all
+    polygons, or -2 if it crosses a polygon boundary. Most points are then
+    matched by floor division of their coordinates and an array lookup;
+    only points in boundary cells, or outside the grid, need an exact test.
+
+    Parameters
+    ----------
+    codes : ndarray
+        the 2D array of cell values, indexed by (row, column)
+    x0, y0 : float
+        the coordinates of the lower left corner of the grid
+    cell_size : float
+        the width of each cell, in the units of the CRS
+    key : str, optional
+        identifies the polygons the index was built from
+    """
+
+    # the cell values of cells outside all polygons, or on a boundary
+    OUTSIDE = -1
+    BOUNDARY = -2
+
+    def __init__(self, codes, x0, y0, cell_size, key=""):
+        self.codes = codes
+        self.x0 = x0
+        self.y0 = y0
+        self.cell_size = cell_size
+        self.key = key
+
+    def __repr__(self):
+        ny, nx = self.codes.shape
+        return f"GridIndex(cells={nx}x{ny}, cell_size={self.cell_size})"
+
+    @classmethod
+    def build(cls, polygons, bounds, cell_size=100, key="", rows_per_block=100):
+        """
+        Build the index of the input polygons over a bounding box.
+
+        Parameters
+        ----------
+        polygons : GeoDataFrame
+            the polygons to index
+        bounds : tuple
+            the (xmin, ymin, xmax, ymax) extent of the grid
+        cell_size : float, optional
+            the width of each cell, e.g., 100 feet
+        key : str, optional
+            identifies the polygons the index was built from
+        rows_per_block : int, optional
+            the number of grid rows classified at a time, to limit memory
+
+        Returns
+        -------
+        index : GridIndex
+            the grid index
+        """
+        xmin, ymin, xmax, ymax = bounds
+        nx = max(int(np.ceil((xmax - xmin) / cell_size)), 1)
+        ny = max(int(np.ceil((ymax - ymin) / cell_size)), 1)
+        codes = np.empty((ny, nx), dtype="int32")
+
+        # cells are slightly enlarged, so points that are rounded into a
+        # neighboring cell are still classified correctly
+        eps = cell_size * 1e-6
+        x = xmin + np.arange(nx) * cell_size
+        for start in range(0, ny, rows_per_block):
+            rows = np.arange(start, min(start + rows_per_block, ny))
+            y = ymin + rows * cell_size
+            xx, yy = [a.ravel() for a in np.meshgrid(x, y)]
+            cells = gpd.GeoSeries(
+                _boxes(xx - eps, yy - eps, xx + cell_size + eps, yy + cell_size + eps)
+            )
+            codes[rows] = _classify(cells, polygons).reshape(len(rows), nx)
+
+        return cls(codes, xmin, ymin, cell_size, key=key)
+
+    def lookup(self, x, y):
+        """
+        Return the cell value for each of the input coordinates: the
+        polygon position, -1 for no polygon, or -2 where an exact test is
+        needed, including outside the grid.
+        """
+        ny, nx = self.codes.shape
+        out = np.full(len(x), self.BOUNDARY, dtype="int64")
+
+        finite = np.isfinite(x) & np.isfinite(y)
+        ix = np.floor((x[finite] - self.x0) / self.cell_size).astype("int64")
+        iy = np.floor((y[finite] - self.y0) / self.cell_size).astype("int64")
+        inside = (ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny)
+
+        values = np.full(len(ix), self.BOUNDARY, dtype="int64")
+        values[inside] = self.codes[iy[inside], ix[inside]]
+        out[finite] = values
+        return out
+
+    def save(self, path):
+        """
+        Save the index to the input path, atomically.
+        """
+        from .locks import atomic_path
+
+        with atomic_path(path) as tmp:
+            with tmp.open(mode="wb") as f:
+                np.savez_compressed(
+                    f,
+                    codes=self.codes,
+                    origin=np.array([self.x0, self.y0, self.cell_size]),
+                    key=np.array(self.key),
+                )
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load an index saved with `save()`.
+        """
+        with np.load(path) as f:
+            x0, y0, cell_size = f["origin"]
+            return cls(f["codes"], x0, y0, cell_size, key=str(f["key"]))
+
+
+def _boxes(xmin, ymin, xmax, ymax):
+    """
+    Internal function to create an array of rectangles.
+    """
+    try:
+        import shapely
+
+        return shapely.box(xmin, ymin, xmax, ymax)
+    except AttributeError:
+        from shapely.geometry import box
+
+        return np.array([box(*b) for b in zip(xmin, ymin, xmax, ymax)], dtype=object)
+
+
+def _classify(cells, polygons):
+    """
+    Internal function to return the grid value of each cell: the position
+    of the first polygon whose interior contains it, -1 if it is outside
+    all polygons, or -2 otherwise.
+    """
+    codes = np.full(len(cells), GridIndex.OUTSIDE, dtype="int64")
+
+    # the first polygon touching each cell
+    icell, ipolygon = _query(cells.sindex, polygons.geometry.values, "intersects")[::-1]
+    first = np.full(len(cells), np.iinfo("int64").max)
+    np.minimum.at(first, icell, ipolygon)
+    codes[first < np.iinfo("int64").max] = GridIndex.BOUNDARY
+
+    # cells inside the first polygon that touches them
+    ipolygon, icell = _query(
+        cells.sindex, polygons.geometry.values, "contains_properly"
+    )
+    inside = first[icell] == ipolygon
+    codes[icell[inside]] = ipolygon[inside]
+    return codes
+
+
+def grid_index(layer, cell_size=100):
+    """
+    Return the grid index of a region layer over the city limits, building
+    it if needed.
+
+    The index is saved alongside the cached layer, and built again if the
+    layer or the city limits change. Once loaded, it is kept in memory for
+    the rest of the session.
+
+    Parameters
+    ----------
+    layer : Dataset or str
+        the region dataset class, or its name
+    cell_size : float, optional
+        the width of each cell, in feet
+
+    Returns
+    -------
+    index : GridIndex
+        the grid index, in the CRS of the cached layer
+    """
+    from .core import DATASETS
+    from .locks import FileLock
+
+    if isinstance(layer, str):
+        layer = DATASETS[layer]
+    city = DATASETS["CityLimits"]
+
+    # the index depends on the cached polygons and city limits
+    key = f"{cell_size}-{_cache_key(layer, city)}"
+
+    path = layer.get_path() / f"grid-{cell_size}.npz"
+    index = _GRID_INDEXES.get(path)
+    if index is not None and index.key == key:
+        return index
+
+    with FileLock(layer.get_path() / ".lock"):
+        index = GridIndex.load(path) if path.exists() else None
+        if index is None or index.key != key:
+            polygons = layer.get()
+            bounds = city.get().to_crs(polygons.crs).total_bounds
+            index = GridIndex.build(polygons, bounds, cell_size=cell_size, key=key)
+            index.save(path)
+
+    _GRID_INDEXES[path] = index
+    return index
+
+
+def match_polygons(points, polygons, grid=None, xy=None, index=None):
+    """
+    Return the position of the polygon containing each point, or -1 if
+    the point is not within any polygon.
+
+    Parameters
+    ----------
+    points : GeoSeries
+        the valid point geometries, in the same CRS as the polygons
+    polygons : GeoDataFrame
+        the polygons; they are assumed not to overlap, and a point within
+        several polygons is matched to the first one
+    grid : GridIndex, optional
+        a grid index of the polygons, in the same CRS; only the points
+        that it cannot resolve are tested exactly
+    xy : tuple of ndarray, optional
+        the x and y coordinates of the points, if already computed
+    index : RegionIndex, optional
+        a saved spatial index of the polygons, in the same CRS, used
+        instead of building one
+
+    Returns
+    -------
+    positions : ndarray
+        the polygon positions, aligned with `points`
+    """
+    if grid is not None:
+        if xy is None:
+            xy = (points.x.to_numpy(), points.y.to_numpy())
+        positions = grid.lookup(*xy)
+        exact = positions == GridIndex.BOUNDARY
+        positions[exact] = match_polygons(points[exact], polygons, index=index)
+        return positions
+
+    positions = np.full(len(points), -1, dtype="int64")
+    if not len(points):
+        return positions
+    sindex = polygons.sindex if index is None else index
+    ipoint, ipolygon = _query(sindex, points.values, "within")
+    if not len(ipoint):
+        return positions
+
+    # keep the first polygon for each point
+    order = np.lexsort((ipolygon, ipoint))
+    ipoint, ipolygon = ipoint[order], ipolygon[order]
+    first = np.r_[True, ipoint[1:] != ipoint[:-1]]
+
+    positions[ipoint[first]] = ipolygon[first]
+    return positions
+
+
+def build_crosswalk(tracts, layers=None, tolerance=0.0):
+    """
+    Match census tracts to the coarser regions that contain them.
+
+    A tract is matched to a region if the region covers it, or, with a
+    positive `tolerance`, if all but that fraction of its area is within
+    the region. A tract that overlaps several regions is marked as split,
+    and a tract that overlaps none is left unmatched.
+
+    Parameters
+    ----------
+    tracts : GeoDataFrame
+        the census tracts, with a "census_tract" name column
+    layers : dict, optional
+        the polygon layers, as for `geocode_many()`, keyed by their name
+        column; default is the ZIP code, neighborhood, and PUMA layers
+    tolerance : float, optional
+        the fraction of a tract's area that may fall outside its region;
+        points in that sliver are assigned to the region of the tract
+
+    Returns
+    -------
+    crosswalk : DataFrame
+        the "census_tract" column, and for each layer, the name of the
+        region containing each tract and a boolean "<name>_split" column
+    """
+    if layers is None:
+        layers = REGION_LAYERS
+
+    out = pd.DataFrame({"census_tract": tracts["census_tract"].to_numpy()})
+    area = tracts.geometry.area.to_numpy()
+    for col, layer in layers.items():
+        polygons = _load_layer(layer).to_crs(tracts.crs)
+
+        # the area of each tract within each region it overlaps
+        itract, ipolygon = _query(polygons.sindex, tracts.geometry.values, "intersects")
+        left = gpd.GeoSeries(tracts.geometry.values[itract])
+        right = gpd.GeoSeries(polygons.geometry.values[ipolygon])
+        overlap = left.intersection(right).area.to_numpy()
+        covered = right.covers(left).to_numpy()
+        if tolerance > 0:
+            covered |= overlap >= (1 - tolerance) * area[itract]
+
+        # count the regions with some of the tract's area
+        counts = np.bincount(itract[overlap > 0], minlength=len(tracts))
+        matched = np.full(len(tracts), -1, dtype="int64")
+        matched[itract[covered]] = ipolygon[covered]
+
+        names = polygons[col].reset_index(drop=True).reindex(matched)
+        out[col] = names.to_numpy()
+        out[f"{col}_split"] = (matched < 0) & (counts > 0)
+
+    return out
+
+
+def _crosswalk_positions(crosswalk, tracts, polygons, col):
+    """
+    Internal function to return, for each tract, the position of the
+    region containing it, or -1, and whether the tract needs an exact test.
+    """
+    rows = pd.Index(crosswalk["census_tract"]).get_indexer(tracts["census_tract"])
+    known = rows >= 0
+
+    # look up the regions by name; duplicate names are not resolved
+    names = polygons[col].reset_index(drop=True)
+    first = pd.Series(np.arange(len(names)), index=names.to_numpy())
+    ambiguous = first.index.duplicated(keep=False)
+    first = first[~ambiguous]
+
+    region = crosswalk[col].to_numpy()[rows[known]]
+    positions = np.full(len(tracts), -1, dtype="int64")
+    positions[known] = first.reindex(region).fillna(-1).astype("int64").to_numpy()
+
+    exact = np.ones(len(tracts), dtype=bool)
+    exact[known] = crosswalk[f"{col}_split"].to_numpy()[rows[known]]
+    exact[known] |= pd.Index(region).isin(names[ambiguous])
+    exact[known] |= (positions[known] < 0) & pd.notnull(region)
+    return positions, exact
+
+
+def _layer_indexes(layer, crs, cell_size=None):
+    """
+    Internal function to return the saved spatial index and grid index of
+    a region layer given as a Dataset class or name, or None for each if
+    they cannot be used for data in the input CRS.
+    """
+    if isinstance(layer, gpd.GeoDataFrame):
+        return None, None
+    index = region_index(layer)
+    if index.crs is None or CRS.from_user_input(index.crs) != crs:
+        return None, None
+    if cell_size is None:
+        return index, None
+    return index, grid_index(layer, cell_size=cell_size)
+
+
+def _match_layers(points, xy, matchers, tracts=None):
+    """
+    Internal function to return the position of the polygon of each layer
+    containing each point, as in `geocode_many()`.
+
+    Each layer is given as a (polygons, index, grid, crosswalk) tuple of
+    its polygons, its saved spatial index and grid index, or None, and
+    its crosswalk positions, if the points are first matched to `tracts`,
+    given in the same form.
+    """
+    if tracts is not None:
+        polygons, index, cells, _ = tracts
+        in_tract = match_polygons(points, polygons, grid=cells, xy=xy, index=index)
+
+    matches = []
+    for polygons, index, cells, crosswalk in matchers:
+        if crosswalk is None:
+            matched = match_polygons(points, polygons, grid=cells, xy=xy, index=index)
+        else:
+            lookup, exact = crosswalk
+            matched = np.where(in_tract >= 0, lookup[in_tract], -1)
+            exact = (in_tract < 0) | exact[in_tract]
+            matched[exact] = match_polygons(
+                points[exact],
+                polygons,
+                grid=cells,
+                xy=None if xy is None else (xy[0][exact], xy[1][exact]),
+                index=index,
+            )
+        matches.append(matched)
+    return matches
+
+
+# the inputs of `_match_layers()` in a worker process
+_WORKER_STATE = None
+
+
+def _init_worker(state):
+    """
+    Internal function to store the points and layers in a worker process;
+    they are inherited, rather than copied, when the process is forked.
+    """
+    global _WORKER_STATE
+    _WORKER_STATE = state
+
+
+def _match_chunk(chunk, points=None, xy=None):
+    """
+    Internal function to match the points at the input positions to the
+    layers, in a worker process. The points are taken from the worker
+    state unless they are passed with the chunk.
+    """
+    shared_points, shared_xy, matchers, tracts = _WORKER_STATE
+    if points is None:
+        points = shared_points.iloc[chunk]
+        if shared_xy is not None:
+            xy = (shared_xy[0][chunk], shared_xy[1][chunk])
+    return _match_layers(points, xy, matchers, tracts)
+
+
+def _start_method():
+    """
+    Internal function to return how worker processes are started: forked
+    on Linux, unless other threads are running, as a fork only copies the
+    calling thread and could copy a lock another thread holds; otherwise
+    from a fork server on Linux, or spawned on other platforms, where
+    forking is unsafe.
+    """
+    import multiprocessing
+    import sys
+    import threading
+
+    methods = multiprocessing.get_all_start_methods()
+    if sys.platform.startswith("linux"):
+        if threading.active_count() == 1 and "fork" in methods:
+            return "fork"
+        if "forkserver" in methods:
+            return "forkserver"
+    return "spawn"
+
+
+def _spatial_chunks(x, y, count):
+    """
+    Internal function to split the positions of the input points into
+    `count` chunks of nearby points, from horizontal bands sorted by x.
+    """
+    finite = np.isfinite(x) & np.isfinite(y)
+    bands = max(int(np.ceil(np.sqrt(count))), 1)
+    band = np.zeros(len(y))
+    if finite.any():
+        ymin, ymax = y[finite].min(), y[finite].max()
+        height = (ymax - ymin) / bands or 1
+        band[finite] = np.minimum((y[finite] - ymin) // height, bands - 1)
+
+    # points without coordinates are left until the last chunk
+    band[~finite] = bands
+    order = np.lexsort((np.where(finite, x, 0), band))
+    return np.array_split(order, count)
+
+
+def _match_parallel(points, xy, matchers, tracts, processes, chunks_per_process=4):
+    """
+    Internal function to run `_match_layers()` on chunks of nearby points
+    in a pool of worker processes, and combine the results in the
+    original order. See `_start_method()` for how the workers are started.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    if xy is None:
+        coords = (points.x.to_numpy(), points.y.to_numpy())
+    else:
+        coords = xy
+    chunks = _spatial_chunks(*coords, processes * chunks_per_process)
+
+    method = _start_method()
+    if method == "fork":
+
+        # build the spatial indexes now, so the workers inherit them
+        for polygons, index, *_ in [*matchers, *([tracts] if tracts else [])]:
+            if index is None:
+                polygons.sindex
+
+        # the forked workers inherit all the points
+        state = (points, xy, matchers, tracts)
+        args = (chunks,)
+    else:
+
+        # the layers are copied to each worker once, and the points of
+        # each chunk are sent with it
+        state = (None, None, matchers, tracts)
+        args = (
+            chunks,
+            [points.iloc[chunk] for chunk in chunks],
+            [None if xy is None else (xy[0][chunk], xy[1][chunk]) for chunk in chunks],
+        )
+
+    matches = [np.empty(len(points), dtype="int64") for _ in matchers]
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context(method),
+        initializer=_init_worker,
+        initargs=(state,),
+    ) as pool:
+        for chunk, result in zip(chunks, pool.map(_match_chunk, *args)):
+            for matched, values in zip(matches, result):
+                matched[chunk] = values
+    return matches
+
+
+def geocode_many(
+    df, layers=None, use_centroids=False, crosswalk=None, grid=None, processes=None
+):
+    """
+    Geocode the input data set against several polygon layers at once.
+
+    This gives the same result as chaining calls to `geocode()`, one per
+    layer, but the centroids and validity of the geometries are computed
+    once, each layer is matched with a single spatial index query, and
+    the region columns are assigned without copying the data set for
+    each layer. If the data already has a column of a layer, it is renamed
+    with a "_left" suffix, as in a spatial join, rather than split between
+    the matched and unmatched rows.
+
+    Parameters
+    ----------
+    df : geopandas.GeoDataFrame
+        the data set to geocode
+    layers : dict, optional
+        the polygon layers, as GeoDataFrames, Dataset classes, or Dataset
+        names, keyed by a label; default is the ZIP code, neighborhood, and
+        PUMA layers. Layers given as Dataset classes or names are matched
+        using their saved `RegionIndex`.
+    use_centroids : bool, optional
+        whether to keep the original geometries; as with `geocode()`, the
+        geometries are otherwise replaced by their centroids
+    crosswalk : bool or tuple, optional
+        if True, match the points to census tracts once and look up the
+        regions containing each tract in the `TractCrosswalk`; only points
+        in split tracts, or outside all tracts, are matched to the layers
+        directly. A (tracts, crosswalk) tuple can also be given, with the
+        tracts as a layer. The layers must be keyed by their name column.
+    grid : float, optional
+        if given, match the points using a `GridIndex` of each layer with
+        this cell size, e.g., 100 feet, built over the city limits and saved
+        with the layer. The result is the same; only the points near region
+        boundaries are tested exactly. This applies to the layers given as
+        Dataset classes or names, when the data has the CRS of their cache.
+    processes : int, optional
+        the number of worker processes used to match the points; default
+        is the `GEOCODE_PROCESSES` setting. The points are split into
+        chunks of nearby points, and the result is the same as when they
+        are matched in this process. The workers are forked on Linux when
+        no other threads are running; otherwise they are started fresh,
+        which copies the layers to each worker and, outside Linux,
+        requires the calling script to be guarded by
+        ``if __name__ == "__main__"``.
+
+    Returns
+    -------
+    GeoDataFrame :
+        a copy of ``df`` with the columns of each layer matched according
+        to the point-in-polygon matching
+    """
+    if layers is None:
+        layers = REGION_LAYERS
+    if crosswalk is True:
+        from .core import DATASETS
+
+        crosswalk = ("CensusTracts", DATASETS["TractCrosswalk"].get())
+
+    # compute the centroids and their validity once for all layers
+    points = df.geometry
+    if not (points.geom_type == "Point").all():
+        points = points.centroid
+    valid = np.asarray(points.is_valid)
+    valid_points = points[valid]
+    xy = None
+    if grid is not None:
+        xy = (valid_points.x.to_numpy(), valid_points.y.to_numpy())
+
+    out = df.copy()
+    if not use_centroids:
+        out.geometry = points
+
+    # load each layer and its indexes, and the tracts, once
+    tracts = None
+    if crosswalk is not None:
+        tracts, crosswalk = crosswalk
+        index, cells = _layer_indexes(tracts, df.crs, grid)
+        tracts = (_load_layer(tracts).to_crs(df.crs), index, cells, None)
+
+    matchers = []
+    for key, layer in layers.items():
+        index, cells = _layer_indexes(layer, df.crs, grid)
+        polygons = _load_layer(layer).to_crs(df.crs)
+        positions = None
+        if crosswalk is not None:
+            positions = _crosswalk_positions(crosswalk, tracts[0], polygons, key)
+        matchers.append((polygons, index, cells, positions))
+
+    # match the points to every layer
+    if processes is None:
+        from . import GEOCODE_PROCESSES as processes
+    if processes > 1 and len(valid_points) > processes:
+        matches = _match_parallel(valid_points, xy, matchers, tracts, processes)
+    else:
+        matches = _match_layers(valid_points, xy, matchers, tracts)
+
+    for (polygons, *_), matched in zip(matchers, matches):
+        positions = np.full(len(df), -1, dtype="int64")
+        positions[valid] = matched
+
+        for col in polygons.columns:
+            if col == polygons.geometry.name:
+                continue
+
+            # match the column suffixes of a spatial join
+            name = col
+            if col in out.columns:
+                out = out.rename(columns={col: f"{col}_left"})
+                name = f"{col}_right"
+
+            values = polygons[col].reset_index(drop=True).reindex(positions)
+            out[name] = values.to_numpy()
+
+    # the columns are sorted, as by `geocode()`
+    return out[sorted(out.columns)]
+
+
+def benchmark_geocode(size=1000000, columns=20, layers=None, repeat=3, seed=42):
+    """
+    Time geocoding a synthetic data set of points against the region
+    layers, with chained `geocode()` calls and with `geocode_many()`.
+
+    The points are drawn uniformly from the bounding box of the first
+    layer, e.g., the city's ZIP codes, so a realistic share of them fall
+    within each region. Each point has numeric and text attributes, as
+    in the downloaded datasets, since their copies are part of the cost.
+
+    Parameters
+    ----------
+    size : int, optional
+        the number of points; the default is roughly the size of a year
+        of 311 requests
+    columns : int, optional
+        the number of attribute columns
+    layers : dict, optional
+        the polygon layers, as for `geocode_many()`
+    repeat : int, optional
+        the number of times to time each method
+    seed : int, optional
+        the seed of the random number generator
+
+    Returns
+    -------
+    results : DataFrame
+        the best time, in seconds, of each method, and the speedup over
+        the chained calls
+    """
+    from .core import geocode
+
+    if layers is None:
+        layers = REGION_LAYERS
+    polygons = [_load_layer(layer) for layer in layers.values()]
+
+    # random points within the extent of the regions
+    rng = np.random.default_rng(seed)
+    xmin, ymin, xmax, ymax = polygons[0].total_bounds
+    attributes = {}
+    for i in range(columns):
+        if i % 2:
+            attributes[f"text_{i}"] = rng.choice(list("abcd"), size).astype(object)
+        else:
+            attributes[f"value_{i}"] = rng.normal(size=size)
+    df = gpd.GeoDataFrame(
+        attributes,
+        geometry=gpd.points_from_xy(
+            rng.uniform(xmin, xmax, size), rng.uniform(ymin, ymax, size)
+        ),
+        crs=polygons[0].crs,
+    )
+
+    def chained():
+        out = df.copy()
+        for layer in polygons:
+            out = geocode(out, layer)
+        return out
+
+    def single_pass():
+        return geocode_many(df, dict(enumerate(polygons)))
+
+    results = []
+    for name, func in [("geocode", chained), ("geocode_many", single_pass)]:
+        timings = []
+        for i in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        results.append({"method": name, "seconds": min(timings)})
+
+    results = pd.DataFrame(results).set_index("method")
+    results["speedup"] = results.loc["geocode", "seconds"] / results["seconds"]
+    return results
@@ -4,6 +4,7 @@ import geopandas as gpd
 from . import EPSG
 from .core import Dataset, geocode, replace_missing_geometries
 from .regions import *
+from .raw import read_frame, write_frame
 import community_profiles.datasets as cp_data
 import esri2gpd
 
@@ -32,12 +33,20 @@ class LandUse(Dataset):
     https://www.opendataphilly.org/dataset/land-use
     """
 
+    host = "services.arcgis.com"
+    dependencies = []
+
     @classmethod
-    def download(cls, **kwargs):
+    def fetch(cls, rawdir, **kwargs):
 
         url = "https://services.arcgis.com/fLeGjb7u4uXqeF9q/arcgis/rest/services/Land_Use/FeatureServer/0"
+        write_frame(esri2gpd.get(url), rawdir / "data.parquet")
+
+    @classmethod
+    def transform(cls, rawdir, **kwargs):
+
         return (
-            esri2gpd.get(url).to_crs(epsg=EPSG)
+            read_frame(rawdir / "data.parquet").to_crs(epsg=EPSG)
             # .rename(columns={"c_dig1": "Type"})
         )
 
@@ -64,6 +73,8 @@ class DissolvedLandUse(Dataset):
     The returned data should be 
     """
 
+    dependencies = ["LandUse", "PUMAs"]
+
     @classmethod
     def download(cls, **kwargs):
         land = cp_data.LandUse.get()
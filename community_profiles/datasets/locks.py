@@ -0,0 +1,95 @@
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+__all__ = ["FileLock", "atomic_path"]
+
+# per-path locks shared by the threads of this process
+_THREAD_LOCKS = {}
+_THREAD_LOCKS_GUARD = threading.Lock()
+
+
+class FileLock:
+    """
+    An exclusive lock on a file, shared across threads and processes.
+
+    The lock is re-entrant within a thread, so a thread that already
+    holds it can acquire it again without blocking.
+
+    Parameters
+    ----------
+    path : Path
+        the path of the lock file; it is created if needed
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with _THREAD_LOCKS_GUARD:
+            if self.path not in _THREAD_LOCKS:
+                _THREAD_LOCKS[self.path] = [threading.RLock(), 0, None]
+            self._state = _THREAD_LOCKS[self.path]
+
+    def __enter__(self):
+        self._state[0].acquire()
+
+        # only the outermost acquire in a thread takes the file lock
+        if self._state[1] == 0:
+            self._state[2] = open(self.path, "a+")
+            _lock_file(self._state[2])
+        self._state[1] += 1
+        return self
+
+    def __exit__(self, *args):
+        self._state[1] -= 1
+        if self._state[1] == 0:
+            _unlock_file(self._state[2])
+            self._state[2].close()
+            self._state[2] = None
+        self._state[0].release()
+
+
+if os.name == "nt":
+    import msvcrt
+    import time
+
+    def _lock_file(f):
+        while True:
+            try:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                time.sleep(0.1)
+
+    def _unlock_file(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+else:
+    import fcntl
+
+    def _lock_file(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+    def _unlock_file(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def atomic_path(path):
+    """
+    Context manager yielding a temporary path to write to, which is
+    renamed to `path` on success.
+
+    The temporary file lives in the same directory, so the rename is
+    atomic and readers never see a partially written file.
+    """
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
@@ -1,8 +1,9 @@
-import carto2gpd
 import pandas as pd
 from . import EPSG, DEFAULT_YEAR
 from .core import *
 from .regions import *
+from .raw import read_frame, write_frame
+from .carto import get_windowed, year_range
 
 
 __all__ = ["NewConstructionPermits"]
@@ -22,24 +23,34 @@ class NewConstructionPermits(DatasetWithYear):
     https://www.opendataphilly.org/dataset/licenses-and-inspections-building-permits
     """
 
+    host = "phl.carto.com"
     date_columns = ["permitissuedate"]
+    schema = Schema(categories=REGION_COLUMNS, dates={"permitissuedate": "%Y-%m-%d %H:%M:%S"})
+
+    update_column = "permitissuedate"
+    unique_key = "objectid"
 
     @classmethod
-    def download(cls, year=DEFAULT_YEAR):
+    def fetch(cls, rawdir, year=DEFAULT_YEAR, since=None):
 
         # Query CARTO
-        gdf = carto2gpd.get(
-            "https://phl.carto.com/api/v2/sql",
+        gdf = get_windowed(
             "li_permits",
-            where=f"extract(year from permitissuedate) = {year} and permitdescription = 'NEW CONSTRUCTION PERMIT'",
+            "permitissuedate",
+            *year_range(year, since),
+            where="permitdescription = 'NEW CONSTRUCTION PERMIT'",
         )
+        write_frame(gdf, rawdir / "data.parquet")
+
+    @classmethod
+    def transform(cls, rawdir, year=DEFAULT_YEAR):
+
+        gdf = read_frame(rawdir / "data.parquet")
 
         return (
             replace_missing_geometries(gdf)
             .to_crs(epsg=EPSG)
-            .pipe(geocode, ZIPCodes.get())
-            .pipe(geocode, Neighborhoods.get())
-            .pipe(geocode, PUMAs.get())
+            .pipe(geocode_many)
             .assign(
                 permitissuedate=lambda df: pd.to_datetime(df.permitissuedate),
                 year=lambda df: df.permitissuedate.dt.year,
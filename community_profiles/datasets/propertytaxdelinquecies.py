@@ -1,8 +1,9 @@
-import carto2gpd
 import geopandas as gpd
 from . import EPSG
-from .core import Dataset, geocode, replace_missing_geometries
+from .core import Dataset, geocode_many, replace_missing_geometries
 from .regions import *
+from .raw import read_frame
+from .carto import get_paged
 
 __all__ = ["TaxDelinquencies"]
 
@@ -17,16 +18,40 @@ class TaxDelinquencies(Dataset):
     https://www.opendataphilly.org/dataset/property-tax-delinquencies
     """
 
+    host = "phl.carto.com"
+    table_name = "real_estate_tax_delinquencies"
+    fields = [
+        "opa_number",
+        "street_address",
+        "total_due",
+        "num_years_owed",
+        "most_recent_year_owed",
+        "building_category",
+        "is_actionable",
+    ]
+    extra_fields = [
+        "zip_code",
+        "owner",
+        "principal_due",
+        "penalty_due",
+        "interest_due",
+        "other_charges_due",
+        "oldest_year_owed",
+        "payment_agreement",
+        "sheriff_sale",
+        "bankruptcy",
+    ]
+
+    @classmethod
+    def fetch(cls, rawdir, fields=None, **kwargs):
+
+        # large table: download in resumable pages
+        get_paged(cls.table_name, rawdir / "pages", fields=fields)
+
     @classmethod
-    def download(cls, **kwargs):
+    def transform(cls, rawdir, **kwargs):
 
-        url = "https://phl.carto.com/api/v2/sql"
-        gdf = carto2gpd.get(url, "real_estate_tax_delinquencies")
+        gdf = read_frame(rawdir / "pages")
 
-        return (
-            gdf.to_crs(epsg=EPSG)
-            .pipe(geocode, ZIPCodes.get())
-            .pipe(geocode, Neighborhoods.get())
-            .pipe(geocode, PUMAs.get())
-        )
+        return gdf.to_crs(epsg=EPSG).pipe(geocode_many)
 
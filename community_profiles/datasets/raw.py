@@ -0,0 +1,203 @@
+import json
+from pathlib import Path
+import geopandas as gpd
+import pandas as pd
+from .locks import atomic_path
+from .storage import ParquetStorage, _cache_kwargs, _iter_cache_dirs
+
+__all__ = ["rebuild_all"]
+
+
+def write_frame(data, path):
+    """
+    Save a raw DataFrame/GeoDataFrame to the input path as GeoParquet,
+    keeping its original CRS.
+    """
+    with atomic_path(path) as tmp:
+        ParquetStorage.write(data, tmp)
+
+
+def read_frame(path):
+    """
+    Load a raw DataFrame/GeoDataFrame saved with :func:`write_frame`, or
+    a folder of pages saved by :func:`get_paged`, in order.
+    """
+    import pyarrow.parquet as pq
+
+    path = Path(path)
+    if path.is_dir():
+        return _read_pages(sorted(path.glob("page-*.parquet")))
+
+    data = ParquetStorage.read(path)
+    if "geometry" not in data.columns:
+        return data
+
+    meta = json.loads(pq.read_schema(path).metadata[b"geo"])
+    crs = meta["columns"]["geometry"].get("crs")
+    return gpd.GeoDataFrame(data, geometry="geometry", crs=crs and json.dumps(crs))
+
+
+def _read_pages(paths):
+    """
+    Internal function to load and combine the input raw pages.
+    """
+    frames = [read_frame(path) for path in paths]
+    if not frames:
+        return gpd.GeoDataFrame()
+
+    data = pd.concat(frames, ignore_index=True, sort=False)
+    crs = next((df.crs for df in frames if isinstance(df, gpd.GeoDataFrame)), None)
+    if "geometry" in data.columns:
+        data = gpd.GeoDataFrame(data, geometry="geometry", crs=crs)
+    return data
+
+
+def download_file(url, path, chunk_size=2 ** 20, conditional=False, **kwargs):
+    """
+    Stream the content at the input URL to a file, without holding the
+    whole response in memory.
+
+    Parameters
+    ----------
+    url : str
+        the URL to download
+    path : Path
+        the output file path; it is written atomically
+    chunk_size : int, optional
+        the number of bytes to write at a time
+    conditional : bool, optional
+        if True, save the ETag and Last-Modified validators of the response,
+        and send them with the next request for the same URL, so an
+        unchanged file is not downloaded again
+    **kwargs :
+        Additional keywords are passed to `requests.get()`
+
+    Returns
+    -------
+    modified : bool
+        False if the server reported that the existing file has not been
+        modified, otherwise True
+    """
+    import requests
+
+    # the validators are saved alongside the file
+    path = Path(path)
+    validators_path = path.with_name(f"{path.name}.http.json")
+    validators = {}
+    if conditional and path.exists() and validators_path.exists():
+        with validators_path.open(mode="r") as f:
+            validators = json.load(f)
+
+    headers = dict(kwargs.pop("headers", {}))
+    if validators.get("url") == url:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+    with requests.get(url, stream=True, headers=headers, **kwargs) as r:
+        if r.status_code == 304:
+            return False
+
+        r.raise_for_status()
+        with atomic_path(path) as tmp:
+            with tmp.open(mode="wb") as f:
+                for chunk in r.iter_content(chunk_size=chunk_size):
+                    f.write(chunk)
+
+        if conditional:
+            validators = {
+                "url": url,
+                "etag": r.headers.get("ETag"),
+                "last_modified": r.headers.get("Last-Modified"),
+            }
+            with atomic_path(validators_path) as tmp:
+                with tmp.open(mode="w") as f:
+                    json.dump(validators, f)
+
+    return True
+
+
+def _iter_raw_dirs(names=None):
+    """
+    Internal function to yield (dataset class, keywords) pairs for every
+    processed dataset with raw source data in the data directory.
+
+    The keywords are read from the processed caches, since several
+    processed datasets may share one raw directory, e.g., the kinds of
+    `SchoolSurvey` responses.
+    """
+    for cls, dirname in _iter_cache_dirs(names):
+        kwargs = _cache_kwargs(cls, dirname)
+        if kwargs is not None and cls.raw_meta(**kwargs):
+            yield cls, kwargs
+
+
+def _rebuild(name, kwargs):
+    """
+    Internal function to rebuild a single dataset, by name, in a worker.
+    """
+    from .core import DATASETS
+
+    DATASETS[name].rebuild(**kwargs)
+    return name, kwargs
+
+
+def rebuild_all(names=None, processes=None):
+    """
+    Rebuild the processed cache of every cached dataset from its raw
+    source data, without accessing the network.
+
+    This is useful after changing the processing logic or the region
+    boundaries. Datasets are rebuilt in dependency order, so the region
+    layers are rebuilt before the datasets geocoded against them; datasets
+    that do not depend on each other are rebuilt in parallel in separate
+    processes.
+
+    Parameters
+    ----------
+    names : list of str, optional
+        only rebuild these datasets; default is all processed datasets
+        with raw data
+    processes : int, optional
+        the number of worker processes; default is the number of CPUs
+
+    Returns
+    -------
+    rebuilt : list of tuple
+        the (name, keywords) pairs of the rebuilt datasets, in the order
+        they finished
+    """
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor
+    from concurrent.futures import ThreadPoolExecutor, wait
+    from .refresh import dependency_graph
+
+    jobs = {}
+    for cls, kwargs in _iter_raw_dirs(names):
+        jobs.setdefault(cls.__name__, []).append(kwargs)
+
+    # each dataset waits for the datasets it depends on to be rebuilt
+    graph = dependency_graph(list(jobs))
+    pending = {name: [dep for dep in graph[name] if dep in jobs] for name in jobs}
+    remaining = {name: len(kwargs) for name, kwargs in jobs.items()}
+
+    # a single process rebuilds the datasets in this process, one at a time
+    if processes == 1:
+        pool = ThreadPoolExecutor(max_workers=1)
+    else:
+        pool = ProcessPoolExecutor(max_workers=processes)
+
+    rebuilt = []
+    with pool:
+        running = {}
+        while pending or running:
+            for name in [n for n in pending if not any(remaining[d] for d in pending[n])]:
+                pending.pop(name)
+                for kwargs in jobs[name]:
+                    running[pool.submit(_rebuild, name, kwargs)] = name
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                remaining[running.pop(future)] -= 1
+                rebuilt.append(future.result())
+    return rebuilt
@@ -2,6 +2,7 @@ import carto2gpd
 from . import EPSG
 from .core import *
 from .regions import *
+from .raw import read_frame, write_frame
 
 __all__ = ["RealEstateTransfers"]
 
@@ -22,21 +23,27 @@ class RealEstateTransfers(DatasetWithYear):
     https://www.opendataphilly.org/dataset/real-estate-transfers
     """
 
+    host = "phl.carto.com"
     date_columns = ["receipt_date", "recording_date", "document_date", "display_date"]
 
     @classmethod
-    def download(cls, year=2018):
+    def fetch(cls, rawdir, year=2018):
 
         gdf = carto2gpd.get(
             "https://phl.carto.com/api/v2/sql",
             "RTT_SUMMARY",
             where=f"extract(year from DISPLAY_DATE) = {year}",
         )
+        write_frame(gdf, rawdir / "data.parquet")
+
+    @classmethod
+    def transform(cls, rawdir, year=2018):
+
+        gdf = read_frame(rawdir / "data.parquet")
+
         return (
             gdf.to_crs(epsg=EPSG)
             .drop(labels=["zip_code"], axis=1)
-            .pipe(geocode, ZIPCodes.get())
-            .pipe(geocode, Neighborhoods.get())
-            .pipe(geocode, PUMAs.get())
+            .pipe(geocode_many)
         )
 
@@ -2,6 +2,7 @@ import esri2gpd
 from . import EPSG
 from .core import *
 from .regions import *
+from .raw import read_frame, write_frame
 
 __all__ = ["RebuildSites"]
 
@@ -16,27 +17,35 @@ class RebuildSites(Dataset):
     https://phl.maps.arcgis.com/home/item.html?id=2cee6cd0c0864258b326108707b8942b
     """
 
+    host = "services.arcgis.com"
+    fields = [
+        "ASSET_NAME",
+        "ASSET_ADDR",
+        "SITE_NAME",
+        "Copy_of_Master_Site_List_9_24_2",
+        "Copy_of_Master_Site_List_9_24_5",
+        "Copy_of_Master_Site_List_9_24_7",
+        "Copy_of_Master_Site_List_9_24_8",
+        "Copy_of_Master_Site_List_9_24_9",
+        "Copy_of_Master_Site_List_9_2_10",
+        "Copy_of_Master_Site_List_9_2_11",
+        "Copy_of_Master_Site_List_9_2_13",
+    ]
+
     @classmethod
-    def download(cls, **kwargs):
-
-        fields = [
-            "ASSET_NAME",
-            "ASSET_ADDR",
-            "SITE_NAME",
-            "Copy_of_Master_Site_List_9_24_2",
-            "Copy_of_Master_Site_List_9_24_5",
-            "Copy_of_Master_Site_List_9_24_7",
-            "Copy_of_Master_Site_List_9_24_8",
-            "Copy_of_Master_Site_List_9_24_9",
-            "Copy_of_Master_Site_List_9_2_10",
-            "Copy_of_Master_Site_List_9_2_11",
-            "Copy_of_Master_Site_List_9_2_13",
-        ]
+    def fetch(cls, rawdir, fields=None, **kwargs):
 
         url = "https://services.arcgis.com/fLeGjb7u4uXqeF9q/arcgis/rest/services/Rebuild_Sites/FeatureServer/0"
+        gdf = esri2gpd.get(url, fields=fields)
+        write_frame(gdf, rawdir / "data.parquet")
+
+    @classmethod
+    def transform(cls, rawdir, **kwargs):
+
+        gdf = read_frame(rawdir / "data.parquet")
 
         return (
-            esri2gpd.get(url, fields=fields)
+            gdf
             .to_crs(epsg=EPSG)
             .rename(
                 columns={
@@ -50,7 +59,5 @@ class RebuildSites(Dataset):
                     "Copy_of_Master_Site_List_9_2_13": "HIGH_NEED",
                 }
             )
-            .pipe(geocode, ZIPCodes.get())
-            .pipe(geocode, Neighborhoods.get())
-            .pipe(geocode, PUMAs.get())
+            .pipe(geocode_many)
         )
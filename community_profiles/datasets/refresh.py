@@ -0,0 +1,208 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+import pandas as pd
+
+__all__ = ["refresh_all", "warm"]
+
+
+def dependency_graph(names=None):
+    """
+    Return the dependency graph of the registered datasets.
+
+    Parameters
+    ----------
+    names : list of str, optional
+        only include these datasets and the datasets they depend on;
+        default is all registered datasets
+
+    Returns
+    -------
+    graph : dict
+        the names of the datasets each dataset depends on, keyed by name
+    """
+    from .core import DATASETS
+
+    if names is None:
+        names = [name for name, cls in DATASETS.items() if _is_concrete(cls)]
+
+    todo = list(names)
+    graph = {}
+    while todo:
+        name = todo.pop()
+        if name in graph:
+            continue
+        if name not in DATASETS:
+            raise ValueError(f"Unknown dataset '{name}'")
+        graph[name] = [dep for dep in DATASETS[name].dependencies if dep != name]
+        todo.extend(graph[name])
+
+    _check_cycles(graph)
+    return graph
+
+
+def _is_concrete(cls):
+    """
+    Internal function to return whether the input dataset class defines
+    how it is downloaded, rather than being a base class.
+    """
+    from .core import Dataset
+
+    return (
+        cls.download.__func__ is not Dataset.download.__func__
+        or cls.fetch.__func__ is not Dataset.fetch.__func__
+    )
+
+
+def _check_cycles(graph):
+    """
+    Internal function to raise a ValueError if the dependency graph
+    has a cycle.
+    """
+    done, visiting = set(), set()
+
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Dependency cycle involving dataset '{name}'")
+        visiting.add(name)
+        for dep in graph[name]:
+            visit(dep)
+        visiting.discard(name)
+        done.add(name)
+
+    for name in graph:
+        visit(name)
+
+
+def refresh_all(names=None, refresh="full", max_workers=8, per_host=2):
+    """
+    Download fresh copies of the registered datasets, in dependency order.
+
+    Region layers are refreshed first, and datasets built from other
+    datasets, e.g., `SchoolScores` from `Schools`, wait for them. Datasets
+    that do not depend on each other are downloaded concurrently, with a
+    limit on the number of concurrent requests to each host. A failed
+    download is reported, and any datasets depending on it are skipped.
+    Pinned snapshots are released first, so dependents are built from
+    the refreshed copies of their parents.
+
+    Parameters
+    ----------
+    names : list of str, optional
+        only refresh these datasets; the datasets they depend on are
+        loaded from the cache, if possible. Default is all datasets.
+    refresh : str, optional
+        "full" to download fresh copies, "incremental" to only fetch new
+        rows for datasets that support it, or None to only load the
+        cached copies, downloading them if needed
+    max_workers : int, optional
+        the maximum number of datasets loaded at the same time
+    per_host : int, optional
+        the maximum number of concurrent downloads from each host
+
+    Returns
+    -------
+    report : DataFrame
+        the status ("ok", "failed", or "skipped"), start time, and duration
+        in seconds of each dataset, and any error message, in the order
+        the datasets finished
+    """
+    from .cache import release_snapshots
+    from .core import DATASETS
+
+    # dependents should be built from the refreshed datasets
+    release_snapshots()
+
+    graph = dependency_graph(names)
+    requested = set(graph if names is None else names)
+    host_limits = {}
+
+    def run(name):
+        cls = DATASETS[name]
+        limit = None
+        if cls.host is not None:
+            limit = host_limits.setdefault(cls.host, threading.Semaphore(per_host))
+
+        # dependencies are only loaded, unless explicitly requested
+        kwargs = {}
+        if name in requested and refresh == "incremental" and cls.update_column:
+            kwargs["refresh"] = "incremental"
+        elif name in requested and refresh is not None:
+            kwargs["refresh"] = "full"
+
+        # only time the download itself, not the wait for the host
+        with limit or nullcontext():
+            start = time.time()
+            cls.get(**kwargs)
+        return start, time.time() - start
+
+    rows = []
+    pending = dict(graph)
+    finished, failed = set(), set()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        running = {}
+        while pending or running:
+
+            # skip anything that depends on a failed dataset
+            for name in [n for n in pending if failed.intersection(pending[n])]:
+                pending.pop(name)
+                failed.add(name)
+                rows.append(
+                    {"dataset": name, "status": "skipped", "error": "dependency failed"}
+                )
+
+            # start everything whose dependencies have finished
+            for name in [n for n in pending if finished.issuperset(pending[n])]:
+                pending.pop(name)
+                running[pool.submit(run, name)] = name
+
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    start, seconds = future.result()
+                    finished.add(name)
+                    rows.append(
+                        {
+                            "dataset": name,
+                            "status": "ok",
+                            "start": pd.Timestamp(start, unit="s"),
+                            "seconds": seconds,
+                        }
+                    )
+                except Exception as e:
+                    failed.add(name)
+                    rows.append({"dataset": name, "status": "failed", "error": repr(e)})
+
+    columns = ["dataset", "status", "start", "seconds", "error"]
+    return pd.DataFrame(rows, columns=columns).set_index("dataset")
+
+
+def warm(names=None, max_workers=8, per_host=2):
+    """
+    Load the registered datasets into the cache, downloading only those
+    that have not been cached yet, in dependency order.
+
+    Parameters
+    ----------
+    names : list of str, optional
+        only load these datasets, and the datasets they depend on
+    max_workers : int, optional
+        the maximum number of datasets loaded at the same time
+    per_host : int, optional
+        the maximum number of concurrent downloads from each host
+
+    Returns
+    -------
+    report : DataFrame
+        the status and duration of each dataset, as with `refresh_all()`
+    """
+    return refresh_all(
+        names=names, refresh=None, max_workers=max_workers, per_host=per_host
+    )
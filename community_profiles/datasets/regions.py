@@ -1,9 +1,18 @@
 import esri2gpd
 import os
 from . import EPSG
-from .core import DatasetWithYear, Dataset
-
-__all__ = ["CensusTracts", "Neighborhoods", "ZIPCodes", "CityLimits", "PUMAs"]
+from .core import DATASETS, DatasetWithYear, Dataset
+from .raw import read_frame, write_frame
+from .geocoding import build_crosswalk
+
+__all__ = [
+    "CensusTracts",
+    "Neighborhoods",
+    "ZIPCodes",
+    "CityLimits",
+    "PUMAs",
+    "TractCrosswalk",
+]
 
 DEFAULT_YEAR = 2018
 
@@ -14,13 +23,20 @@ class CensusTracts(DatasetWithYear):
     from the 2010 Census.
     """
 
+    dependencies = []
+
     @classmethod
-    def download(cls, year=DEFAULT_YEAR):
+    def fetch(cls, rawdir, year=DEFAULT_YEAR):
 
         from phlcensus.regions import CensusTracts
 
+        write_frame(CensusTracts.get(year=year), rawdir / "data.parquet")
+
+    @classmethod
+    def transform(cls, rawdir, year=DEFAULT_YEAR):
+
         return (
-            CensusTracts.get(year=year)[["geometry", "geo_name"]]
+            read_frame(rawdir / "data.parquet")[["geometry", "geo_name"]]
             .rename(columns={"geo_name": "census_tract"})
             .to_crs(epsg=EPSG)
         )
@@ -32,13 +48,20 @@ class PUMAs(DatasetWithYear):
     in Philadelphia from the 2010 Census.
     """
 
+    dependencies = []
+
     @classmethod
-    def download(cls, year=DEFAULT_YEAR):
+    def fetch(cls, rawdir, year=DEFAULT_YEAR):
 
         from phlcensus.regions import PUMAs
 
+        write_frame(PUMAs.get(year=year), rawdir / "data.parquet")
+
+    @classmethod
+    def transform(cls, rawdir, year=DEFAULT_YEAR):
+
         return (
-            PUMAs.get(year=year)[["geometry", "geo_name"]]
+            read_frame(rawdir / "data.parquet")[["geometry", "geo_name"]]
             .rename(columns={"geo_name": "puma"})
             .to_crs(epsg=EPSG)
         )
@@ -53,11 +76,19 @@ class CityLimits(Dataset):
     http://phl.maps.arcgis.com/home/item.html?id=405ec3da942d4e20869d4e1449a2be48
     """
 
+    host = "services.arcgis.com"
+    dependencies = []
+
     @classmethod
-    def download(cls, **kwargs):
+    def fetch(cls, rawdir, **kwargs):
 
         url = "https://services.arcgis.com/fLeGjb7u4uXqeF9q/arcgis/rest/services/City_Limits/FeatureServer/0"
-        return esri2gpd.get(url).to_crs(epsg=EPSG)
+        write_frame(esri2gpd.get(url), rawdir / "data.parquet")
+
+    @classmethod
+    def transform(cls, rawdir, **kwargs):
+
+        return read_frame(rawdir / "data.parquet").to_crs(epsg=EPSG)
 
 
 class Neighborhoods(Dataset):
@@ -70,13 +101,20 @@ class Neighborhoods(Dataset):
     in the `phlcensus` library.
     """
 
+    dependencies = []
+
     @classmethod
-    def download(cls, **kwargs):
+    def fetch(cls, rawdir, **kwargs):
 
         from phlcensus.regions import NTAs
 
+        write_frame(NTAs.get(), rawdir / "data.parquet")
+
+    @classmethod
+    def transform(cls, rawdir, **kwargs):
+
         return (
-            NTAs.get()[["geometry", "geo_name"]]
+            read_frame(rawdir / "data.parquet")[["geometry", "geo_name"]]
             .rename(columns={"geo_name": "neighborhood"})
             .to_crs(epsg=EPSG)
         )
@@ -95,9 +133,89 @@ class ZIPCodes(Dataset):
     https://phl.maps.arcgis.com/home/item.html?id=ab9d26be1df8486c8d5d706fb32b33d5
     """
 
+    dependencies = []
+
     @classmethod
-    def download(cls, **kwargs):
+    def fetch(cls, rawdir, **kwargs):
 
         from phlcensus.regions import ZIPCodes
 
-        return ZIPCodes.get().to_crs(epsg=EPSG)
+        write_frame(ZIPCodes.get(), rawdir / "data.parquet")
+
+    @classmethod
+    def transform(cls, rawdir, **kwargs):
+
+        return read_frame(rawdir / "data.parquet").to_crs(epsg=EPSG)
+
+
+class TractCrosswalk(DatasetWithYear):
+    """
+    The ZIP code, neighborhood, and PUMA containing each census tract,
+    used to geocode points against a single layer of tracts.
+
+    Tracts that overlap more than one region of a layer are marked as
+    split in the "<region>_split" columns; points within them are matched
+    to that layer exactly.
+
+    Notes
+    -----
+    This is computed from the cached region boundaries, and computed again
+    when any of them is newer than the cached crosswalk.
+    """
+
+    dependencies = ["CensusTracts", "ZIPCodes", "Neighborhoods", "PUMAs"]
+
+    # the fraction of a tract's area that may fall outside its region
+    tolerance = 0.0
+
+    @classmethod
+    def download(cls, year=DEFAULT_YEAR):
+
+        tracts = CensusTracts.get(year=year)
+        return build_crosswalk(tracts, tolerance=cls.tolerance)
+
+    @classmethod
+    def get(cls, fresh=False, years=None, **kwargs):
+        """
+        Load the crosswalk, computing it again first if it is stale; see
+        `is_stale()`.
+        """
+        if not fresh and years is None:
+            fresh = cls.is_stale(**kwargs)
+        return super().get(fresh=fresh, years=years, **kwargs)
+
+    @classmethod
+    def is_stale(cls, year=None, **kwargs):
+        """
+        Whether the cached crosswalk is older than the cache of any of the
+        region boundaries it was computed from, or one of those caches was
+        removed. The caches may be stored in any format.
+        """
+        path_kwargs = {} if year is None else {"year": year}
+        mtime = _cache_mtime(cls, cls.get_path(**path_kwargs))
+        if mtime is None:
+            return False
+
+        # only the tracts are loaded for the crosswalk's year
+        for name in cls.dependencies:
+            layer = DATASETS[name]
+            if layer is CensusTracts:
+                layer_path = layer.get_path(**path_kwargs)
+            else:
+                layer_path = layer.get_path()
+            layer_mtime = _cache_mtime(layer, layer_path)
+            if layer_mtime is None or layer_mtime > mtime:
+                return True
+        return False
+
+
+def _cache_mtime(dataset, dirname):
+    """
+    Internal function to return the modification time of the cache of a
+    dataset in the input directory, in whichever format it is stored, or
+    None if it has not been cached.
+    """
+    storage = dataset._find_cache(dirname)
+    if storage is None:
+        return None
+    return (dirname / storage.filename).stat().st_mtime_ns
@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype, is_integer_dtype
+
+__all__ = ["Schema", "memory_report"]
+
+
+class Schema:
+    """
+    A declarative schema for the columns of a dataset.
+
+    The schema is enforced when a dataset is written to the cache, and
+    used when reading text formats to skip type inference. Columns that
+    are listed but not present in the data are ignored.
+
+    Parameters
+    ----------
+    dtypes : dict, optional
+        explicit column dtypes, e.g., `{"objectid": "Int64"}`; use the
+        pandas nullable integer types for integer columns with missing values
+    categories : list of str, optional
+        low-cardinality string columns to store as categoricals
+    dates : dict, optional
+        datetime columns, mapped to their strftime format, or None to
+        infer the format
+    downcast : bool, optional
+        whether to downcast the remaining integer columns to the smallest
+        integer type that holds their values; floats are left alone to
+        avoid losing precision
+    """
+
+    def __init__(self, dtypes=None, categories=None, dates=None, downcast=True):
+        self.dtypes = dict(dtypes or {})
+        self.categories = list(categories or [])
+        self.dates = dict(dates or {})
+        self.downcast = downcast
+
+    def __repr__(self):
+        return (
+            f"Schema(dtypes={self.dtypes}, categories={self.categories}, "
+            f"dates={self.dates}, downcast={self.downcast})"
+        )
+
+    def with_dates(self, columns):
+        """
+        Return a copy of the schema that also parses the input date
+        columns, inferring their format.
+        """
+        dates = {col: None for col in columns}
+        dates.update(self.dates)
+        return Schema(self.dtypes, self.categories, dates, self.downcast)
+
+    def read_dtypes(self, columns=None):
+        """
+        Return the `dtype` mapping to pass to `pandas.read_csv()`, limited
+        to the input columns, if provided.
+        """
+        dtypes = {col: "category" for col in self.categories}
+        dtypes.update(self.dtypes)
+        if columns is not None:
+            dtypes = {col: dtype for col, dtype in dtypes.items() if col in columns}
+        return dtypes
+
+    def parse_dates(self, data):
+        """
+        Convert the date columns of the input data to datetimes, using
+        the declared formats.
+        """
+        for col, fmt in self.dates.items():
+            if col not in data.columns or is_datetime64_any_dtype(data[col]):
+                continue
+            try:
+                data[col] = pd.to_datetime(data[col], format=fmt)
+            except (ValueError, TypeError):
+                data[col] = pd.to_datetime(data[col])
+        return data
+
+    def enforce(self, data):
+        """
+        Convert the columns of the input data to the declared types.
+
+        Returns
+        -------
+        data : DataFrame/GeoDataFrame
+            the data with dates parsed, categoricals converted, explicit
+            dtypes applied, and integer columns downcast
+        """
+        data = self.parse_dates(data)
+
+        for col in self.categories:
+            if col in data.columns and data[col].dtype.name != "category":
+                data[col] = data[col].astype("category")
+
+        for col, dtype in self.dtypes.items():
+            if col in data.columns:
+                data[col] = data[col].astype(dtype)
+
+        if self.downcast:
+            for col in data.columns:
+                if col in self.dtypes or not is_integer_dtype(data[col]):
+                    continue
+                if isinstance(data[col].dtype, np.dtype):
+                    data[col] = pd.to_numeric(data[col], downcast="integer")
+
+        return data
+
+
+def memory_report(cls, **kwargs):
+    """
+    Compare the memory used by a dataset when loaded with type inference
+    and when loaded with the dataset's declared schema.
+
+    Parameters
+    ----------
+    cls : Dataset
+        the dataset class
+    **kwargs :
+        Additional keywords are passed to the `get()` function
+
+    Returns
+    -------
+    report : DataFrame
+        the memory usage of each column, in bytes, before and after
+        the schema is applied, with a "total" row
+    """
+    import tempfile
+    from pathlib import Path
+    from .storage import CSVStorage
+
+    data = cls.get(**kwargs)
+
+    # the inferred types, as in a plain CSV round-trip
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = Path(tmpdirname) / CSVStorage.filename
+        CSVStorage.write(data, path)
+        inferred = CSVStorage.read(path)
+        for col in cls.date_columns:
+            if col in inferred.columns:
+                inferred[col] = pd.to_datetime(inferred[col])
+
+    typed = cls.get_schema().enforce(data.copy())
+
+    report = pd.DataFrame(
+        {
+            "before": inferred.memory_usage(deep=True, index=False),
+            "after": typed.memory_usage(deep=True, index=False),
+        }
+    )
+    report.loc["total"] = report.sum()
+    report["reduction"] = 1 - report["after"] / report["before"]
+    return report
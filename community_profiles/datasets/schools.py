@@ -2,12 +2,12 @@ from . import EPSG
 from .. import data_dir
 from .core import Dataset, geocode, replace_missing_geometries
 from .regions import *
+from .raw import download_file, read_frame, write_frame
 import pandas as pd
 import geopandas as gpd
 import numpy as np
 from shapely.geometry import Point
-import tempfile
-import requests, zipfile, io
+import zipfile
 
 
 __all__ = ["Schools", "SchoolScores", "SchoolSurvey", "GraduationRates"]
@@ -24,12 +24,20 @@ class Schools(Dataset):
     https://phl.maps.arcgis.com/home/item.html?id=d46a7e59e2c246c891fbee778759717e
     """
 
+    host = "cdn.philasd.org"
+    dependencies = []
+
     @classmethod
-    def download(cls, **kwargs):
+    def fetch(cls, rawdir, **kwargs):
 
-        # Load the raw data
         url = "https://cdn.philasd.org/offices/performance/Open_Data/School_Information/School_List/2019-2020%20Master%20School%20List%20(20191218).csv"
-        df = pd.read_csv(url)
+        download_file(url, rawdir / "data.csv")
+
+    @classmethod
+    def transform(cls, rawdir, **kwargs):
+
+        # Load the raw data
+        df = pd.read_csv(rawdir / "data.csv")
 
         # Convert GPS column to geometry
         df["geometry"] = df["GPS Location"].apply(
@@ -42,6 +50,28 @@ class Schools(Dataset):
         ).to_crs(epsg=EPSG)
 
 
+def _join_schools(df, on, columns):
+    """
+    Internal function to join the input data to the pinned snapshot of
+    the schools, so loading several school datasets only loads the
+    schools once.
+
+    Parameters
+    ----------
+    df : DataFrame
+        the data to join, with an ID column `on`
+    on : str
+        the school ID to join on: "ULCS Code" or "SRC School ID"
+    columns : list of str
+        the columns of the schools to include
+    """
+    schools = Schools.snapshot(index=on)[columns]
+    df = df.assign(**{on: df[on].astype(str)}).set_index(on)
+    return schools.join(df, how="inner", lsuffix="_x", rsuffix="_y").reset_index(
+        drop=True
+    )
+
+
 class SchoolScores(Dataset):
     """
     Developed in 2019 and include data for the 2017-2018 School Progress Reports. 
@@ -52,24 +82,28 @@ class SchoolScores(Dataset):
     https://www.philasd.org/performance/programsservices/open-data/school-performance/#school_progress_report
     """
 
+    host = "cdn.philasd.org"
+    dependencies = ["Schools"]
+
     @classmethod
-    def download(cls, **kwargs):
+    def fetch(cls, rawdir, **kwargs):
 
-        # Load the raw data
         url = (
             "https://cdn.philasd.org/offices/performance/Open_Data/School_Performance/"
             "School_Progress_Report/SPR_SY1718_School_Metric_Scores_20190129.xlsx"
         )
-        df = pd.read_excel(url, sheet_name="SPR SY2017-2018")
+        download_file(url, rawdir / "data.xlsx")
 
-        # Load geometries for schools and merge them in
-        schools = Schools.get(fresh=True)[
-            ["ULCS Code", "Governance", "School Level", "geometry"]
-        ]
+    @classmethod
+    def transform(cls, rawdir, **kwargs):
 
-        for a in [schools, df]:
-            a["ULCS Code"] = a["ULCS Code"].astype(str)
-        df = schools.merge(df, on="ULCS Code")
+        # Load the raw data
+        df = pd.read_excel(rawdir / "data.xlsx", sheet_name="SPR SY2017-2018")
+
+        # Merge in geometries for schools
+        df = _join_schools(
+            df, "ULCS Code", ["ULCS Code", "Governance", "School Level", "geometry"]
+        )
 
         # Make overall score a float (non-numbers are set to NaN)
         df["Overall Score"] = pd.to_numeric(df["Overall Score"], errors="coerce")
@@ -178,6 +212,9 @@ class SchoolSurvey(Dataset):
     https://www.philasd.org/performance/programsservices/open-data/school-performance/#school_progress_report
     """
 
+    host = "cdn.philasd.org"
+    dependencies = ["Schools"]
+
     SCHOOL_YEAR = [2018, 2019]
 
     @classmethod
@@ -185,7 +222,7 @@ class SchoolSurvey(Dataset):
         return data_dir / cls.__name__ / kind
 
     @classmethod
-    def get(cls, fresh=False, kind="student"):
+    def get(cls, fresh=False, kind="student", **kwargs):
         """
         Load the dataset, optionally downloading a fresh copy.
         
@@ -196,6 +233,8 @@ class SchoolSurvey(Dataset):
             dataset should be downloaded
         kind : str, optional
             kind of responses: 'student', 'parent', or 'teacher'
+        **kwargs :
+            Additional keywords are passed to `Dataset.get()`
         """
         # Verify input level
         allowed = ["student", "parent", "teacher"]
@@ -203,35 +242,66 @@ class SchoolSurvey(Dataset):
             raise ValueError(f"Allowed values for 'lind' are: {allowed}")
 
         # return
-        return cls.process(super().get(fresh=fresh, kind=kind), kind=kind)
+        return cls.process(super().get(fresh=fresh, kind=kind, **kwargs), kind=kind)
 
     @classmethod
-    def download(cls, **kwargs):
+    def get_raw_path(cls, **kwargs):
+        """
+        Return the directory path holding the raw source data, which is
+        shared by all kinds of responses.
+        """
+        return data_dir / cls.__name__ / "raw"
+
+    @classmethod
+    def fetch(cls, rawdir, **kwargs):
+
+        # Download the ZIP file
+        url = (
+            "https://cdn.philasd.org/offices/performance/Open_Data/School_Information/"
+            f"District_Wide_Survey/{cls.SCHOOL_YEAR[0]}_{cls.SCHOOL_YEAR[1]}_All_Respondent_Data.zip"
+        )
+        modified = download_file(url, rawdir / "data.zip", conditional=True)
+
+        # the parsed sheets are out of date
+        if modified:
+            for path in rawdir.glob("sheet-*.parquet"):
+                path.unlink()
+        return modified
+
+    @classmethod
+    def transform(cls, rawdir, **kwargs):
 
         # what kind of response to return?
         kind = kwargs.get("kind", "student")
 
-        # download to a temporary directory first
-        with tempfile.TemporaryDirectory() as tmpdirname:
-
-            # Download the ZIP file
-            url = (
-                "https://cdn.philasd.org/offices/performance/Open_Data/School_Information/"
-                f"District_Wide_Survey/{cls.SCHOOL_YEAR[0]}_{cls.SCHOOL_YEAR[1]}_All_Respondent_Data.zip"
-            )
-            r = requests.get(url)
-            z = zipfile.ZipFile(io.BytesIO(r.content))
-            z.extractall(path=tmpdirname)
+        path = rawdir / f"sheet-{kind}.parquet"
+        if not path.exists():
+            cls._parse_sheets(rawdir)
+        return read_frame(path)
 
-            # tags
-            tag = "-".join(map(str, cls.SCHOOL_YEAR))  # this is 2018-2019
-            sheet_tag = "".join(map(lambda x: str(x)[-2:], cls.SCHOOL_YEAR))  # 1819
-            kind = kind.capitalize()
+    @classmethod
+    def _parse_sheets(cls, rawdir):
+        """
+        Internal function to parse the workbooks for all kinds of responses
+        in one pass over the ZIP file, and cache them in the raw folder.
 
-            return pd.read_excel(
-                z.open(f"{tag} {kind} School Level.xlsx"),
-                sheet_name=f"{sheet_tag} {kind}",
-            )
+        Only the needed members of the archive are read, without extracting
+        it. Cells are saved as strings, as they would be read from a CSV
+        file, since the sheets mix text and numbers in each column.
+        """
+        # tags
+        tag = "-".join(map(str, cls.SCHOOL_YEAR))  # this is 2018-2019
+        sheet_tag = "".join(map(lambda x: str(x)[-2:], cls.SCHOOL_YEAR))  # 1819
+
+        with zipfile.ZipFile(rawdir / "data.zip") as z:
+            for kind in ["student", "parent", "teacher"]:
+                with z.open(f"{tag} {kind.capitalize()} School Level.xlsx") as f:
+                    df = pd.read_excel(
+                        f, sheet_name=f"{sheet_tag} {kind.capitalize()}"
+                    )
+                df.columns = df.columns.astype(str)
+                df = df.astype(object).where(df.isnull(), df.astype(str))
+                write_frame(df, rawdir / f"sheet-{kind}.parquet")
 
     @classmethod
     def process(cls, df, kind="student"):
@@ -260,13 +330,10 @@ class SchoolSurvey(Dataset):
             out.append(extract)
         out = pd.concat(out)
 
-        # Load geometries for schools and merge them in
-        schools = Schools.get(fresh=True)[
-            ["ULCS Code", "Governance", "School Level", "geometry"]
-        ]
-        for a in [schools, out]:
-            a["ULCS Code"] = a["ULCS Code"].astype(str)
-        return schools.merge(out, on="ULCS Code")
+        # Merge in geometries for schools
+        return _join_schools(
+            out, "ULCS Code", ["ULCS Code", "Governance", "School Level", "geometry"]
+        )
 
 
 class GraduationRates(Dataset):
@@ -287,22 +354,28 @@ class GraduationRates(Dataset):
    
     """
 
+    host = "cdn.philasd.org"
+    dependencies = ["Schools"]
+
     @classmethod
-    def download(cls, **kwargs):
+    def fetch(cls, rawdir, **kwargs):
 
-        # Load the raw data
         url = (
             "https://cdn.philasd.org/offices/performance/Open_Data/School_Performance/Graduation_Rates/"
             "FT9%20SY2014-15%20Grad%20Rates%20Suppressed.csv"
         )
+        download_file(url, rawdir / "data.csv")
 
-        df = pd.read_csv(url).rename(columns={"srcschoolid": "SRC School ID"})
-        df["SRC School ID"] = df["SRC School ID"].astype(str)
+    @classmethod
+    def transform(cls, rawdir, **kwargs):
 
-        # Load geometries for schools and merge them in
-        schools = Schools.get(fresh=True)[
-            ["ULCS Code", "SRC School ID", "Governance", "School Level", "geometry"]
-        ]
-        schools["SRC School ID"] = schools["SRC School ID"].astype(str)
-        return schools.merge(df, on="SRC School ID")
+        # Load the raw data
+        df = pd.read_csv(rawdir / "data.csv").rename(columns={"srcschoolid": "SRC School ID"})
+
+        # Merge in geometries for schools
+        return _join_schools(
+            df,
+            "SRC School ID",
+            ["ULCS Code", "SRC School ID", "Governance", "School Level", "geometry"],
+        )
 
@@ -1,8 +1,9 @@
 import esri2gpd
 import geopandas as gpd
 from . import EPSG
-from .core import Dataset, geocode
+from .core import Dataset, geocode_many
 from .regions import *
+from .raw import download_file
 
 __all__ = ["RegionalRail", "SubwayBroadSt", "SubwayMFL", "Bus"]
 
@@ -18,18 +19,20 @@ class RegionalRail(Dataset):
     http://septaopendata-septa.opendata.arcgis.com/datasets/septa-regional-rail-lines
     """
 
+    host = "opendata.arcgis.com"
+
     @classmethod
-    def download(cls, **kwargs):
+    def fetch(cls, rawdir, **kwargs):
 
         url = "https://opendata.arcgis.com/datasets/48b0b600abaa4ca1a1bacf917a31c29a_0.zip"
-        df = gpd.read_file(url)
+        return download_file(url, rawdir / "data.zip", conditional=True)
+
+    @classmethod
+    def transform(cls, rawdir, **kwargs):
 
-        return (
-            df.to_crs(epsg=EPSG)
-            .pipe(geocode, ZIPCodes.get())
-            .pipe(geocode, Neighborhoods.get())
-            .pipe(geocode, PUMAs.get())
-        )
+        df = gpd.read_file(f"zip://{rawdir / 'data.zip'}")
+
+        return df.to_crs(epsg=EPSG).pipe(geocode_many)
 
 
 class SubwayBroadSt(Dataset):
@@ -43,18 +46,20 @@ class SubwayBroadSt(Dataset):
     http://septaopendata-septa.opendata.arcgis.com/datasets/septa-broad-street-line
     """
 
+    host = "opendata.arcgis.com"
+
     @classmethod
-    def download(cls, **kwargs):
+    def fetch(cls, rawdir, **kwargs):
 
         url = "https://opendata.arcgis.com/datasets/c051c18bb15444b6861a93fd247dde3d_0.zip"
-        df = gpd.read_file(url)
+        return download_file(url, rawdir / "data.zip", conditional=True)
 
-        return (
-            df.to_crs(epsg=EPSG)
-            .pipe(geocode, ZIPCodes.get())
-            .pipe(geocode, Neighborhoods.get())
-            .pipe(geocode, PUMAs.get())
-        )
+    @classmethod
+    def transform(cls, rawdir, **kwargs):
+
+        df = gpd.read_file(f"zip://{rawdir / 'data.zip'}")
+
+        return df.to_crs(epsg=EPSG).pipe(geocode_many)
 
 
 class SubwayMFL(Dataset):
@@ -68,18 +73,20 @@ class SubwayMFL(Dataset):
     http://septaopendata-septa.opendata.arcgis.com/datasets/septa-market-franford-line
     """
 
+    host = "opendata.arcgis.com"
+
     @classmethod
-    def download(cls, **kwargs):
+    def fetch(cls, rawdir, **kwargs):
 
         url = "https://opendata.arcgis.com/datasets/6f4ae63a492c407eb95a9e56a6750e7f_0.zip"
-        df = gpd.read_file(url)
+        return download_file(url, rawdir / "data.zip", conditional=True)
 
-        return (
-            df.to_crs(epsg=EPSG)
-            .pipe(geocode, ZIPCodes.get())
-            .pipe(geocode, Neighborhoods.get())
-            .pipe(geocode, PUMAs.get())
-        )
+    @classmethod
+    def transform(cls, rawdir, **kwargs):
+
+        df = gpd.read_file(f"zip://{rawdir / 'data.zip'}")
+
+        return df.to_crs(epsg=EPSG).pipe(geocode_many)
 
 
 class Bus(Dataset):
@@ -93,16 +100,18 @@ class Bus(Dataset):
     http://septaopendata-septa.opendata.arcgis.com/datasets/septa-bus-stops
     """
 
+    host = "opendata.arcgis.com"
+
     @classmethod
-    def download(cls, **kwargs):
+    def fetch(cls, rawdir, **kwargs):
 
         url = "https://opendata.arcgis.com/datasets/5c063cd7037547659905ab1761db469e_0.zip"
-        df = gpd.read_file(url)
-
-        return (
-            df.to_crs(epsg=EPSG)
-            .pipe(geocode, ZIPCodes.get())
-            .pipe(geocode, Neighborhoods.get())
-            .pipe(geocode, PUMAs.get())
-        )
+        return download_file(url, rawdir / "data.zip", conditional=True)
+
+    @classmethod
+    def transform(cls, rawdir, **kwargs):
+
+        df = gpd.read_file(f"zip://{rawdir / 'data.zip'}")
+
+        return df.to_crs(epsg=EPSG).pipe(geocode_many)
 
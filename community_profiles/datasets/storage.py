@@ -0,0 +1,853 @@
+import json
+import time
+from datetime import datetime
+import pandas as pd
+import geopandas as gpd
+from . import EPSG
+from .. import data_dir
+from .locks import FileLock, atomic_path
+
+__all__ = [
+    "STORAGE_FORMATS",
+    "CSVStorage",
+    "ParquetStorage",
+    "FeatherStorage",
+    "apply_filters",
+    "migrate_cache",
+    "benchmark_storage",
+]
+
+STORAGE_FORMATS = {}
+
+
+class Storage:
+    """
+    Base class representing the on-disk format of a cached dataset.
+
+    Subclasses should define the `write` and `read` functions, and the
+    name of the file holding the data within a dataset's folder.
+
+    Parameters
+    ----------
+    name : str
+        the name used to select the format, e.g., `"csv"` or `"parquet"`
+    filename : str
+        the name of the data file within the dataset directory
+    """
+
+    name = None
+    filename = None
+
+    def __init_subclass__(cls, **kwargs):
+        """
+        Register subclasses of this class in the `STORAGE_FORMATS` dict.
+        """
+        if cls.name is not None:
+            STORAGE_FORMATS[cls.name] = cls
+        super().__init_subclass__(**kwargs)
+
+    @classmethod
+    def write(cls, data, path):
+        """
+        Write the input data frame to the specified path.
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def read(cls, path, mmap=False, columns=None, filters=None, schema=None):
+        """
+        Read the data frame stored at the specified path.
+
+        Geometries are returned as shapely objects in the "geometry"
+        column, if present. If `mmap` is True, formats that support it
+        open the file with memory mapping.
+
+        Parameters
+        ----------
+        path : Path
+            the path of the data file
+        mmap : bool, optional
+            whether to memory map the file, if supported
+        columns : list of str, optional
+            only read these columns; other columns are never parsed
+        filters : list of tuple, optional
+            row filters, given as `(column, op, value)` tuples that are
+            combined with AND, or a list of such lists combined with OR;
+            see :func:`apply_filters`
+        schema : Schema, optional
+            the declared column types, used by text formats to skip
+            type inference
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def iter_read(cls, path, chunksize, columns=None, filters=None, schema=None):
+        """
+        Iterate over the data stored at the specified path in chunks of
+        at most `chunksize` rows, without loading the full file.
+
+        The `columns`, `filters`, and `schema` keywords are the same as
+        for `read()`.
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def read_table(cls, path, mmap=False, columns=None, filters=None):
+        """
+        Read the data stored at the specified path as a pyarrow Table,
+        with geometries left encoded, for formats backed by Arrow.
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def read_many(
+        cls,
+        paths,
+        mmap=False,
+        columns=None,
+        filters=None,
+        schema=None,
+        partition=None,
+        max_workers=None,
+    ):
+        """
+        Read several files in this format, e.g., the yearly partitions of
+        a dataset, in parallel, and combine them into one data frame.
+
+        Formats backed by Arrow combine the files as Arrow tables and
+        convert the result to a data frame once, so no intermediate
+        data frames are created.
+
+        Parameters
+        ----------
+        paths : list of Path
+            the paths of the data files
+        partition : tuple, optional
+            a `(column, values)` pair; if the column is not stored in the
+            files, it is added with the value for each file. Filters on
+            the column are checked against the value of each file, and
+            files that cannot match are skipped.
+        max_workers : int, optional
+            the maximum number of files read at the same time
+
+        The `mmap`, `columns`, `filters`, and `schema` keywords are the
+        same as for `read()`.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        # the partition column is taken from the partition values, so it
+        # is neither read from the files nor filtered on
+        readcols, file_filters = columns, [filters] * len(paths)
+        if partition is not None:
+            if columns is not None:
+                readcols = [col for col in columns if col != partition[0]]
+            file_filters = [
+                _partition_filters(filters, partition[0], value)
+                for value in partition[1]
+            ]
+        indices = [i for i in range(len(paths)) if file_filters[i] != []]
+
+        if not len(indices):
+            return pd.DataFrame(columns=columns or [])
+
+        if cls.read_table.__func__ is not Storage.read_table.__func__:
+            import pyarrow as pa
+
+            def read(i):
+                table = cls.read_table(
+                    paths[i], mmap=mmap, columns=readcols, filters=file_filters[i]
+                )
+                table = _add_partition(table, partition, i, columns)
+                return table.select(list(columns)) if columns is not None else table
+
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                tables = list(pool.map(read, indices))
+
+            # years cached separately may have different integer widths
+            try:
+                table = _concat_tables(tables)
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+                pass
+            else:
+                return _from_table(table)
+            frames = [_from_table(table) for table in tables]
+
+        else:
+
+            def read(i):
+                data = cls.read(
+                    paths[i],
+                    mmap=mmap,
+                    columns=readcols,
+                    filters=file_filters[i],
+                    schema=schema,
+                )
+                if partition is not None and partition[0] not in data.columns:
+                    if columns is None or partition[0] in columns:
+                        data[partition[0]] = partition[1][i]
+                return data[list(columns)] if columns is not None else data
+
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                frames = list(pool.map(read, indices))
+
+        # categories that differ between files are restored after combining
+        data = pd.concat(frames, ignore_index=True, sort=False)
+        return schema.enforce(data) if schema is not None else data
+
+
+def _add_partition(table, partition, i, columns):
+    """
+    Internal function to add the partition column to the input pyarrow
+    Table, if it is not stored in the file and was requested.
+    """
+    import pyarrow as pa
+
+    if partition is None or partition[0] in table.column_names:
+        return table
+    if columns is not None and partition[0] not in columns:
+        return table
+    value = partition[1][i]
+    return table.append_column(partition[0], pa.array([value] * len(table)))
+
+
+class CSVStorage(Storage):
+    """
+    Plain text storage, with geometries serialized as WKT strings.
+
+    The WKT is kept so the files remain human-readable, but it is
+    decoded in bulk rather than one row at a time.
+    """
+
+    name = "csv"
+    filename = "data.csv"
+
+    @classmethod
+    def write(cls, data, path):
+        data.to_csv(path, index=False)
+
+    @classmethod
+    def read(cls, path, mmap=False, columns=None, filters=None, schema=None):
+        usecols = _usecols(columns, filters)
+        data = pd.read_csv(
+            path, low_memory=False, usecols=usecols, dtype=_dtypes(schema, usecols)
+        )
+        return cls._process(data, columns, filters, schema).reset_index(drop=True)
+
+    @classmethod
+    def iter_read(cls, path, chunksize, columns=None, filters=None, schema=None):
+        usecols = _usecols(columns, filters)
+        reader = pd.read_csv(
+            path, chunksize=chunksize, usecols=usecols, dtype=_dtypes(schema, usecols)
+        )
+        for chunk in reader:
+            yield cls._process(chunk, columns, filters, schema)
+
+    @classmethod
+    def _process(cls, data, columns, filters, schema):
+        """
+        Internal function to apply the schema, filter, and select the
+        columns of the parsed CSV data, and then decode the geometries.
+        """
+        if schema is not None:
+            data = schema.enforce(data)
+        if filters:
+            data = apply_filters(data, filters)
+        if columns is not None:
+            data = data[list(columns)]
+
+        if "geometry" in data.columns:
+            wkt = data["geometry"].astype(object)
+            data["geometry"] = gpd.GeoSeries.from_wkt(
+                wkt.where(wkt.notnull(), None), index=data.index
+            )
+        return data
+
+
+def _dtypes(schema, usecols):
+    """
+    Internal function to return the declared CSV column dtypes, if any.
+    """
+    if schema is None:
+        return None
+    return schema.read_dtypes(usecols) or None
+
+
+def _usecols(columns, filters):
+    """
+    Internal function to return the CSV columns that need to be parsed:
+    the requested columns and those needed to filter.
+    """
+    if columns is None:
+        return None
+    return list(columns) + [
+        col for col in _filter_columns(filters) if col not in columns
+    ]
+
+
+class ParquetStorage(Storage):
+    """
+    Columnar storage in the GeoParquet format.
+
+    Geometries are stored as WKB, or as native x/y coordinates for
+    point layers, and datetime and categorical columns retain their
+    native dtypes, so no parsing is needed on load.
+    """
+
+    name = "parquet"
+    filename = "data.parquet"
+
+    @classmethod
+    def write(cls, data, path):
+        import pyarrow.parquet as pq
+
+        pq.write_table(_to_table(data), path)
+
+    @classmethod
+    def read(cls, path, mmap=False, columns=None, filters=None, schema=None):
+        return _from_table(cls.read_table(path, mmap, columns, filters))
+
+    @classmethod
+    def read_table(cls, path, mmap=False, columns=None, filters=None):
+        import pyarrow.parquet as pq
+
+        return pq.read_table(
+            path,
+            columns=columns,
+            filters=_normalize_filters(filters),
+            memory_map=mmap,
+        )
+
+    @classmethod
+    def iter_read(cls, path, chunksize, columns=None, filters=None, schema=None):
+        import pyarrow.parquet as pq
+
+        source = pq.ParquetFile(path)
+        readcols = _usecols(columns, filters)
+        for batch in source.iter_batches(batch_size=chunksize, columns=readcols):
+            yield _from_batch(batch, source.schema_arrow.metadata, columns, filters)
+
+
+class FeatherStorage(Storage):
+    """
+    Uncompressed Arrow IPC (Feather v2) storage.
+
+    The file layout matches Arrow's in-memory layout, so it can be
+    memory mapped and read without a parse step. The mapped file is still
+    converted to a data frame, which copies the columns and decodes the
+    geometries into the memory of each process; mapping only saves
+    reading and parsing the file.
+    """
+
+    name = "feather"
+    filename = "data.arrow"
+
+    @classmethod
+    def write(cls, data, path):
+        import pyarrow.feather as feather
+
+        feather.write_feather(_to_table(data), str(path), compression="uncompressed")
+
+    @classmethod
+    def read(cls, path, mmap=False, columns=None, filters=None, schema=None):
+        return _from_table(cls.read_table(path, mmap, columns, filters))
+
+    @classmethod
+    def read_table(cls, path, mmap=False, columns=None, filters=None):
+        import pyarrow as pa
+
+        source = pa.memory_map(str(path)) if mmap else pa.OSFile(str(path))
+        with source:
+            table = pa.ipc.open_file(source).read_all()
+
+        return _select(table, columns, filters)
+
+    @classmethod
+    def iter_read(cls, path, chunksize, columns=None, filters=None, schema=None):
+        import pyarrow as pa
+
+        # mapping the file means only the current chunk is paged in
+        with pa.memory_map(str(path)) as source:
+            table = pa.ipc.open_file(source).read_all()
+            for batch in table.to_batches(max_chunksize=chunksize):
+                yield _from_batch(batch, table.schema.metadata, columns, filters)
+
+
+def _concat_tables(tables):
+    """
+    Internal function to combine pyarrow Tables, promoting columns with
+    different types to a common type.
+    """
+    import pyarrow as pa
+
+    try:
+        return pa.concat_tables(tables, promote_options="permissive")
+    except TypeError:
+        # pyarrow < 14 can only fill in missing columns
+        return pa.concat_tables(tables, promote=True)
+
+
+def _select(table, columns, filters):
+    """
+    Internal function to filter the rows and select the columns of a
+    pyarrow Table.
+    """
+    import pyarrow.parquet as pq
+
+    # filter before selecting, since filters may use other columns
+    if filters:
+        table = table.filter(pq.filters_to_expression(_normalize_filters(filters)))
+    if columns is not None:
+        table = table.select(list(columns))
+    return table
+
+
+def _from_batch(batch, metadata, columns, filters):
+    """
+    Internal function to convert a pyarrow RecordBatch to a data frame,
+    using the file-level schema metadata.
+    """
+    import pyarrow as pa
+
+    table = pa.Table.from_batches([batch]).replace_schema_metadata(metadata)
+    return _from_table(_select(table, columns, filters))
+
+
+def _normalize_filters(filters):
+    """
+    Internal function to convert filter values to types that pyarrow
+    can compare against the stored columns.
+    """
+    if not filters:
+        return None
+    if isinstance(filters[0], tuple):
+        filters = [filters]
+
+    def convert(value):
+        if isinstance(value, (list, tuple, set)):
+            return [convert(v) for v in value]
+        if isinstance(value, pd.Timestamp):
+            return value.to_pydatetime()
+        return value
+
+    return [
+        [(col, op, convert(value)) for col, op, value in group] for group in filters
+    ]
+
+
+def _filter_columns(filters):
+    """
+    Internal function to return the names of the columns used in the
+    input filters.
+    """
+    names = []
+    for group in _normalize_filters(filters) or []:
+        for col, op, value in group:
+            if col not in names:
+                names.append(col)
+    return names
+
+
+def apply_filters(data, filters):
+    """
+    Apply row filters to a data frame in memory.
+
+    This is used by storage formats that cannot push filters down to
+    the file reader.
+
+    Parameters
+    ----------
+    data : DataFrame
+        the data to filter
+    filters : list of tuple
+        a list of `(column, op, value)` tuples, combined with AND, or a
+        list of such lists, combined with OR; `op` is one of "==", "=",
+        "!=", "<", "<=", ">", ">=", "in", or "not in"
+
+    Returns
+    -------
+    data : DataFrame
+        the rows of the input data that pass the filters
+    """
+    import numpy as np
+    from pandas.api.types import is_datetime64_any_dtype
+
+    mask = np.zeros(len(data), dtype=bool)
+    for group in _normalize_filters(filters):
+        group_mask = np.ones(len(data), dtype=bool)
+        for col, op, value in group:
+            values = data[col]
+
+            # compare datetimes stored as text
+            if isinstance(value, datetime) and not is_datetime64_any_dtype(values):
+                values = pd.to_datetime(values)
+            if op in ["in", "not in"]:
+                match = values.isin(value)
+                if op == "not in":
+                    match = ~match
+            elif op in ["=", "=="]:
+                match = values == value
+            elif op == "!=":
+                match = values != value
+            elif op == "<":
+                match = values < value
+            elif op == "<=":
+                match = values <= value
+            elif op == ">":
+                match = values > value
+            elif op == ">=":
+                match = values >= value
+            else:
+                raise ValueError(f"Unknown filter operation '{op}'")
+            group_mask &= np.asarray(match, dtype=bool)
+        mask |= group_mask
+
+    return data.loc[mask]
+
+
+def partition_matches(filters, column, value):
+    """
+    Return whether rows of a partition, in which the input column has
+    the input value, can pass the input filters.
+
+    Only the filters on the partition column are checked, so partitions
+    that cannot match are skipped without being read.
+    """
+    return _partition_filters(filters, column, value) != []
+
+
+def _partition_filters(filters, column, value):
+    """
+    Internal function to return the filters to read a partition with,
+    in which the input column has the input value: the filters on the
+    column are checked against the value and removed.
+
+    Returns None if all rows of the partition pass, or an empty list if
+    none can.
+    """
+    filters = _normalize_filters(filters)
+    if not filters:
+        return None
+
+    row = pd.DataFrame({column: [value]})
+    resolved = []
+    for group in filters:
+        checks = [f for f in group if f[0] == column]
+        if checks and not len(apply_filters(row, checks)):
+            continue
+        rest = [f for f in group if f[0] != column]
+        if not rest:
+            return None
+        resolved.append(rest)
+    return resolved
+
+
+def _to_table(data):
+    """
+    Internal function to convert a data frame to a pyarrow Table, with
+    the geometry column encoded in binary form.
+    """
+    import pyarrow as pa
+
+    data = pd.DataFrame(data)
+    if "geometry" not in data.columns:
+        return pa.Table.from_pandas(data, preserve_index=False)
+
+    # encode the geometry column separately
+    geometry = _as_geoseries(data["geometry"])
+    position = list(data.columns).index("geometry")
+    meta = _geo_metadata(geometry)
+    encoded = encode_geometry(geometry, meta["columns"]["geometry"]["encoding"])
+
+    # a table without any columns has no rows, so start from the geometry
+    others = data.drop(labels=["geometry"], axis=1)
+    if len(others.columns):
+        table = pa.Table.from_pandas(others, preserve_index=False)
+        table = table.add_column(position, "geometry", encoded)
+    else:
+        table = pa.table({"geometry": encoded})
+
+    metadata = {**(table.schema.metadata or {}), b"geo": json.dumps(meta).encode()}
+    return table.replace_schema_metadata(metadata)
+
+
+def _from_table(table):
+    """
+    Internal function to convert a pyarrow Table to a data frame,
+    decoding the geometry column in bulk.
+    """
+    if "geometry" not in table.column_names:
+        return table.to_pandas()
+
+    meta = json.loads(table.schema.metadata[b"geo"])
+    encoding = meta["columns"]["geometry"]["encoding"]
+
+    position = table.column_names.index("geometry")
+    geometry = table.column("geometry")
+    data = table.drop(["geometry"]).to_pandas()
+    data.insert(position, "geometry", decode_geometry(geometry, encoding, data.index))
+    return data
+
+
+def encode_geometry(geometry, encoding="WKB"):
+    """
+    Encode a GeoSeries as a pyarrow array.
+
+    Parameters
+    ----------
+    geometry : GeoSeries
+        the geometries to encode
+    encoding : str, optional
+        either "WKB" for well-known binary, or "point" to store
+        point geometries as a struct of x/y coordinates
+
+    Returns
+    -------
+    array : pyarrow.Array
+        the encoded geometries; for points, missing or empty values
+        are stored as nulls
+    """
+    import pyarrow as pa
+
+    if encoding == "point":
+        missing = (geometry.isnull() | geometry.is_empty).to_numpy()
+        x = pa.array(geometry.x.to_numpy(), type=pa.float64())
+        y = pa.array(geometry.y.to_numpy(), type=pa.float64())
+        return pa.StructArray.from_arrays(
+            [x, y], names=["x", "y"], mask=pa.array(missing)
+        )
+
+    return pa.array(geometry.to_wkb().to_numpy(), type=pa.binary())
+
+
+def decode_geometry(column, encoding="WKB", index=None):
+    """
+    Decode a pyarrow array of encoded geometries into a GeoSeries.
+
+    This is the inverse of :func:`encode_geometry`; all values are
+    decoded in a single vectorized operation.
+    """
+    import pyarrow as pa
+    from shapely.geometry import Point
+
+    if isinstance(column, pa.ChunkedArray):
+        column = column.combine_chunks()
+
+    if encoding == "point":
+        x = column.field("x").to_numpy(zero_copy_only=False)
+        y = column.field("y").to_numpy(zero_copy_only=False)
+        geometry = gpd.GeoSeries(gpd.points_from_xy(x, y), index=index)
+
+        # empty points are stored as nulls
+        missing = column.is_null().to_numpy(zero_copy_only=False)
+        if missing.any():
+            geometry[missing] = Point()
+        return geometry
+
+    return gpd.GeoSeries.from_wkb(column.to_numpy(zero_copy_only=False), index=index)
+
+
+def _as_geoseries(values):
+    """
+    Internal function to convert a column of geometries, which may
+    be WKT strings, into a GeoSeries.
+    """
+    if isinstance(values, gpd.GeoSeries):
+        return values
+    if values.map(lambda x: isinstance(x, str)).any():
+        return gpd.GeoSeries.from_wkt(values.fillna("GEOMETRYCOLLECTION EMPTY"))
+    return gpd.GeoSeries(values)
+
+
+def _geo_metadata(geometry):
+    """
+    Internal function to build the GeoParquet file metadata for the
+    input GeoSeries.
+    """
+    from pyproj import CRS
+
+    crs = CRS.from_epsg(EPSG)
+    if geometry.crs is not None:
+        crs = CRS.from_user_input(geometry.crs)
+
+    types = sorted(geometry.dropna().loc[~geometry.is_empty].geom_type.unique())
+    column = {
+        "encoding": "point" if types == ["Point"] else "WKB",
+        "geometry_types": types,
+        "crs": crs.to_json_dict(),
+    }
+    if len(geometry) and not geometry.is_empty.all():
+        column["bbox"] = list(map(float, geometry.total_bounds))
+
+    return {
+        "version": "1.1.0",
+        "primary_column": "geometry",
+        "columns": {"geometry": column},
+    }
+
+
+def _iter_cache_dirs(names=None):
+    """
+    Internal function to yield (dataset class, directory) pairs for
+    every cached dataset in the data directory.
+    """
+    from .core import DATASETS
+
+    for name, cls in DATASETS.items():
+        if names is not None and name not in names:
+            continue
+        top = data_dir / name
+        if not top.exists():
+            continue
+        for path in sorted(top.glob("**/meta.json")):
+            yield cls, path.parent
+
+
+def _cache_kwargs(cls, dirname):
+    """
+    Internal function to return the keywords a cached dataset was loaded
+    with, e.g., `{"year": 2019}` for "CrimeIncidents/2019", or None if
+    they cannot be recovered.
+
+    The keywords are read from the meta-data or the catalog entry of the
+    cache; caches written before either recorded them are matched to the
+    keyword arguments of `get_path()` by their directory layout. Only
+    keywords that lead back to the input directory are returned.
+    """
+    import inspect
+    from .catalog import catalog_entry
+
+    with (dirname / "meta.json").open(mode="r") as f:
+        candidates = [json.load(f).get("kwargs")]
+    candidates.append((catalog_entry(dirname) or {}).get("kwargs"))
+
+    # the keyword arguments of get_path(), in the order of the subfolders
+    parameters = [
+        p
+        for p in inspect.signature(cls.get_path).parameters.values()
+        if p.default is not inspect.Parameter.empty
+    ]
+    parts = dirname.relative_to(data_dir / cls.__name__).parts
+    if len(parts) == len(parameters):
+        candidates.append(
+            {
+                p.name: type(p.default)(part) if isinstance(p.default, int) else part
+                for p, part in zip(parameters, parts)
+            }
+        )
+
+    for kwargs in candidates:
+        if kwargs is not None and cls.get_path(**kwargs) == dirname:
+            return kwargs
+    return None
+
+
+def migrate_cache(format=None, names=None, remove=False):
+    """
+    Convert existing cached datasets to the specified storage format.
+
+    This is a one-time migration of the legacy CSV caches in the data
+    directory; datasets already stored in the requested format are
+    skipped. The catalog and the meta-data of each converted dataset are
+    updated to point to the new files.
+
+    Parameters
+    ----------
+    format : str, optional
+        the target storage format; defaults to the global `STORAGE_FORMAT`
+    names : list of str, optional
+        only migrate these datasets; default is all cached datasets
+    remove : bool, optional
+        whether to delete the old CSV files after conversion
+
+    Returns
+    -------
+    migrated : list of Path
+        the directories that were converted
+    """
+    from . import STORAGE_FORMAT
+    from .catalog import update_catalog
+
+    target = STORAGE_FORMATS[format or STORAGE_FORMAT]
+    migrated = []
+    for cls, dirname in _iter_cache_dirs(names):
+        source = dirname / CSVStorage.filename
+        if target is CSVStorage or not source.exists():
+            continue
+        if (dirname / target.filename).exists():
+            continue
+
+        with FileLock(dirname / ".lock"):
+            schema = cls.get_schema()
+            data = schema.enforce(
+                cls._format_data(CSVStorage.read(source, schema=schema))
+            )
+            cls._write(target, data, dirname / target.filename)
+            if remove:
+                source.unlink()
+
+            # record the new file; a removed CSV file is dropped from the
+            # catalog by recording the conversion as the original download
+            kwargs = _cache_kwargs(cls, dirname)
+            with (dirname / "meta.json").open(mode="r") as f:
+                meta = json.load(f)
+            download_time = meta.get("download_time") if remove else None
+            update_catalog(
+                cls.__name__, dirname, kwargs or {}, target, data, download_time
+            )
+
+            meta["storage_format"] = target.name
+            if kwargs is not None:
+                meta["kwargs"] = kwargs
+            with atomic_path(dirname / "meta.json") as path:
+                with path.open(mode="w") as f:
+                    json.dump(meta, f)
+        migrated.append(dirname)
+
+    return migrated
+
+
+def benchmark_storage(cls, formats=None, repeat=3, **kwargs):
+    """
+    Time loading a cached dataset from each of the storage formats.
+
+    Parameters
+    ----------
+    cls : Dataset
+        the dataset class to benchmark
+    formats : list of str, optional
+        the storage formats to compare; default is all registered formats
+    repeat : int, optional
+        the number of loads to time for each format
+    **kwargs :
+        Additional keywords passed to the `get_path()` function
+
+    Returns
+    -------
+    results : DataFrame
+        the best load time (in seconds) and file size (in bytes) per format
+    """
+    import tempfile
+    from pathlib import Path
+
+    data = cls.get(**kwargs)
+    if formats is None:
+        formats = list(STORAGE_FORMATS)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        for name in formats:
+            storage = STORAGE_FORMATS[name]
+            path = Path(tmpdirname) / storage.filename
+            storage.write(data, path)
+
+            timings = []
+            for i in range(repeat):
+                start = time.perf_counter()
+                cls._format_data(storage.read(path, mmap=storage is FeatherStorage))
+                timings.append(time.perf_counter() - start)
+
+            results.append(
+                {"format": name, "seconds": min(timings), "bytes": path.stat().st_size}
+            )
+
+    return pd.DataFrame(results).set_index("format")
@@ -3,6 +3,7 @@ import geopandas as gpd
 from . import EPSG
 from .core import *
 from .regions import *
+from .raw import read_frame, write_frame
 
 
 __all__ = ["StreetDefectRepairRating", "LitterIndex", "PavedMiles"]
@@ -25,18 +26,21 @@ class StreetDefectRepairRating(Dataset):
     http://phl.maps.arcgis.com/home/item.html?id=288d67ea531c4e1a96ebe43a78b97ca8
     """
 
+    host = "services.arcgis.com"
+
     @classmethod
-    def download(cls, **kwargs):
+    def fetch(cls, rawdir, **kwargs):
 
         url = "https://services.arcgis.com/fLeGjb7u4uXqeF9q/arcgis/rest/services/Street_Defect_Rating/FeatureServer/0"
         gdf = esri2gpd.get(url)
+        write_frame(gdf, rawdir / "data.parquet")
 
-        return (
-            gdf.to_crs(epsg=EPSG)
-            .pipe(geocode, ZIPCodes.get())
-            .pipe(geocode, Neighborhoods.get())
-            .pipe(geocode, PUMAs.get())
-        )
+    @classmethod
+    def transform(cls, rawdir, **kwargs):
+
+        gdf = read_frame(rawdir / "data.parquet")
+
+        return gdf.to_crs(epsg=EPSG).pipe(geocode_many)
 
 
 class LitterIndex(Dataset):
@@ -52,16 +56,24 @@ class LitterIndex(Dataset):
     https://www.opendataphilly.org/dataset/litter-index
     """
 
+    host = "services.arcgis.com"
+
     @classmethod
-    def download(cls, **kwargs):
+    def fetch(cls, rawdir, **kwargs):
 
         url = "https://services.arcgis.com/fLeGjb7u4uXqeF9q/arcgis/rest/services/Litter_Index_Blocks/FeatureServer/0"
+        gdf = esri2gpd.get(url)
+        write_frame(gdf, rawdir / "data.parquet")
+
+    @classmethod
+    def transform(cls, rawdir, **kwargs):
+
+        gdf = read_frame(rawdir / "data.parquet")
+
         return (
-            esri2gpd.get(url)
+            gdf
             .to_crs(epsg=EPSG)
-            .pipe(geocode, ZIPCodes.get())
-            .pipe(geocode, Neighborhoods.get())
-            .pipe(geocode, PUMAs.get())
+            .pipe(geocode_many)
         )
 
 
@@ -76,6 +88,8 @@ class PavedMiles(Dataset):
     the "local" and "FAM" networks.
     """
 
+    dependencies = []
+
     @classmethod
     def get_path(cls, level="tract"):
         return data_dir / cls.__name__ / str(level)
@@ -87,7 +101,7 @@ class PavedMiles(Dataset):
         return pd.read_csv(path / "data.csv")
 
     @classmethod
-    def get(cls, fresh=False, level="tract"):
+    def get(cls, fresh=False, level="tract", **kwargs):
         """
         Load the dataset, optionally downloading a fresh copy.
 
@@ -98,9 +112,11 @@ class PavedMiles(Dataset):
             dataset should be downloaded
         leve : str, optional
             the aggregation level, one of 'tract', 'nta', 'puma', or 'city'
+        **kwargs :
+            Additional keywords are passed to `Dataset.get()`
         """
         allowed = ["tract", "nta", "puma", "city"]
         if level not in allowed:
             raise ValueError(f"allowed values for 'level' are: {allowed}")
 
-        return super().get(fresh=fresh, level=level)
+        return super().get(fresh=fresh, level=level, **kwargs)
@@ -1,9 +1,10 @@
-import carto2gpd
 import geopandas as gpd
 import pandas as pd
 from . import EPSG, DEFAULT_YEAR
 from .core import *
 from .regions import *
+from .raw import read_frame, write_frame
+from .carto import get_windowed, year_range
 
 __all__ = ["ServiceRequests311"]
 
@@ -22,24 +23,64 @@ class ServiceRequests311(DatasetWithYear):
     https://www.opendataphilly.org/dataset/311-service-and-information-requests
     """
 
+    host = "phl.carto.com"
     date_columns = ["requested_datetime"]
+    schema = Schema(
+        categories=[
+            "status",
+            "service_name",
+            "service_code",
+            "agency_responsible",
+            *REGION_COLUMNS,
+        ],
+        dates={"requested_datetime": "%Y-%m-%d %H:%M:%S"},
+    )
+
+    table_name = "public_cases_fc"
+    update_column = "requested_datetime"
+    unique_key = "service_request_id"
+    fields = [
+        "service_request_id",
+        "status",
+        "service_name",
+        "service_code",
+        "agency_responsible",
+        "requested_datetime",
+        "updated_datetime",
+        "closed_datetime",
+        "address",
+    ]
+    extra_fields = [
+        "status_notes",
+        "service_notice",
+        "subject",
+        "expected_datetime",
+        "zipcode",
+        "media_url",
+        "lat",
+        "lon",
+    ]
 
     @classmethod
-    def download(cls, year=DEFAULT_YEAR):
+    def fetch(cls, rawdir, year=DEFAULT_YEAR, since=None, fields=None):
 
-        url = "https://phl.carto.com/api/v2/sql"
-        gdf = carto2gpd.get(
-            url,
-            "public_cases_fc",
-            where=f"extract(year from requested_datetime) = {year}",
+        gdf = get_windowed(
+            cls.table_name,
+            "requested_datetime",
+            *year_range(year, since),
+            fields=fields,
         )
+        write_frame(gdf, rawdir / "data.parquet")
+
+    @classmethod
+    def transform(cls, rawdir, year=DEFAULT_YEAR):
+
+        gdf = read_frame(rawdir / "data.parquet")
 
         return (
             replace_missing_geometries(gdf)
             .to_crs(epsg=EPSG)
-            .pipe(geocode, ZIPCodes.get())
-            .pipe(geocode, Neighborhoods.get())
-            .pipe(geocode, PUMAs.get())
+            .pipe(geocode_many)
             .assign(
                 requested_datetime=lambda df: pd.to_datetime(df.requested_datetime),
                 year=lambda df: df.requested_datetime.dt.year,
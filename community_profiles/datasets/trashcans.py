@@ -2,8 +2,9 @@ import carto2gpd
 import esri2gpd
 import geopandas as gpd
 from . import EPSG
-from .core import Dataset, geocode, replace_missing_geometries
+from .core import Dataset, geocode_many, replace_missing_geometries
 from .regions import *
+from .raw import read_frame, write_frame
 
 __all__ = [
     "BigBelly",
@@ -19,19 +20,22 @@ class BigBelly(Dataset):
     ------
     https://www.opendataphilly.org/dataset/big-belly-waste-bins
     """
+
+    host = "phl.carto.com"
     
     @classmethod
-    def download(cls, **kwargs):
+    def fetch(cls, rawdir, **kwargs):
 
         url = "https://phl.carto.com/api/v2/sql"
         gdf = carto2gpd.get(url, "wastebaskets_big_belly")  
+        write_frame(gdf, rawdir / "data.parquet")
 
-        return (
-            gdf.to_crs(epsg=EPSG) 
-            .pipe(geocode, ZIPCodes.get())
-            .pipe(geocode, Neighborhoods.get())
-            .pipe(geocode, PUMAs.get())
-        )
+    @classmethod
+    def transform(cls, rawdir, **kwargs):
+
+        gdf = read_frame(rawdir / "data.parquet")
+
+        return gdf.to_crs(epsg=EPSG).pipe(geocode_many)
     
     
     
@@ -43,19 +47,25 @@ class WireWasteBasket(Dataset):
     ------
     https://www.opendataphilly.org/dataset/wire-waste-baskets
     """
+
+    host = "services.arcgis.com"
     
 
     @classmethod
-    def download(cls, **kwargs):
+    def fetch(cls, rawdir, **kwargs):
 
         url = "https://services.arcgis.com/fLeGjb7u4uXqeF9q/arcgis/rest/services/WasteBaskets_Wire/FeatureServer/0"
         gdf = esri2gpd.get(url)
-        
+        write_frame(gdf, rawdir / "data.parquet")
+
+    @classmethod
+    def transform(cls, rawdir, **kwargs):
+
+        gdf = read_frame(rawdir / "data.parquet")
+
         return ( 
              gdf.to_crs(epsg=EPSG)
-            .pipe(geocode, ZIPCodes.get())
-            .pipe(geocode, Neighborhoods.get())
-            .pipe(geocode, PUMAs.get())
+            .pipe(geocode_many)
         )
     
 
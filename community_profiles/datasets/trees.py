@@ -1,8 +1,9 @@
-import carto2gpd
 import geopandas as gpd
 from . import EPSG
-from .core import Dataset, geocode, replace_missing_geometries
+from .core import Dataset, geocode_many, replace_missing_geometries
 from .regions import *
+from .raw import download_file, read_frame
+from .carto import get_paged
 
 __all__ = ["StreetTrees", "TreeCanopyPoints"]
 
@@ -17,18 +18,20 @@ class StreetTrees(Dataset):
     https://www.opendataphilly.org/dataset/philadelphia-street-tree-inventory
     """
 
+    host = "opendata.arcgis.com"
+
     @classmethod
-    def download(cls, **kwargs):
+    def fetch(cls, rawdir, **kwargs):
 
         url = "http://data.phl.opendata.arcgis.com/datasets/957f032f9c874327a1ad800abd887d17_0.zip"
-        df = gpd.read_file(url)
+        return download_file(url, rawdir / "data.zip", conditional=True)
+
+    @classmethod
+    def transform(cls, rawdir, **kwargs):
+
+        df = gpd.read_file(f"zip://{rawdir / 'data.zip'}")
 
-        return (
-            df.to_crs(epsg=EPSG)
-            .pipe(geocode, ZIPCodes.get())
-            .pipe(geocode, Neighborhoods.get())
-            .pipe(geocode, PUMAs.get())
-        )
+        return df.to_crs(epsg=EPSG).pipe(geocode_many)
 
 
 class TreeCanopyPoints(Dataset):
@@ -42,16 +45,21 @@ class TreeCanopyPoints(Dataset):
     https://www.opendataphilly.org/dataset/ppr-tree-canopy
     """
 
+    host = "phl.carto.com"
+    dependencies = ["ZIPCodes", "Neighborhoods", "PUMAs", "CityLimits"]
+    table_name = "ppr_tree_canopy_points_2015"
+
+    @classmethod
+    def fetch(cls, rawdir, **kwargs):
+
+        # large table: download in resumable pages
+        get_paged(cls.table_name, rawdir / "pages")
+
     @classmethod
-    def download(cls, **kwargs):
+    def transform(cls, rawdir, **kwargs):
 
-        url = "https://phl.carto.com/api/v2/sql"
-        gdf = carto2gpd.get(url, "ppr_tree_canopy_points_2015")
+        gdf = read_frame(rawdir / "pages")
 
-        return (
-            gdf.to_crs(epsg=EPSG)
-            .pipe(geocode, ZIPCodes.get())
-            .pipe(geocode, Neighborhoods.get())
-            .pipe(geocode, PUMAs.get())
-        )
+        # millions of points: use the grid index of each region layer
+        return gdf.to_crs(epsg=EPSG).pipe(geocode_many, grid=100)
 
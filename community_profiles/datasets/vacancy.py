@@ -2,6 +2,7 @@ import esri2gpd
 from . import EPSG
 from .core import *
 from .regions import *
+from .raw import read_frame, write_frame
 
 __all__ = ["VacantLand", "VacantBuildings"]
 
@@ -21,17 +22,24 @@ class VacantLand(Dataset):
     https://www.opendataphilly.org/dataset/vacant-property-indicators
     """
 
+    host = "services.arcgis.com"
+
     @classmethod
-    def download(cls, **kwargs):
+    def fetch(cls, rawdir, **kwargs):
 
         url = "https://services.arcgis.com/fLeGjb7u4uXqeF9q/arcgis/rest/services/Vacant_Indicators_Land/FeatureServer/0"
+        gdf = esri2gpd.get(url)
+        write_frame(gdf, rawdir / "data.parquet")
+
+    @classmethod
+    def transform(cls, rawdir, **kwargs):
+
+        gdf = read_frame(rawdir / "data.parquet")
 
         return (
-            esri2gpd.get(url)
+            gdf
             .to_crs(epsg=EPSG)
-            .pipe(geocode, ZIPCodes.get())
-            .pipe(geocode, Neighborhoods.get())
-            .pipe(geocode, PUMAs.get())
+            .pipe(geocode_many)
         )
 
 
@@ -50,16 +58,19 @@ class VacantBuildings(Dataset):
     https://www.opendataphilly.org/dataset/vacant-property-indicators
     """
 
+    host = "services.arcgis.com"
+
     @classmethod
-    def download(cls, **kwargs):
+    def fetch(cls, rawdir, **kwargs):
 
         url = "https://services.arcgis.com/fLeGjb7u4uXqeF9q/arcgis/rest/services/Vacant_Indicators_Bldg/FeatureServer/0"
         gdf = esri2gpd.get(url)
+        write_frame(gdf, rawdir / "data.parquet")
 
-        return (
-            gdf.to_crs(epsg=EPSG)
-            .pipe(geocode, ZIPCodes.get())
-            .pipe(geocode, Neighborhoods.get())
-            .pipe(geocode, PUMAs.get())
-        )
+    @classmethod
+    def transform(cls, rawdir, **kwargs):
+
+        gdf = read_frame(rawdir / "data.parquet")
+
+        return gdf.to_crs(epsg=EPSG).pipe(geocode_many)
 
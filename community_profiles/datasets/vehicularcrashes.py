@@ -1,8 +1,9 @@
-import carto2gpd
 import geopandas as gpd
 from . import EPSG
-from .core import Dataset, geocode, replace_missing_geometries
+from .core import Dataset, geocode_many, replace_missing_geometries
 from .regions import *
+from .raw import read_frame
+from .carto import get_paged
 
 __all__ = ["VehicularCrashes"]
 
@@ -16,16 +17,19 @@ class VehicularCrashes(Dataset):
     https://www.opendataphilly.org/dataset/vehicular-crash-data
     """
 
+    host = "phl.carto.com"
+    table_name = "crash_data_collision_crash_2007_2017"
+
+    @classmethod
+    def fetch(cls, rawdir, **kwargs):
+
+        # large table: download in resumable pages
+        get_paged(cls.table_name, rawdir / "pages")
+
     @classmethod
-    def download(cls, **kwargs):
+    def transform(cls, rawdir, **kwargs):
 
-        url = "https://phl.carto.com/api/v2/sql"
-        gdf = carto2gpd.get(url, "crash_data_collision_crash_2007_2017")
+        gdf = read_frame(rawdir / "pages")
 
-        return (
-            gdf.to_crs(epsg=EPSG)
-            .pipe(geocode, ZIPCodes.get())
-            .pipe(geocode, Neighborhoods.get())
-            .pipe(geocode, PUMAs.get())
-        )
+        return gdf.to_crs(epsg=EPSG).pipe(geocode_many)
 
@@ -3,6 +3,8 @@ import pandas as pd
 from . import EPSG, DEFAULT_YEAR
 from .core import *
 from .regions import *
+from .raw import read_frame, write_frame
+from .carto import get_windowed, year_range
 
 __all__ = ["ParkingViolations", "StreetCodeViolations", "LIViolations", "LIRequests"]
 
@@ -21,24 +23,65 @@ class ParkingViolations(DatasetWithYear):
     https://www.opendataphilly.org/dataset/parking-violations
     """
 
+    host = "phl.carto.com"
+    dependencies = ["ZIPCodes", "Neighborhoods", "PUMAs", "CityLimits"]
     date_columns = ["issue_datetime"]
+    schema = Schema(
+        categories=[
+            "state",
+            "division",
+            "violation_desc",
+            "issuing_agency",
+            *REGION_COLUMNS,
+        ],
+        dates={"issue_datetime": "%Y-%m-%d %H:%M:%S"},
+    )
+    table_name = "parking_violations"
+    fields = [
+        "anon_ticket_number",
+        "issue_datetime",
+        "state",
+        "division",
+        "violation_desc",
+        "fine",
+        "issuing_agency",
+    ]
+    extra_fields = [
+        "anon_plate_id",
+        "location",
+        "lat",
+        "lon",
+        "gps",
+        "zip_code",
+    ]
 
     @classmethod
-    def download(cls, year=2017):
+    def source_where(cls, year=2017, **kwargs):
+        start, end = year_range(year)
+        return (
+            f"issue_datetime >= '{start:%Y-%m-%d}' "
+            f"AND issue_datetime < '{end:%Y-%m-%d}'"
+        )
+
+    @classmethod
+    def fetch(cls, rawdir, year=2017, fields=None):
 
         # Query CARTO
-        gdf = carto2gpd.get(
-            "https://phl.carto.com/api/v2/sql",
-            "parking_violations",
-            where=f"extract(year from issue_datetime) = {year}",
+        gdf = get_windowed(
+            cls.table_name, "issue_datetime", *year_range(year), fields=fields
         )
+        write_frame(gdf, rawdir / "data.parquet")
 
+    @classmethod
+    def transform(cls, rawdir, year=2017):
+
+        gdf = read_frame(rawdir / "data.parquet")
+
+        # millions of points: use the grid index of each region layer
         return (
             replace_missing_geometries(gdf)
             .to_crs(epsg=EPSG)
-            .pipe(geocode, ZIPCodes.get())
-            .pipe(geocode, Neighborhoods.get())
-            .pipe(geocode, PUMAs.get())
+            .pipe(geocode_many, grid=100)
             .assign(
                 issue_datetime=lambda df: pd.to_datetime(df.issue_datetime),
                 year=lambda df: df.issue_datetime.dt.year,
@@ -65,24 +108,49 @@ class StreetCodeViolations(DatasetWithYear):
     https://www.opendataphilly.org/dataset/code-violation-notices
     """
 
+    host = "phl.carto.com"
     date_columns = ["date_added"]
+    schema = Schema(categories=REGION_COLUMNS, dates={"date_added": "%Y-%m-%d %H:%M:%S"})
+
+    table_name = "streets_code_violation_notices"
+    update_column = "date_added"
+    unique_key = "objectid"
+    fields = [
+        "objectid",
+        "date_added",
+        "violation_code",
+        "violation_desc",
+        "address",
+    ]
+    extra_fields = [
+        "ticket_number",
+        "fine_amount",
+        "status",
+        "lat",
+        "lng",
+    ]
 
     @classmethod
-    def download(cls, year=DEFAULT_YEAR):
+    def fetch(cls, rawdir, year=DEFAULT_YEAR, since=None, fields=None):
 
         # Query CARTO
-        gdf = carto2gpd.get(
-            "https://phl.carto.com/api/v2/sql",
-            "streets_code_violation_notices",
-            where=f"extract(year from date_added) = {year}",
+        gdf = get_windowed(
+            cls.table_name,
+            "date_added",
+            *year_range(year, since),
+            fields=fields,
         )
+        write_frame(gdf, rawdir / "data.parquet")
+
+    @classmethod
+    def transform(cls, rawdir, year=DEFAULT_YEAR):
+
+        gdf = read_frame(rawdir / "data.parquet")
 
         return (
             replace_missing_geometries(gdf)
             .to_crs(epsg=EPSG)
-            .pipe(geocode, ZIPCodes.get())
-            .pipe(geocode, Neighborhoods.get())
-            .pipe(geocode, PUMAs.get())
+            .pipe(geocode_many)
             .assign(
                 date_added=lambda df: pd.to_datetime(df.date_added),
                 year=lambda df: df.date_added.dt.year,
@@ -107,24 +175,55 @@ class LIViolations(DatasetWithYear):
     https://www.opendataphilly.org/dataset/licenses-and-inspections-violations
     """
 
+    host = "phl.carto.com"
     date_columns = ["violationdate"]
+    schema = Schema(categories=REGION_COLUMNS, dates={"violationdate": "%Y-%m-%d %H:%M:%S"})
+
+    table_name = "li_violations"
+    update_column = "violationdate"
+    unique_key = "objectid"
+    fields = [
+        "objectid",
+        "violationdate",
+        "casenumber",
+        "violationcode",
+        "violationcodetitle",
+        "violationstatus",
+        "address",
+        "opa_account_num",
+    ]
+    extra_fields = [
+        "casestatus",
+        "caseprioritydesc",
+        "casecreateddate",
+        "zip",
+        "unit_type",
+        "unit_num",
+        "geocode_x",
+        "geocode_y",
+    ]
 
     @classmethod
-    def download(cls, year=DEFAULT_YEAR):
+    def fetch(cls, rawdir, year=DEFAULT_YEAR, since=None, fields=None):
 
         # query CARTO
-        gdf = carto2gpd.get(
-            "https://phl.carto.com/api/v2/sql",
-            "li_violations",
-            where=f"extract(year from violationdate) = {year}",
+        gdf = get_windowed(
+            cls.table_name,
+            "violationdate",
+            *year_range(year, since),
+            fields=fields,
         )
+        write_frame(gdf, rawdir / "data.parquet")
+
+    @classmethod
+    def transform(cls, rawdir, year=DEFAULT_YEAR):
+
+        gdf = read_frame(rawdir / "data.parquet")
 
         return (
             replace_missing_geometries(gdf)
             .to_crs(epsg=EPSG)
-            .pipe(geocode, ZIPCodes.get())
-            .pipe(geocode, Neighborhoods.get())
-            .pipe(geocode, PUMAs.get())
+            .pipe(geocode_many)
             .assign(
                 violationdate=lambda df: pd.to_datetime(df.violationdate),
                 year=lambda df: df.violationdate.dt.year,
@@ -153,10 +252,11 @@ class LIRequests(Dataset):
     https://www.opendataphilly.org/dataset/licenses-and-inspections-service-requests
     """
 
+    host = "phl.carto.com"
     date_columns = ["sr_calldate"]
 
     @classmethod
-    def download(cls, **kwargs):
+    def fetch(cls, rawdir, **kwargs):
 
         # Query CARTO
         gdf = carto2gpd.get(
@@ -164,13 +264,17 @@ class LIRequests(Dataset):
             "li_serv_req",
             where=f"extract(year from sr_calldate) = {year}",
         )
+        write_frame(gdf, rawdir / "data.parquet")
+
+    @classmethod
+    def transform(cls, rawdir, **kwargs):
+
+        gdf = read_frame(rawdir / "data.parquet")
 
         return (
             replace_missing_geometries(gdf)
             .to_crs(epsg=EPSG)
-            .pipe(geocode, ZIPCodes.get())
-            .pipe(geocode, Neighborhoods.get())
-            .pipe(geocode, PUMAs.get())
+            .pipe(geocode_many)
             .assign(
                 sr_calldate=lambda df: pd.to_datetime(df.sr_calldate),
                 year=lambda df: df.sr_calldate.dt.year,
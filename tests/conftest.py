@@ -0,0 +1,111 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pytest
+
+
+class StandIn:
+    """
+    A local HTTP server standing in for a remote API.
+
+    Tests set `app` to a function that takes the request method, path,
+    query parameters, and headers, and returns a (status, headers, body)
+    tuple. Every request is recorded in `requests`, as a (method, path,
+    parameters, headers) tuple.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.requests = []
+        self._lock = threading.Lock()
+
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self._respond(parse_qs(urlparse(self.path).query))
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self._respond(parse_qs(self.rfile.read(length).decode()))
+
+            def _respond(self, params):
+                params = {key: values[0] for key, values in params.items()}
+                path = urlparse(self.path).path
+                with stand_in._lock:
+                    stand_in.requests.append(
+                        (self.command, path, params, dict(self.headers))
+                    )
+                status, headers, body = stand_in.app(
+                    self.command, path, params, self.headers
+                )
+                if isinstance(body, (dict, list)):
+                    body = json.dumps(body).encode()
+                    headers = {"Content-Type": "application/json", **headers}
+
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def queries(self):
+        """
+        Return the SQL queries received, in order.
+        """
+        with self._lock:
+            return [params.get("q") for _, _, params, _ in self.requests]
+
+
+@pytest.fixture
+def stand_in():
+    """
+    A running stand-in HTTP server.
+    """
+    server = StandIn()
+    thread = threading.Thread(target=server.server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.server.shutdown()
+    server.server.server_close()
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """
+    Point the dataset caches of every module at a temporary directory,
+    starting from empty in-memory caches.
+    """
+    import sys
+    from community_profiles.datasets.cache import MEMORY_CACHE, SNAPSHOTS
+
+    for name, module in list(sys.modules.items()):
+        if name.startswith("community_profiles") and hasattr(module, "data_dir"):
+            monkeypatch.setattr(module, "data_dir", tmp_path)
+    MEMORY_CACHE.invalidate()
+    SNAPSHOTS.release()
+    yield tmp_path
+    MEMORY_CACHE.invalidate()
+    SNAPSHOTS.release()
+
+
+@pytest.fixture
+def registry():
+    """
+    The dataset registry, from which the datasets defined by a test are
+    removed afterwards.
+    """
+    from community_profiles.datasets.core import DATASETS
+
+    names = set(DATASETS)
+    yield DATASETS
+    for name in set(DATASETS) - names:
+        DATASETS.pop(name)
@@ -0,0 +1,142 @@
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+from shapely.geometry import box
+from community_profiles.datasets import EPSG
+from community_profiles.datasets.aggregate import where_mask, where_sql
+from community_profiles.datasets.core import Dataset, geocode
+
+
+def _regions(size=5000):
+    """
+    Return a 2 x 2 grid of square regions.
+    """
+    x0, y0 = 2690000, 230000
+    squares = [
+        box(x0 + i * size, y0 + j * size, x0 + (i + 1) * size, y0 + (j + 1) * size)
+        for j in range(2)
+        for i in range(2)
+    ]
+    return gpd.GeoDataFrame(
+        {"puma": ["A", "B", "C", "D"]}, geometry=squares, crs=f"EPSG:{EPSG}"
+    )
+
+
+def _points(count=80, size=5000, seed=42):
+    """
+    Return random points of two kinds inside the regions, away from their
+    edges, plus a few points outside all of them.
+    """
+    rng = np.random.default_rng(seed)
+    x = 2690000 + size * rng.integers(0, 2, count) + rng.uniform(50, size - 50, count)
+    y = 230000 + size * rng.integers(0, 2, count) + rng.uniform(50, size - 50, count)
+    x[:3] = 2690000 + 2 * size + 1000
+    return gpd.GeoDataFrame(
+        {"kind": rng.choice(["a", "b'c"], count)},
+        geometry=gpd.points_from_xy(x, y),
+        crs=f"EPSG:{EPSG}",
+    )
+
+
+def test_where_sql_quotes_the_values():
+    assert where_sql(None) is None
+    assert where_sql({}) is None
+
+    where = {"name": "O'Neill", "code": [1, 2], "kind": ("a", "b'c")}
+    assert where_sql(where) == (
+        "name = 'O''Neill' AND code IN (1, 2) AND kind IN ('a', 'b''c')"
+    )
+    with pytest.raises(ValueError):
+        where_sql({"kind = 'a' OR 1": 1})
+
+
+def test_where_mask():
+    data = pd.DataFrame({"kind": ["a", "b", "c", "a"], "code": [1, 2, 3, 4]})
+    assert where_mask(data, None).all()
+    assert where_mask(data, {"kind": "a"}).tolist() == [True, False, False, True]
+
+    mask = where_mask(data, {"kind": ["a", "b"], "code": (2, 4)})
+    assert mask.tolist() == [False, True, False, True]
+
+
+def _duckdb(rows):
+    """
+    Load the rows into an in-memory DuckDB database with the spatial extension.
+    """
+    duckdb = pytest.importorskip("duckdb")
+    con = duckdb.connect()
+    try:
+        con.load_extension("spatial")
+    except duckdb.Error:
+        pytest.skip("the DuckDB spatial extension is not installed")
+
+    con.execute("CREATE TABLE points (kind VARCHAR, the_geom GEOMETRY)")
+    con.executemany("INSERT INTO points VALUES (?, ST_GeomFromText(?))", rows)
+    return (lambda sql: con.sql(sql).df(), "duckdb")
+
+
+def _spatialite(rows):
+    """
+    Load the rows into an in-memory SQLite database with SpatiaLite.
+    """
+    import sqlite3
+
+    con = sqlite3.connect(":memory:")
+    try:
+        con.enable_load_extension(True)
+        con.load_extension("mod_spatialite")
+    except (AttributeError, sqlite3.Error):
+        pytest.skip("SpatiaLite is not installed")
+
+    con.execute("CREATE TABLE points (kind TEXT, the_geom BLOB)")
+    con.executemany("INSERT INTO points VALUES (?, GeomFromText(?, 4326))", rows)
+    return (con, "spatialite")
+
+
+@pytest.fixture(params=[_duckdb, _spatialite], ids=["duckdb", "spatialite"])
+def source(request):
+    """
+    A SQL source with a "points" table holding the test points.
+    """
+    points = _points().to_crs(epsg=4326)
+    rows = list(zip(points["kind"], points.geometry.to_wkt()))
+    return request.param(rows)
+
+
+@pytest.fixture
+def points(registry, data_dir):
+    """
+    A point dataset with a SQL table, geocoded locally to the regions.
+    """
+
+    class Points(Dataset):
+        dependencies = []
+        table_name = "points"
+
+        @classmethod
+        def download(cls, **kwargs):
+            return geocode(_points(), _regions())
+
+    return Points
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {},
+        {"group": "kind"},
+        {"where": {"kind": "b'c"}},
+        {"group": "kind", "where": {"kind": ["a", "b'c"]}},
+    ],
+    ids=["all", "group", "where", "group-where"],
+)
+def test_sql_counts_match_the_local_counts(points, source, options, monkeypatch):
+    remote = points.aggregate(by="puma", regions=_regions(), source=source, **options)
+
+    # the local fallback counts the geocoded dataset
+    monkeypatch.setattr(points, "table_name", None)
+    local = points.aggregate(by="puma", **options)
+
+    assert len(local) and local["count"].sum() < len(_points())
+    pd.testing.assert_frame_equal(remote, local, check_dtype=False)
@@ -0,0 +1,149 @@
+import os
+import threading
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+from community_profiles.datasets import EPSG
+from community_profiles.datasets.cache import (
+    MEMORY_CACHE,
+    MemoryCache,
+    SnapshotStore,
+    estimate_nbytes,
+)
+from community_profiles.datasets.core import Dataset
+
+
+def _polygons(count=2000, quad_segs=16):
+    """
+    Return a layer of round polygons, each with 4 * quad_segs + 1 vertices.
+    """
+    centers = gpd.points_from_xy(2690000 + 200 * np.arange(count), np.full(count, 250000))
+    return gpd.GeoDataFrame(
+        {"name": [f"region {i}" for i in range(count)], "value": np.arange(count)},
+        geometry=gpd.GeoSeries(centers).buffer(50, quad_segs).values,
+        crs=f"EPSG:{EPSG}",
+    )
+
+
+@pytest.fixture
+def counts(registry, data_dir):
+    """
+    A small dataset that records how many times it was downloaded.
+    """
+
+    class Counts(Dataset):
+        dependencies = []
+        downloads = 0
+
+        @classmethod
+        def download(cls, **kwargs):
+            cls.downloads += 1
+            return pd.DataFrame({"name": ["a", "b", "c"], "value": [1, 2, 3]})
+
+    return Counts
+
+
+def test_memory_cache_evicts_the_least_recently_used():
+    cache = MemoryCache(maxsize=250)
+    frames = {key: pd.DataFrame({"value": [i]}) for i, key in enumerate("abc")}
+
+    cache.put("a", 1, frames["a"], nbytes=100)
+    cache.put("b", 1, frames["b"], nbytes=100)
+    assert cache.get("a", 1) is not None
+
+    # "b" is now the least recently used
+    cache.put("c", 1, frames["c"], nbytes=100)
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 1)["value"].tolist() == [0]
+    assert cache.get("c", 1)["value"].tolist() == [2]
+    assert cache.info()["currsize"] == 200
+
+    # entries over budget are not cached at all
+    cache.put("d", 1, frames["a"], nbytes=300)
+    assert cache.get("d", 1) is None
+    cache.resize(100)
+    assert cache.info()["entries"] == 1 and cache.get("c", 1) is not None
+
+
+def test_get_is_served_from_memory_until_the_file_changes(counts):
+    counts.get()
+    hits = MEMORY_CACHE.info()["hits"]
+    assert counts.get()["value"].tolist() == [1, 2, 3]
+    assert MEMORY_CACHE.info()["hits"] == hits + 1
+
+    # another process rewrites the file
+    storage = counts.get_storage()
+    path = counts.get_path() / storage.filename
+    storage.write(pd.DataFrame({"name": ["a"], "value": [10]}), path)
+    mtime = path.stat().st_mtime_ns + 10**9
+    os.utime(path, ns=(mtime, mtime))
+
+    assert counts.get()["value"].tolist() == [10]
+    assert counts.downloads == 1
+
+
+def test_callers_cannot_mutate_the_cache(counts):
+    data = counts.get()
+    data.loc[0, "value"] = -1
+    data["name"] = data["name"].str.upper()
+    data["extra"] = 0
+
+    again = counts.get()
+    assert again["value"].tolist() == [1, 2, 3]
+    assert again["name"].tolist() == ["a", "b", "c"]
+    assert "extra" not in again
+
+
+def test_polygon_estimate_is_close_to_the_footprint():
+    data = _polygons()
+
+    # the coordinates alone take two doubles each
+    coordinates = data.geometry.to_wkb().str.len().sum()
+    footprint = (
+        coordinates
+        + data["name"].astype(object).memory_usage(index=False, deep=True)
+        + data["value"].nbytes
+    )
+    assert footprint <= estimate_nbytes(data) <= 2 * footprint
+
+
+def test_string_estimate_matches_a_deep_scan():
+    data = pd.DataFrame({"name": [f"name {i}" * 5 for i in range(5000)]})
+    for dtype in [object, pd.StringDtype("python"), "category"]:
+        frame = data.astype(dtype)
+        deep = frame.memory_usage(index=True, deep=True).sum()
+        assert abs(estimate_nbytes(frame) - deep) <= 0.05 * deep
+
+
+def test_slow_snapshot_does_not_block_other_keys():
+    snapshots = SnapshotStore()
+    started, finish = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append("slow")
+        started.set()
+        assert finish.wait(10)
+        return "slow"
+
+    # two callers of the same key share a single load
+    threads = [
+        threading.Thread(target=snapshots.get, args=(("Slow", None, "{}"), slow))
+        for _ in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    assert started.wait(10)
+
+    # while another key loads without waiting for it
+    assert snapshots.get(("Fast", None, "{}"), lambda: "fast") == "fast"
+    finish.set()
+    for thread in threads:
+        thread.join()
+    assert calls == ["slow"]
+    assert snapshots.get(("Slow", None, "{}"), lambda: "again") == "slow"
+
+    snapshots.release("Slow")
+    assert snapshots.get(("Slow", None, "{}"), lambda: "again") == "again"
+    assert snapshots.get(("Fast", None, "{}"), lambda: "again") == "fast"
@@ -0,0 +1,203 @@
+import re
+import threading
+import time
+import pytest
+import requests
+from community_profiles.datasets.carto import get_paged, get_windowed
+
+
+def _month(sql):
+    """
+    Return the month of the window start in a windowed query.
+    """
+    return int(re.search(r">= '\d{4}-(\d{2})", sql).group(1))
+
+
+def _features(month, count=1):
+    """
+    Return a GeoJSON response with `count` points for the input month.
+    """
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [-75.16, 39.95]},
+                "properties": {"month": month, "row": i},
+            }
+            for i in range(count)
+        ],
+    }
+
+
+def _get(stand_in, start="2019-01-01", end="2019-07-01", **kwargs):
+    """
+    Query the stand-in server, by default for the first half of 2019.
+    """
+    kwargs = {"retries": 2, "backoff": 0, "timeout": 10, **kwargs}
+    return get_windowed("table", "date", start, end, url=stand_in.url, **kwargs)
+
+
+def test_windows_are_returned_in_order(stand_in):
+
+    # the later windows respond first
+    def app(method, path, params, headers):
+        month = _month(params["q"])
+        time.sleep(0.05 * (6 - month))
+        return 200, {}, _features(month, count=month)
+
+    stand_in.app = app
+    data = _get(stand_in, max_workers=6)
+
+    assert len(stand_in.requests) == 6
+    assert data.crs == "EPSG:4326"
+    assert data["month"].tolist() == [m for m in range(1, 7) for _ in range(m)]
+
+
+def test_empty_windows(stand_in):
+    def app(method, path, params, headers):
+        month = _month(params["q"])
+        return 200, {}, _features(month, count=month % 2)
+
+    stand_in.app = app
+    data = _get(stand_in)
+    assert data["month"].tolist() == [1, 3, 5]
+
+    stand_in.app = lambda *args: (200, {}, _features(1, count=0))
+    assert len(_get(stand_in)) == 0
+
+
+def test_retry_after_server_error(stand_in):
+    failed = set()
+    lock = threading.Lock()
+
+    # the first request for each window fails
+    def app(method, path, params, headers):
+        month = _month(params["q"])
+        with lock:
+            if month not in failed:
+                failed.add(month)
+                return 503, {}, {"error": ["unavailable"]}
+        return 200, {}, _features(month)
+
+    stand_in.app = app
+    data = _get(stand_in)
+
+    assert data["month"].tolist() == list(range(1, 7))
+    assert len(stand_in.requests) == 12
+
+
+def test_raise_when_retries_are_exhausted(stand_in):
+    stand_in.app = lambda *args: (500, {}, {"error": ["internal error"]})
+
+    with pytest.raises(requests.HTTPError):
+        _get(stand_in, end="2019-02-01", retries=2)
+
+    # the window was tried three times before failing
+    assert len(stand_in.requests) == 3
+
+
+def test_client_errors_are_not_retried(stand_in):
+    stand_in.app = lambda *args: (400, {}, {"error": ['column "x" does not exist']})
+
+    with pytest.raises(requests.HTTPError):
+        _get(stand_in, end="2019-02-01", retries=3)
+    assert len(stand_in.requests) == 1
+
+
+def test_missing_field_falls_back_to_all_fields(stand_in):
+
+    # the table no longer has the "old" column
+    def app(method, path, params, headers):
+        if "old" in params["q"]:
+            return 400, {}, {"error": ['column "old" does not exist']}
+        return 200, {}, _features(_month(params["q"]))
+
+    stand_in.app = app
+    with pytest.warns(UserWarning, match="requesting all fields"):
+        data = _get(stand_in, fields=["month", "old"])
+
+    assert data["month"].tolist() == list(range(1, 7))
+    assert all(q.startswith("SELECT * ") for q in stand_in.queries()[-6:])
+
+
+def _page(after, size, total):
+    """
+    Return a GeoJSON page of the rows with keys after `after`, out of
+    `total` rows keyed 0 to total - 1.
+    """
+    keys = list(range(after + 1, min(after + 1 + size, total)))
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [-75.16, 39.95]},
+                "properties": {"row": key, "page_key": key},
+            }
+            for key in keys
+        ],
+    }
+
+
+def _after(sql):
+    """
+    Return the last key of the previous page in a paged query.
+    """
+    return int(re.search(r"cartodb_id > (-?\d+)", sql).group(1))
+
+
+def test_paged_missing_field_falls_back_to_all_fields(stand_in, tmp_path):
+    from community_profiles.datasets.raw import read_frame
+
+    def app(method, path, params, headers):
+        if "old" in params["q"]:
+            return 400, {}, {"error": ['column "old" does not exist']}
+        return 200, {}, _page(_after(params["q"]), 4, total=10)
+
+    stand_in.app = app
+    with pytest.warns(UserWarning, match="requesting all fields"):
+        rows = get_paged(
+            "table",
+            tmp_path / "pages",
+            fields=["row", "old"],
+            page_size=4,
+            backoff=0,
+            url=stand_in.url,
+        )
+
+    assert rows == 10
+    assert read_frame(tmp_path / "pages")["row"].tolist() == list(range(10))
+    assert all(q.startswith("SELECT *, ") for q in stand_in.queries()[1:])
+
+
+def test_paged_download_resumes_after_an_interrupted_page(stand_in, tmp_path):
+    from community_profiles.datasets.raw import read_frame
+
+    # the third page fails until the server recovers
+    down = True
+
+    def app(method, path, params, headers):
+        after = _after(params["q"])
+        if down and after == 5:
+            return 503, {}, {"error": ["unavailable"]}
+        return 200, {}, _page(after, 3, total=10)
+
+    stand_in.app = app
+    kwargs = {"page_size": 3, "retries": 1, "backoff": 0, "url": stand_in.url}
+    with pytest.raises(requests.HTTPError):
+        get_paged("table", tmp_path / "pages", **kwargs)
+    assert [_after(q) for q in stand_in.queries()] == [-1, 2, 5, 5]
+    assert not (tmp_path / "pages").exists()
+
+    # the completed pages are not downloaded again
+    down = False
+    assert get_paged("table", tmp_path / "pages", **kwargs) == 10
+    assert [_after(q) for q in stand_in.queries()[4:]] == [5, 8]
+    assert read_frame(tmp_path / "pages")["row"].tolist() == list(range(10))
+    assert not (tmp_path / ".pages").exists()
+
+    # a different query starts over
+    stand_in.requests.clear()
+    assert get_paged("table", tmp_path / "pages", where="row < 5", **kwargs) == 10
+    assert _after(stand_in.queries()[0]) == -1
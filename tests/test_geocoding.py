@@ -0,0 +1,253 @@
+import os
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+import shapely
+from shapely.geometry import box
+from community_profiles.datasets import EPSG
+from community_profiles.datasets.core import geocode
+from community_profiles.datasets import geocoding
+from community_profiles.datasets.geocoding import (
+    GridIndex,
+    RegionIndex,
+    geocode_many,
+    grid_index,
+    match_polygons,
+    region_index,
+)
+from community_profiles.datasets.raw import write_frame
+
+# the extent of the stand-in regions
+EXTENT = (2680000, 220000, 2700000, 240000)
+
+
+def _regions(column, count, seed):
+    """
+    Return `count` irregular regions tiling the extent, as the Voronoi
+    cells of random seeds, named in the input column.
+    """
+    rng = np.random.default_rng(seed)
+    extent = box(*EXTENT)
+    seeds = shapely.multipoints(rng.uniform(EXTENT[:2], EXTENT[2:], (count, 2)))
+    cells = shapely.get_parts(shapely.voronoi_polygons(seeds, extend_to=extent))
+    return gpd.GeoDataFrame(
+        {column: [f"{column} {i}" for i in range(count)]},
+        geometry=shapely.intersection(cells, extent),
+        crs=f"EPSG:{EPSG}",
+    )
+
+
+def _layers():
+    """
+    Return stand-ins for the ZIP code, neighborhood, and PUMA layers.
+    """
+    return {
+        "zip_code": _regions("zip_code", 12, seed=0),
+        "neighborhood": _regions("neighborhood", 30, seed=1),
+        "puma": _regions("puma", 4, seed=2),
+    }
+
+
+def _points(count=2000, seed=42, crs=EPSG):
+    """
+    Return random points over and around the extent, in the input CRS,
+    including a few small polygons and a missing geometry.
+    """
+    rng = np.random.default_rng(seed)
+    margin = 2000
+    x = rng.uniform(EXTENT[0] - margin, EXTENT[2] + margin, count)
+    y = rng.uniform(EXTENT[1] - margin, EXTENT[3] + margin, count)
+    geometry = gpd.points_from_xy(x, y)
+    geometry[:5] = shapely.buffer(geometry[:5], 50)
+    geometry[5] = None
+    data = gpd.GeoDataFrame(
+        {"value": np.arange(count)}, geometry=geometry, crs=f"EPSG:{EPSG}"
+    )
+    return data.to_crs(epsg=crs)
+
+
+@pytest.mark.parametrize("crs", [EPSG, 4326])
+def test_geocode_many_matches_chained_geocode(crs):
+    points = _points(crs=crs)
+    layers = _layers()
+
+    chained = points.copy()
+    for layer in layers.values():
+        chained = geocode(chained, layer)
+
+    data = geocode_many(points, layers, processes=1)
+    pd.testing.assert_frame_equal(data, chained)
+
+    # some points are outside all regions
+    assert data["puma"].notnull().sum() < len(points) - 1
+    assert data.loc[5, ["zip_code", "neighborhood", "puma"]].isnull().all()
+
+
+def test_geocode_many_suffixes_existing_columns():
+    points = _points().assign(puma="old")
+    data = geocode_many(points, _layers(), processes=1)
+
+    assert "puma" not in data.columns
+    assert (data["puma_left"] == "old").all()
+    expected = geocode(_points(), _layers()["puma"])["puma"]
+    pd.testing.assert_series_equal(data["puma_right"], expected, check_names=False)
+
+
+@pytest.fixture
+def region_datasets(data_dir, monkeypatch):
+    """
+    Cache the stand-in layers as the ZIP code, neighborhood, and PUMA
+    datasets, with the extent as the city limits.
+    """
+    from community_profiles.datasets import regions
+
+    raw = {
+        regions.ZIPCodes: _layers()["zip_code"],
+        regions.Neighborhoods: _layers()["neighborhood"].rename(
+            columns={"neighborhood": "geo_name"}
+        ),
+        regions.PUMAs: _layers()["puma"].rename(columns={"puma": "geo_name"}),
+        regions.CityLimits: gpd.GeoDataFrame(
+            geometry=[box(*EXTENT)], crs=f"EPSG:{EPSG}"
+        ),
+    }
+    for layer in raw:
+
+        def fetch(cls, rawdir, **kwargs):
+            write_frame(raw[cls], rawdir / "data.parquet")
+
+        monkeypatch.setattr(layer, "fetch", classmethod(fetch))
+    return {"zip_code": "ZIPCodes", "neighborhood": "Neighborhoods", "puma": "PUMAs"}
+
+
+def _edge_points(polygons, cell_size, seed=0):
+    """
+    Return the vertices of the polygons and points on the grid lines,
+    where rounding decides the cell or polygon of a point.
+    """
+    rng = np.random.default_rng(seed)
+    vertices = shapely.get_coordinates(polygons.geometry.values)
+    xlines = np.arange(EXTENT[0], EXTENT[2], cell_size)
+    ylines = np.arange(EXTENT[1], EXTENT[3], cell_size)
+    x = np.r_[vertices[:, 0], xlines, rng.uniform(EXTENT[0], EXTENT[2], len(ylines))]
+    y = np.r_[vertices[:, 1], rng.uniform(EXTENT[1], EXTENT[3], len(xlines)), ylines]
+    return gpd.GeoSeries(gpd.points_from_xy(x, y), crs=polygons.crs)
+
+
+@pytest.mark.parametrize("cell_size", [100, 250])
+def test_grid_matches_exact(region_datasets, cell_size):
+    points = _points(count=5000).to_crs(epsg=EPSG)
+
+    exact = geocode_many(points, _layers(), processes=1)
+    data = geocode_many(points, region_datasets, grid=cell_size, processes=1)
+    pd.testing.assert_frame_equal(data, exact)
+
+    # the grid resolves most points in the city without an exact test
+    polygons = _layers()["neighborhood"]
+    grid = grid_index("Neighborhoods", cell_size=cell_size)
+    inside = points.geometry.centroid.cx[EXTENT[0] : EXTENT[2], EXTENT[1] : EXTENT[3]]
+    codes = grid.lookup(inside.x.to_numpy(), inside.y.to_numpy())
+    assert (codes == GridIndex.BOUNDARY).mean() < 0.25
+
+    # including on the polygon vertices and the grid lines
+    edges = _edge_points(polygons, cell_size)
+    np.testing.assert_array_equal(
+        match_polygons(edges, polygons, grid=grid),
+        match_polygons(edges, polygons),
+    )
+
+
+def test_saved_region_index_is_rebuilt_when_the_layer_changes(
+    region_datasets, monkeypatch
+):
+    from community_profiles.datasets.regions import Neighborhoods
+
+    builds = []
+    build = RegionIndex.build.__func__
+
+    def counted(cls, *args, **kwargs):
+        builds.append(args)
+        return build(cls, *args, **kwargs)
+
+    monkeypatch.setattr(RegionIndex, "build", classmethod(counted))
+
+    index = region_index("Neighborhoods")
+    path = Neighborhoods.get_path() / "index.npz"
+    assert path.exists() and len(index) == 30
+    assert region_index(Neighborhoods) is index
+
+    # a new session loads the saved index rather than building it
+    monkeypatch.setattr(geocoding, "_REGION_INDEXES", {})
+    loaded = region_index("Neighborhoods")
+    assert loaded is not index and loaded.key == index.key
+    assert len(builds) == 1
+
+    # the index is built again when the cache file is touched
+    data_path = Neighborhoods.get_path() / Neighborhoods.get_storage().filename
+    mtime = data_path.stat().st_mtime_ns - 10**9
+    os.utime(data_path, ns=(mtime, mtime))
+    assert region_index("Neighborhoods").key != index.key
+    assert len(builds) == 2
+
+    # or the layer is downloaded again
+    fewer = _regions("geo_name", 5, seed=3)
+    monkeypatch.setattr(
+        Neighborhoods,
+        "fetch",
+        classmethod(
+            lambda cls, rawdir, **kw: write_frame(fewer, rawdir / "data.parquet")
+        ),
+    )
+    Neighborhoods.get(fresh=True)
+    assert len(region_index("Neighborhoods")) == 5
+    assert len(builds) == 3
+
+    # and points are matched to the new regions
+    points = _points().to_crs(epsg=EPSG)
+    data = geocode_many(points, {"neighborhood": "Neighborhoods"}, processes=1)
+    exact = geocode_many(
+        points,
+        {"neighborhood": fewer.rename(columns={"geo_name": "neighborhood"})},
+        processes=1,
+    )
+    pd.testing.assert_frame_equal(data, exact)
+
+
+@pytest.mark.parametrize("crosswalk", [False, True], ids=["layers", "crosswalk"])
+@pytest.mark.parametrize("method", ["fork", "forkserver", "spawn"])
+def test_parallel_matches_serial(region_datasets, method, crosswalk, monkeypatch):
+    import multiprocessing
+    from community_profiles.datasets.geocoding import build_crosswalk
+
+    if method not in multiprocessing.get_all_start_methods():
+        pytest.skip(f"'{method}' is not supported on this platform")
+    monkeypatch.setattr(geocoding, "_start_method", lambda: method)
+
+    # a layer in memory, and layers matched with their saved indexes
+    points = _points(count=3000).to_crs(epsg=EPSG)
+    layers = {**region_datasets, "zip_code": _layers()["zip_code"]}
+    kwargs = {"grid": 100}
+    if crosswalk:
+        tracts = _regions("census_tract", 60, seed=4)
+        kwargs["crosswalk"] = (tracts, build_crosswalk(tracts, layers))
+
+    serial = geocode_many(points, layers, processes=1, **kwargs)
+    parallel = geocode_many(points, layers, processes=2, **kwargs)
+    pd.testing.assert_frame_equal(parallel, serial)
+    assert serial["neighborhood"].notnull().any()
+
+
+def test_spatial_chunks_cover_every_point():
+    from community_profiles.datasets.geocoding import _spatial_chunks
+
+    rng = np.random.default_rng(0)
+    x, y = rng.uniform(0, 100, 1000), rng.uniform(0, 100, 1000)
+    x[:10] = np.nan
+    chunks = _spatial_chunks(x, y, 8)
+
+    assert len(chunks) == 8
+    assert sorted(np.concatenate(chunks)) == list(range(1000))
+
+    # points without coordinates come last
+    assert set(range(10)) <= set(chunks[-1])
@@ -0,0 +1,202 @@
+import io
+import json
+import zipfile
+import pandas as pd
+import pytest
+from community_profiles.datasets.core import DATASETS, Dataset
+from community_profiles.datasets.raw import download_file
+
+ETAG = '"abc123"'
+LAST_MODIFIED = "Tue, 01 Oct 2019 12:00:00 GMT"
+
+
+def _zip_bytes():
+    """
+    Return a small ZIP archive holding a CSV file.
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, mode="w") as archive:
+        archive.writestr("data.csv", "name,value\na,1\nb,2\n")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def zip_server(stand_in):
+    """
+    A stand-in server for a static ZIP file with validators, answering
+    conditional requests with 304 Not Modified.
+    """
+    body = _zip_bytes()
+
+    def app(method, path, params, headers):
+        if headers.get("If-None-Match") == ETAG:
+            return 304, {}, b""
+        return 200, {"ETag": ETAG, "Last-Modified": LAST_MODIFIED}, body
+
+    stand_in.app = app
+    stand_in.body = body
+    return stand_in
+
+
+class StandInZip(Dataset):
+    """
+    A dataset downloaded as a ZIP archive from the stand-in server.
+    """
+
+    url = None
+    transforms = 0
+
+    @classmethod
+    def fetch(cls, rawdir, **kwargs):
+        return download_file(cls.url, rawdir / "data.zip", conditional=True)
+
+    @classmethod
+    def transform(cls, rawdir, **kwargs):
+        cls.transforms += 1
+        with zipfile.ZipFile(rawdir / "data.zip") as archive:
+            with archive.open("data.csv") as f:
+                return pd.read_csv(f)
+
+
+@pytest.fixture
+def dataset(zip_server, data_dir, monkeypatch):
+    monkeypatch.setattr(StandInZip, "url", f"{zip_server.url}/data.zip")
+    monkeypatch.setattr(StandInZip, "transforms", 0)
+    yield StandInZip
+    DATASETS.pop("StandInZip", None)
+
+
+def test_validators_are_stored(zip_server, tmp_path):
+    path = tmp_path / "data.zip"
+    assert download_file(f"{zip_server.url}/data.zip", path, conditional=True)
+
+    assert path.read_bytes() == zip_server.body
+    with (tmp_path / "data.zip.http.json").open() as f:
+        validators = json.load(f)
+    assert validators["etag"] == ETAG
+    assert validators["last_modified"] == LAST_MODIFIED
+
+    # the first request has nothing to validate
+    headers = zip_server.requests[0][3]
+    assert "If-None-Match" not in headers
+
+
+def test_not_modified_keeps_the_file(zip_server, tmp_path):
+    url, path = f"{zip_server.url}/data.zip", tmp_path / "data.zip"
+    download_file(url, path, conditional=True)
+    mtime = path.stat().st_mtime_ns
+
+    assert download_file(url, path, conditional=True) is False
+    assert path.read_bytes() == zip_server.body
+    assert path.stat().st_mtime_ns == mtime
+
+    headers = zip_server.requests[1][3]
+    assert headers["If-None-Match"] == ETAG
+    assert headers["If-Modified-Since"] == LAST_MODIFIED
+
+
+def test_not_modified_keeps_the_processed_cache(dataset):
+    data = dataset.get()
+    assert data["value"].tolist() == [1, 2]
+    assert dataset.transforms == 1
+
+    data_path = dataset.get_path() / dataset.get_storage().filename
+    mtime = data_path.stat().st_mtime_ns
+
+    # a fresh download of an unchanged file is not processed again
+    data = dataset.get(fresh=True)
+    assert data["value"].tolist() == [1, 2]
+    assert dataset.transforms == 1
+    assert data_path.stat().st_mtime_ns == mtime
+    assert dataset.raw_meta()["modified"] is False
+
+
+def test_rebuild_in_dependency_order(registry, data_dir):
+    from community_profiles.datasets.raw import rebuild_all
+
+    class Dependent(Dataset):
+        dependencies = ["Boundaries"]
+
+        @classmethod
+        def fetch(cls, rawdir, **kwargs):
+            pd.DataFrame({"id": [1, 2]}).to_csv(rawdir / "data.csv", index=False)
+
+        @classmethod
+        def transform(cls, rawdir, **kwargs):
+            version = Boundaries.get()["version"].iloc[0]
+            return pd.read_csv(rawdir / "data.csv").assign(version=version)
+
+    class Boundaries(Dataset):
+        dependencies = []
+        version = 1
+
+        @classmethod
+        def fetch(cls, rawdir, **kwargs):
+            pd.DataFrame({"id": [1]}).to_csv(rawdir / "data.csv", index=False)
+
+        @classmethod
+        def transform(cls, rawdir, **kwargs):
+            return pd.read_csv(rawdir / "data.csv").assign(version=cls.version)
+
+    assert Dependent.get()["version"].tolist() == [1, 1]
+
+    # the boundaries are rebuilt first, although they were registered last
+    Boundaries.version = 2
+    rebuilt = rebuild_all(names=["Dependent", "Boundaries"], processes=1)
+    assert rebuilt == [("Boundaries", {}), ("Dependent", {})]
+    assert Dependent.get()["version"].tolist() == [2, 2]
+
+
+def test_incremental_refresh_merges_by_key(registry, data_dir):
+    from community_profiles.datasets.raw import read_frame, rebuild_all, write_frame
+
+    class Requests(Dataset):
+        dependencies = []
+        update_column = "date"
+        unique_key = "id"
+        source = pd.DataFrame(
+            {
+                "id": [1, 2, 3, 4, 5],
+                "date": pd.date_range("2019-01-01", periods=5),
+                "status": ["open"] * 5,
+            }
+        )
+        since = []
+
+        @classmethod
+        def fetch(cls, rawdir, since=None, **kwargs):
+            cls.since.append(since)
+            rows = cls.source
+            if since is not None:
+                rows = rows.loc[rows["date"] >= since]
+            write_frame(rows, rawdir / "data.parquet")
+
+        @classmethod
+        def transform(cls, rawdir, **kwargs):
+            return read_frame(rawdir / "data.parquet")
+
+    assert len(Requests.get()) == 5
+
+    # a request is closed and a new one opened
+    Requests.source = pd.concat(
+        [
+            Requests.source.assign(status=["open"] * 4 + ["closed"]),
+            pd.DataFrame(
+                {"id": [6], "date": [pd.Timestamp("2019-01-06")], "status": ["open"]}
+            ),
+        ],
+        ignore_index=True,
+    )
+    data = Requests.get(refresh="incremental")
+
+    # only the rows since the watermark, less the overlap, are fetched
+    assert Requests.since == [None, pd.Timestamp("2019-01-03")]
+    assert data["id"].is_unique and sorted(data["id"]) == [1, 2, 3, 4, 5, 6]
+    status = data.sort_values("id")["status"].tolist()
+    assert status == ["open"] * 4 + ["closed", "open"]
+
+    # the raw data is merged too, so a rebuild gives the same rows
+    raw = read_frame(Requests.get_raw_path() / "data.parquet")
+    assert raw["id"].is_unique and len(raw) == 6
+    rebuild_all(names=["Requests"], processes=1)
+    assert sorted(Requests.get()["id"]) == [1, 2, 3, 4, 5, 6]
@@ -0,0 +1,101 @@
+import geopandas as gpd
+import pytest
+from shapely.geometry import box
+from community_profiles.datasets import EPSG, regions
+from community_profiles.datasets.raw import write_frame
+from community_profiles.datasets.regions import (
+    CensusTracts,
+    Neighborhoods,
+    PUMAs,
+    TractCrosswalk,
+    ZIPCodes,
+)
+
+
+def _squares(column, names, size):
+    """
+    Return a row of square polygons, named in the input column.
+    """
+    x0, y0 = 2690000, 230000
+    return gpd.GeoDataFrame(
+        {column: names},
+        geometry=[
+            box(x0 + i * size, y0, x0 + (i + 1) * size, y0 + size)
+            for i in range(len(names))
+        ],
+        crs=f"EPSG:{EPSG}",
+    )
+
+
+@pytest.fixture
+def boundaries(data_dir, monkeypatch):
+    """
+    Stand-ins for the raw region boundaries: four tracts, within two
+    ZIP codes and a single neighborhood and PUMA. Tests change the
+    boundaries by replacing an entry and fetching the layer again.
+    """
+    raw = {
+        CensusTracts: _squares("geo_name", ["1", "2", "3", "4"], 1000),
+        ZIPCodes: _squares("zip_code", ["19104", "19103"], 2000),
+        Neighborhoods: _squares("geo_name", ["Fairmount"], 4000),
+        PUMAs: _squares("geo_name", ["4204101"], 4000),
+    }
+    for layer in raw:
+
+        def fetch(cls, rawdir, **kwargs):
+            write_frame(raw[cls], rawdir / "data.parquet")
+
+        monkeypatch.setattr(layer, "fetch", classmethod(fetch))
+
+    # count the times the crosswalk is computed
+    calls = []
+
+    def build_crosswalk(*args, **kwargs):
+        calls.append(args)
+        return regions.build_crosswalk.__wrapped__(*args, **kwargs)
+
+    build_crosswalk.__wrapped__ = regions.build_crosswalk
+    monkeypatch.setattr(regions, "build_crosswalk", build_crosswalk)
+    return raw, calls
+
+
+def test_crosswalk_is_computed_again_for_newer_regions(boundaries):
+    raw, calls = boundaries
+    crosswalk = TractCrosswalk.get(year=2018)
+    assert crosswalk["neighborhood"].tolist() == ["Fairmount"] * 4
+    assert not TractCrosswalk.is_stale(year=2018)
+
+    # the crosswalk is up to date until a region is downloaded again
+    TractCrosswalk.get(year=2018)
+    assert len(calls) == 1
+
+    raw[Neighborhoods] = _squares("geo_name", ["Spring Garden"], 4000)
+    Neighborhoods.get(fresh=True)
+    assert TractCrosswalk.is_stale(year=2018)
+
+    crosswalk = TractCrosswalk.get(year=2018)
+    assert crosswalk["neighborhood"].tolist() == ["Spring Garden"] * 4
+    assert len(calls) == 2
+    assert not TractCrosswalk.is_stale(year=2018)
+
+
+def test_crosswalk_with_regions_in_another_format(boundaries, monkeypatch):
+    raw, calls = boundaries
+
+    # the PUMAs are cached as CSV
+    monkeypatch.setattr(PUMAs, "storage_format", "csv")
+    ZIPCodes.get()
+    ZIPCodes.get(mmap=True)
+
+    crosswalk = TractCrosswalk.get(year=2018)
+    assert crosswalk["zip_code"].tolist() == ["19104", "19104", "19103", "19103"]
+    assert not (PUMAs.get_path() / "data.parquet").exists()
+
+    # and the ZIP codes only as an Arrow copy
+    (ZIPCodes.get_path() / "data.parquet").unlink()
+    assert (ZIPCodes.get_path() / "data.arrow").exists()
+
+    # so neither counts as removed
+    assert not TractCrosswalk.is_stale(year=2018)
+    TractCrosswalk.get(year=2018)
+    assert len(calls) == 1
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+from community_profiles.datasets.cache import MEMORY_CACHE
+from community_profiles.datasets.core import Dataset
+from community_profiles.datasets.schema import Schema
+
+
+def _records():
+    """
+    Return rows with nullable integers, low-cardinality strings, text
+    dates, and small integers.
+    """
+    return pd.DataFrame(
+        {
+            "objectid": [1, None, 3, 4],
+            "kind": ["permit", "violation", "permit", "permit"],
+            "date": ["2019-01-05", "2019-02-10", "2019-03-15", None],
+            "units": [1, 2, 3, 120],
+            "value": [0.5, 1.5, np.nan, 2.5],
+        }
+    )
+
+
+@pytest.fixture
+def records(registry, data_dir):
+    """
+    A dataset with a declared schema.
+    """
+
+    class Records(Dataset):
+        dependencies = []
+        date_columns = ["date"]
+        schema = Schema(
+            dtypes={"objectid": "Int64"},
+            categories=["kind"],
+            dates={"date": "%Y-%m-%d"},
+        )
+
+        @classmethod
+        def download(cls, **kwargs):
+            return _records()
+
+    return Records
+
+
+@pytest.mark.parametrize("format", ["csv", "parquet"])
+def test_schema_round_trip(records, format, monkeypatch):
+    monkeypatch.setattr(records, "storage_format", format)
+    expected = records.get_schema().enforce(_records())
+    assert records.get().dtypes.equals(expected.dtypes)
+
+    # read back from the file, not the memory cache
+    MEMORY_CACHE.invalidate()
+    data = records.get()
+    assert (records.get_path() / f"data.{format}").exists()
+    pd.testing.assert_frame_equal(data, expected)
+
+    assert data["objectid"].dtype == "Int64"
+    assert data["kind"].dtype == "category"
+    assert data["date"].dtype.kind == "M"
+    assert data["units"].dtype == "int8"
+
+    # a subset of the columns keeps its types
+    subset = records.get(columns=["kind", "date"])
+    assert subset.dtypes.equals(expected.dtypes[["kind", "date"]])
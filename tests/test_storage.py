@@ -0,0 +1,170 @@
+import json
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+from community_profiles.datasets import EPSG
+from community_profiles.datasets.core import DatasetWithYear
+from community_profiles.datasets.raw import read_frame, rebuild_all, write_frame
+from community_profiles.datasets.storage import STORAGE_FORMATS, migrate_cache
+
+
+def _points(year, count=6):
+    """
+    Return a small point layer for the input year.
+    """
+    return gpd.GeoDataFrame(
+        {
+            "name": [f"p{i}" for i in range(count)],
+            "value": np.arange(count) * year,
+        },
+        geometry=gpd.points_from_xy(
+            2690000 + 100 * np.arange(count), 250000 + 50 * np.arange(count)
+        ),
+        crs=f"EPSG:{EPSG}",
+    )
+
+
+@pytest.fixture
+def yearly(registry, data_dir):
+    """
+    A yearly dataset with a raw stage, cached as CSV.
+    """
+
+    class Yearly(DatasetWithYear):
+        dependencies = []
+        storage_format = "csv"
+
+        @classmethod
+        def fetch(cls, rawdir, year=2019):
+            write_frame(_points(year), rawdir / "data.parquet")
+
+        @classmethod
+        def transform(cls, rawdir, year=2019):
+            return read_frame(rawdir / "data.parquet")
+
+    return Yearly
+
+
+def _forget_kwargs(dirname, data_dir):
+    """
+    Make the input cache look like one written before the load keywords
+    were recorded in its meta-data and the catalog.
+    """
+    with (dirname / "meta.json").open() as f:
+        meta = json.load(f)
+    del meta["kwargs"]
+    with (dirname / "meta.json").open(mode="w") as f:
+        json.dump(meta, f)
+    (data_dir / "catalog.json").unlink()
+
+
+def test_migration_keeps_the_keywords(yearly, data_dir):
+    yearly.get(year=2018)
+    dirname = yearly.get_path(year=2018)
+    _forget_kwargs(dirname, data_dir)
+
+    assert migrate_cache("parquet", names=["Yearly"]) == [dirname]
+    assert (dirname / "data.parquet").exists()
+
+    # the keywords are recovered from the directory layout
+    assert yearly.status(year=2018)["kwargs"] == {"year": 2018}
+    with (dirname / "meta.json").open() as f:
+        assert json.load(f)["kwargs"] == {"year": 2018}
+
+    # so the migrated cache is rebuilt for its own year
+    assert rebuild_all(names=["Yearly"], processes=1) == [("Yearly", {"year": 2018})]
+    assert not yearly.get_path().exists()
+
+
+def test_rebuilt_catalog_keeps_the_keywords(yearly, data_dir):
+    from community_profiles.datasets.catalog import rebuild_catalog
+
+    yearly.get(year=2017)
+    dirname = yearly.get_path(year=2017)
+    _forget_kwargs(dirname, data_dir)
+
+    rebuild_catalog()
+    entry = yearly.status(year=2017)
+    assert entry["kwargs"] == {"year": 2017}
+    assert entry["rows"] == 6
+    assert list(entry["files"]) == ["csv"]
+    with (dirname / "meta.json").open() as f:
+        assert json.load(f)["kwargs"] == {"year": 2017}
+    assert rebuild_all(names=["Yearly"], processes=1) == [("Yearly", {"year": 2017})]
+
+
+@pytest.mark.parametrize("format", ["csv", "parquet", "feather"])
+def test_columns_and_filters_are_pushed_down(format, tmp_path, monkeypatch):
+    storage = STORAGE_FORMATS[format]
+    data = _points(2019, count=10)
+    data["date"] = pd.date_range("2019-01-01", periods=10, freq="MS")
+    path = tmp_path / storage.filename
+    storage.write(data, path)
+
+    # record the columns and filters given to the file readers
+    import pyarrow.parquet as pq
+
+    calls = []
+    for module, func in [(pd, "read_csv"), (pq, "read_table")]:
+        original = getattr(module, func)
+
+        def spy(*args, _original=original, **kwargs):
+            calls.append(kwargs)
+            return _original(*args, **kwargs)
+
+        monkeypatch.setattr(module, func, spy)
+
+    # the filter column is read, but not returned
+    filters = [("value", ">=", 2019 * 6)]
+    out = storage.read(path, columns=["name"], filters=filters)
+    assert list(out.columns) == ["name"]
+    assert out["name"].tolist() == ["p6", "p7", "p8", "p9"]
+    if format == "csv":
+        assert calls[0]["usecols"] == ["name", "value"]
+    elif format == "parquet":
+        assert calls[0]["columns"] == ["name"]
+        assert calls[0]["filters"] == [filters]
+
+    # groups of filters are combined with OR
+    filters = [
+        [("name", "in", ["p0", "p1"])],
+        [("date", ">=", pd.Timestamp("2019-09-01"))],
+    ]
+    out = storage.read(path, columns=["name", "geometry"], filters=filters)
+    assert out["name"].tolist() == ["p0", "p1", "p8", "p9"]
+    assert list(out["geometry"]) == list(data.geometry.iloc[[0, 1, 8, 9]])
+
+    # and the same in chunks
+    chunks = storage.iter_read(path, 3, columns=["name"], filters=filters)
+    assert pd.concat(chunks)["name"].tolist() == ["p0", "p1", "p8", "p9"]
+
+
+def test_get_pushes_down_columns_and_filters(yearly):
+    out = yearly.get(year=2018, columns=["name"], filters=[("value", "<", 2018 * 2)])
+    assert list(out.columns) == ["name"]
+    assert out["name"].tolist() == ["p0", "p1"]
+
+    # the full dataset is still cached
+    assert len(yearly.get(year=2018)) == 6
+
+
+@pytest.mark.parametrize("format", ["csv", "parquet", "feather"])
+def test_get_years_skips_filtered_years(yearly, format, monkeypatch):
+    monkeypatch.setattr(yearly, "storage_format", format)
+    years = [2015, 2016, 2017, 2018]
+
+    data = yearly.get_years(years, filters=[("year", ">=", 2017)])
+    assert sorted(data["year"].unique()) == [2017, 2018]
+    assert len(data) == 12
+
+    # the other years are never downloaded or read
+    assert [y for y in years if yearly.get_path(year=y).exists()] == [2017, 2018]
+
+    # filters on other columns still apply within the selected years
+    filters = [[("year", "==", 2015)], [("year", "==", 2018), ("name", "in", ["p1"])]]
+    data = yearly.get_years(years, columns=["year", "name", "value"], filters=filters)
+    assert list(data.columns) == ["year", "name", "value"]
+    assert data["year"].tolist() == [2015] * 6 + [2018]
+    assert data["value"].tolist()[-1] == 2018
+    assert not yearly.get_path(year=2016).exists()